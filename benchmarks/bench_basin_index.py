@@ -0,0 +1,81 @@
+"""
+Point-in-basin benchmark for basin_index.BasinIndex.
+
+Builds 256 synthetic basins with ragged, many-vertex boundaries tiling the
+Nevada bounding box (a stand-in for NVAdminGWBoundaries), then times single
+lookups and the vectorized bulk lookup. Pass --geojson to run against the
+exported basin file instead.
+
+    python benchmarks/bench_basin_index.py --points 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+from shapely.geometry import Polygon  # noqa: E402
+
+from basin_index import BasinIndex  # noqa: E402
+
+WEST, SOUTH, EAST, NORTH = -120.0, 35.0, -114.0, 42.0
+
+
+def ragged_edge(x0, y0, x1, y1, n, seed):
+    """Points along an edge with a deterministic wiggle shared by both neighbours."""
+    t = np.linspace(0, 1, n, endpoint=False)
+    wiggle = 0.01 * np.sin(2 * np.pi * t * 7 + seed)
+    xs = x0 + (x1 - x0) * t + (y1 - y0 != 0) * wiggle
+    ys = y0 + (y1 - y0) * t + (x1 - x0 != 0) * wiggle
+    return list(zip(xs, ys))
+
+
+def synthetic_basins(n_side=16, vertices_per_edge=100):
+    xs = np.linspace(WEST, EAST, n_side + 1)
+    ys = np.linspace(SOUTH, NORTH, n_side + 1)
+    ids, names, polygons = [], [], []
+    for i in range(n_side):
+        for j in range(n_side):
+            x0, x1, y0, y1 = xs[i], xs[i + 1], ys[j], ys[j + 1]
+            ring = (ragged_edge(x0, y0, x1, y0, vertices_per_edge, j)
+                    + ragged_edge(x1, y0, x1, y1, vertices_per_edge, i + 1)
+                    + ragged_edge(x1, y1, x0, y1, vertices_per_edge, j + 1)
+                    + ragged_edge(x0, y1, x0, y0, vertices_per_edge, i))
+            ids.append(f"{i * n_side + j:03d}")
+            names.append(f"Basin {i}-{j}")
+            polygons.append(Polygon(ring).buffer(0))
+    return BasinIndex(ids, names, polygons)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--geojson", help="exported NVAdminGWBoundaries GeoJSON")
+    args = parser.parse_args()
+
+    index = BasinIndex.from_geojson(args.geojson) if args.geojson else synthetic_basins()
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(SOUTH, NORTH, args.points)
+    lons = rng.uniform(WEST, EAST, args.points)
+
+    n_single = min(5000, args.points)
+    start = time.perf_counter()
+    singles = [index.lookup(lat, lon) for lat, lon in zip(lats[:n_single], lons[:n_single])]
+    single = (time.perf_counter() - start) / n_single
+
+    start = time.perf_counter()
+    basin_ids, _ = index.lookup_many(lats, lons)
+    bulk = time.perf_counter() - start
+
+    # Bulk and single lookups must agree
+    assert [s["BasinID"] if s else None for s in singles] == list(basin_ids[:n_single])
+
+    print(f"{len(index)} basins")
+    print(f"single lookup  {single * 1e6:8.1f} us/point")
+    print(f"bulk lookup    {bulk / args.points * 1e6:8.2f} us/point ({args.points / bulk:,.0f} points/s)")
+
+
+if __name__ == "__main__":
+    main()
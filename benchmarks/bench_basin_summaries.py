@@ -0,0 +1,73 @@
+"""
+Benchmark for basin_summaries: whole-basin model distributions.
+
+Uses the 256 synthetic basins from bench_basin_index and a synthetic
+Nevada climate cube, with soil read per cell from a stand-in texture
+sampler. Checks that the cell weights add up to the basin areas, then
+times one basin, the full 256-basin table and a lookup in the table.
+
+    python benchmarks/bench_basin_summaries.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import shapely  # noqa: E402
+
+from basin_summaries import KM_PER_DEGREE, BasinSummaries, basin_cells, basin_summary  # noqa: E402
+from bench_basin_index import synthetic_basins  # noqa: E402
+from climate_cube import write_synthetic_cube  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+
+
+class StripedSoil:
+    """Texture classes 2-12 in diagonal stripes, standing in for SoilRaster."""
+
+    def sample_many(self, lats, lons):
+        codes = 2 + (np.floor((np.asarray(lats) + np.asarray(lons)) * 4).astype(int) % 11)
+        return codes, None
+
+
+def main():
+    engine = load_engine()
+    basins = synthetic_basins()
+    soil = StripedSoil()
+    with tempfile.TemporaryDirectory() as tmp:
+        cube = write_synthetic_cube(os.path.join(tmp, "cube"))
+
+        geometry = basins.geometries[100]
+        _, _, weights, _ = basin_cells(geometry, cube.grid, cube.shape)
+        lat = shapely.get_y(shapely.centroid(geometry))
+        expected = shapely.area(geometry) * KM_PER_DEGREE ** 2 * np.cos(np.radians(lat))
+        assert abs(weights.sum() / expected - 1) < 0.01, (weights.sum(), expected)
+
+        start = time.perf_counter()
+        one = basin_summary(engine, cube, basins, 100, soil_raster=soil)
+        one_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        table = pd.concat([basin_summary(engine, cube, basins, i, soil_raster=soil) for i in range(len(basins))],
+                          ignore_index=True)
+        table_s = time.perf_counter() - start
+
+    summaries = BasinSummaries(table)
+    start = time.perf_counter()
+    for basin_id in summaries.table["BasinID"].unique():
+        summaries.lookup(basin_id, 2.0)
+    lookup_us = (time.perf_counter() - start) / len(summaries) * 1e6
+
+    print(f"basin 100: {int(one['n_cells'].iloc[0])} cells, {one['area_km2'].iloc[0]:.0f} km2, {one_ms:.1f} ms")
+    print(f"all {len(summaries)} basins x {len(engine.root_depths)} rooting depths: {table_s:.2f} s")
+    print(f"table lookup: {lookup_us:.0f} us")
+    print(summaries.lookup(basins.basin_ids[100], 2.0)[["wtd2", "LAI_p10", "LAI_median", "LAI_p90",
+                                                      "gwsubs_median", "percoverthresh"]].round(2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Read-latency benchmark for the offline climate cube.
+
+Writes a synthetic Nevada cube to a temporary directory and times random
+single-cell series reads, the gm_point dictionary used by the explorer and a
+full fetch_point_data call with the climate served from the cube.
+
+    python benchmarks/bench_climate_cube.py --reads 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+from fake_ee import FakeEE, sample_responses
+
+fake_ee = FakeEE(sample_responses())
+sys.modules["ee"] = fake_ee
+
+import numpy as np  # noqa: E402
+
+import point_data  # noqa: E402
+from climate_cube import write_synthetic_cube  # noqa: E402
+
+
+def time_per_call(func, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        func(lat, lon)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    points = list(zip(rng.uniform(35.1, 41.9, args.reads), rng.uniform(-119.9, -114.1, args.reads)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cube = write_synthetic_cube(tmp)
+        print(f"cube shape {cube.data.shape}, {cube.data.nbytes / 1e6:.1f} MB")
+
+        # The series read must be a view into the memory map, not a copy
+        assert np.shares_memory(cube.series(*points[0]), cube.data)
+
+        print(f"series view   {time_per_call(cube.series, points) * 1e6:8.2f} us/read")
+        print(f"gm_point dict {time_per_call(cube.gm_point, points[:10000]) * 1e6:8.2f} us/read")
+
+        fake_ee.reset()
+        fetch = lambda lat, lon: point_data.fetch_point_data(lat, lon, cube=cube)  # noqa: E731
+        elapsed = time_per_call(fetch, points[:1000])
+        print(f"fetch_point_data {elapsed * 1e6:8.2f} us/call, "
+              f"{fake_ee.round_trips / 1000:.1f} EE round trips/call (basin and soil only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Startup cost of loading the model coefficients.
+
+Compares parsing the bundled CSV into a ModelEngine with opening the compiled
+memory-mapped tensor, checks that both give identical coefficients, and
+checks that a tampered copy of a published release is rejected while a new
+release listed in the release manifest is accepted.
+
+    python benchmarks/bench_coefficients.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import coefficients  # noqa: E402
+from model_engine import ModelEngine  # noqa: E402
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    path = coefficients.coefficients_path()
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_dir = os.path.join(tmp, "compiled")
+        _, compile_ms = timed(lambda: coefficients.compile_coefficients(path, compiled_dir), repeat=5)
+
+        from_csv, csv_ms = timed(lambda: ModelEngine.from_frame(pd.read_csv(path)))
+        (tensor, wtd_table, index), mmap_ms = timed(lambda: coefficients.load_compiled(path, compiled_dir))
+        assert np.array_equal(from_csv.coefficients, tensor, equal_nan=True)
+        assert np.array_equal(from_csv.wtd_table, wtd_table, equal_nan=True)
+        assert from_csv.soils == index["soils"] and from_csv.root_depths == index["root_depths"]
+
+        release_dir = os.path.join(tmp, "release")
+        os.makedirs(release_dir)
+        shutil.copy(os.path.join(os.path.dirname(path), coefficients.MANIFEST_FILE), release_dir)
+        tampered = os.path.join(release_dir, os.path.basename(path))
+        shutil.copy(path, tampered)
+        with open(tampered, "a") as f:
+            f.write("\n")
+        try:
+            coefficients.compile_coefficients(tampered, compiled_dir)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("tampered coefficient file was accepted")
+
+        # The same bytes published as a new release, with their manifest entry
+        manifest = coefficients.release_manifest(release_dir)
+        with open(tampered, "rb") as f:
+            manifest[os.path.basename(path)] = coefficients.content_hash(f.read())
+        with open(os.path.join(release_dir, coefficients.MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+        coefficients.compile_coefficients(tampered, compiled_dir)
+
+    print(f"{'read_csv + from_frame':<24}{csv_ms:8.2f} ms")
+    print(f"{'compile (once)':<24}{compile_ms:8.2f} ms")
+    print(f"{'load compiled (mmap)':<24}{mmap_ms:8.2f} ms")
+    print(f"coefficients identical, release {index['sha256'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
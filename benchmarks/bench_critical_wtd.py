@@ -0,0 +1,85 @@
+"""
+Benchmark for critical_wtd.critical_wtd: the vectorized crossing-depth solver.
+
+Checks the interpolated coefficients against the modeled ones at the
+modeled depths, then checks every solved depth, including those at the
+deepest modeled WTD and at sites where meeting the target is not
+monotone in depth, against a dense scan of depths 1 mm apart. Times the
+solver for as many sites as there are GRIDMET cells over Nevada, with
+every soil and rooting depth mixed.
+
+    python benchmarks/bench_critical_wtd.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+
+from coefficients import load_engine  # noqa: E402
+from critical_wtd import critical_wtd, percent_over  # noqa: E402
+from model_engine import FREE_DRAIN_WTD, lai_threshold  # noqa: E402
+
+SCAN_STEP = 0.001
+
+
+def random_sites(engine, n_sites, rng, n_years=30):
+    pr = rng.gamma(4.0, 60.0, (n_sites, n_years)) * rng.uniform(0.5, 2.5, (n_sites, 1))
+    eto = rng.normal(1250.0, 80.0, (n_sites, n_years))
+    soils = rng.choice(engine.soils, n_sites)
+    rootdepths = rng.choice(engine.root_depths, n_sites)
+    return pr, eto, soils, rootdepths
+
+
+def main():
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+
+    s = np.arange(len(engine.soils))[:, None]
+    r = np.arange(len(engine.root_depths))[None, :]
+    for i, wtd in enumerate(engine.wtds):
+        if wtd != FREE_DRAIN_WTD:
+            np.testing.assert_allclose(engine.coefficients_at(wtd, s, r), engine.coefficients[:, :, i])
+    print("interpolated coefficients match the modeled WTDs")
+
+    pr, eto, soils, rootdepths = random_sites(engine, 2000, rng)
+    percent = 50
+    depths = critical_wtd(engine, pr, eto, soils, rootdepths, percent=percent)
+    features = engine.formulation.features(pr, eto)
+    laithresh = lai_threshold(rootdepths)
+    si, ri = engine.soil_index(soils), engine.rootdepth_index(rootdepths)
+    scan = np.arange(1.0, 6.0 + SCAN_STEP / 2, SCAN_STEP)
+    meets = np.stack([
+        percent_over(engine, features, engine.coefficients_at(np.full(len(pr), wtd), si, ri), laithresh) >= percent
+        for wtd in scan
+    ], axis=-1)
+    solved = np.isfinite(depths) & (depths < 6)
+    # Deepest scanned depth down to which every depth meets the target
+    first_miss = np.where(meets.all(axis=-1), len(scan), np.argmin(meets, axis=-1))
+    monotone = (meets.sum(axis=-1) == first_miss)
+    expected = scan[np.maximum(first_miss - 1, 0)]
+    check = np.isfinite(depths) & (first_miss > 0)
+    # The exact depth lies between the last scanned depth meeting the target and the first one missing it
+    wrong = np.flatnonzero(check & (np.abs(depths - expected) > SCAN_STEP))
+    assert not len(wrong), list(zip(wrong, depths[wrong], expected[wrong]))
+    counts = {
+        "between modeled WTDs": int(solved.sum()),
+        "at deepest modeled WTD": int((depths == 6).sum()),
+        "no groundwater needed": int(np.isinf(depths).sum()),
+        "target missed": int(np.isnan(depths).sum()),
+    }
+    print(f"{check.sum()} solved depths ({(check & ~monotone).sum()} at non-monotone sites) match a 1 mm scan; "
+          f"{counts}")
+
+    n_sites = 170 * 145
+    pr, eto, soils, rootdepths = random_sites(engine, n_sites, rng)
+    start = time.perf_counter()
+    critical_wtd(engine, pr, eto, soils, rootdepths)
+    elapsed = time.perf_counter() - start
+    print(f"{n_sites} sites in {elapsed:.2f} s ({n_sites / elapsed:.0f} sites/s, single process)")
+
+
+if __name__ == "__main__":
+    main()
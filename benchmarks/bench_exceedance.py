@@ -0,0 +1,92 @@
+"""
+Benchmark for model_engine.exceedance_percent: % of years over a target LAI.
+
+Checks the sorted-array search against a direct count of the years at or
+above each target, including rows with missing years, and against the
+scenario surfaces evaluated at a given target, then times one slider move
+(percent_over on the cached summaries) against the per-WTD filter and
+groupby it replaces, and the full threshold grid for a batch of sites.
+
+    python benchmarks/bench_exceedance.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+from model_engine import LAI_THRESHOLD_GRID, exceedance_percent  # noqa: E402
+from result_summaries import percent_over, summarize_results  # noqa: E402
+from scenarios import scenario_surfaces  # noqa: E402
+
+
+def groupby_percent_over(dfsum, laithresh):
+    """The per-rerun filter and groupby the results page used before the sorted arrays."""
+    n_years = dfsum["wy"].nunique()
+    counts = dfsum[dfsum["LAIcalc"] >= laithresh].groupby("wtd2").size()
+    counts = counts.reindex(dict.fromkeys(dfsum["wtd2"]), fill_value=0)
+    return np.round(counts.to_numpy() / n_years, 2) * 100
+
+
+def best_of(func, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+
+    lai = rng.gamma(2.0, 0.8, (200, 6, 30))
+    lai[rng.random(lai.shape) < 0.05] = np.nan
+    lai[0, 0] = np.nan
+    thresholds = np.array(LAI_THRESHOLD_GRID + (0.0, 10.0))
+    with np.errstate(invalid="ignore"):
+        expected = np.stack([
+            np.where(np.isnan(lai).all(axis=-1), np.nan, (lai >= t).sum(axis=-1) / (~np.isnan(lai)).sum(axis=-1) * 100)
+            for t in thresholds
+        ], axis=-1)
+    np.testing.assert_allclose(exceedance_percent(np.sort(lai, axis=-1), thresholds), expected, rtol=1e-12)
+    print(f"{lai.shape[0] * lai.shape[1]} rows x {len(thresholds)} targets match a direct count")
+
+    climate = climate_frame()
+    cube = engine.evaluate_location(climate["pr"].to_numpy(), climate["eto"].to_numpy())
+    dfsum = engine.slice(cube, "loam", 2.0).to_frame(climate)
+    summaries = summarize_results(dfsum)
+    for laithresh in np.arange(0.0, 4.01, 0.1):
+        np.testing.assert_allclose(percent_over(summaries, laithresh)["percoverthresh"],
+                                   groupby_percent_over(dfsum, laithresh))
+    print("percent_over matches the groupby count for every slider position")
+
+    pr, eto = rng.gamma(4.0, 60.0, 30), rng.normal(1250.0, 80.0, 30)
+    scenarios = scenario_surfaces(engine, pr, eto, "loam", 2.0)
+    for laithresh in (0.5, 1.3, 2.7):
+        np.testing.assert_allclose(
+            scenarios.with_threshold(laithresh).surfaces["percoverthresh"],
+            scenario_surfaces(engine, pr, eto, "loam", 2.0, laithresh=laithresh).surfaces["percoverthresh"],
+            rtol=1e-12
+        )
+    print("scenario surfaces rethresholded from sorted LAI match a fresh evaluation")
+
+    old = best_of(lambda: groupby_percent_over(dfsum, 1.7))
+    new = best_of(lambda: percent_over(summaries, 1.7))
+    print(f"slider move: groupby {old * 1000:.2f} ms, sorted search {new * 1000:.3f} ms")
+
+    sites = engine.evaluate_sites(rng.gamma(4.0, 60.0, (10000, 30)), rng.normal(1250.0, 80.0, (10000, 30)),
+                                  np.full(10000, "loam"), np.full(10000, 2.0))
+    grid = best_of(lambda: sites.exceedance(), repeat=3)
+    print(f"{len(LAI_THRESHOLD_GRID)}-target exceedance curve for 10000 sites x {len(engine.wtds)} WTDs: "
+          f"{grid * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark for figure_pool.FigurePool: results charts rendered in worker processes.
+
+Renders a cold results page (the nine native charts at screen resolution,
+through an empty figure_cache.FigureCache) on the calling thread and with
+warm pools of 1, 2, 4 and 8 workers, and plotnine's on the calling thread
+for reference. Checks that the pool returns the same PNG bytes as the
+calling thread and leaves no shared memory behind. Prints the time to the first and to the last chart and
+the longest stall of another thread of the process while the page
+renders (what another session served by the same process would see).
+
+    python benchmarks/bench_figure_pool.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+from figure_cache import SCREEN_DPI, FigureCache, iter_cached_figures  # noqa: E402
+from figure_pool import FigurePool  # noqa: E402
+from native_figures import RENDERERS  # noqa: E402
+from result_figures import LAI_PLOT_NAMES, PLOT_NAMES  # noqa: E402
+from result_summaries import summarize_results  # noqa: E402
+
+SOIL, ROOTDEPTH, LAITHRESH = "loam", 2.0, 2.0
+WORKERS = (1, 2, 4, 8)
+SHM_DIR = "/dev/shm"
+
+
+class StallMonitor:
+    """Thread waking every millisecond and recording the longest gap between its wake-ups."""
+
+    def __init__(self):
+        self.longest = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(0.001):
+            now = time.perf_counter()
+            self.longest = max(self.longest, now - last)
+            last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def cold_page(summaries, renderer, pool):
+    """Render every chart through an empty cache; returns the PNGs, first and last chart times and longest stall."""
+    build_plots, build_lai_plots = RENDERERS[renderer]
+    groups = [
+        (("page",), tuple(name for name in PLOT_NAMES if name not in LAI_PLOT_NAMES), lambda: build_plots(summaries)),
+        (("page", LAITHRESH), LAI_PLOT_NAMES, lambda: build_lai_plots(summaries, LAITHRESH)),
+    ]
+    figures = {}
+    with StallMonitor() as monitor:
+        start = time.perf_counter()
+        for name, png in iter_cached_figures(FigureCache(), groups, SCREEN_DPI, pool=pool):
+            if not figures:
+                first = time.perf_counter() - start
+            figures[name] = png
+        last = time.perf_counter() - start
+    assert set(figures) == set(PLOT_NAMES)
+    return figures, first, last, monitor.longest
+
+
+def shared_segments():
+    return set(os.listdir(SHM_DIR)) if os.path.isdir(SHM_DIR) else set()
+
+
+def main():
+    engine = load_engine()
+    climate = climate_frame()
+    summaries = summarize_results(
+        engine.evaluate(climate["pr"].to_numpy(), climate["eto"].to_numpy(), SOIL, ROOTDEPTH).to_frame(climate))
+    print(f"{os.cpu_count()} CPUs; cold page of {len(PLOT_NAMES)} charts at {SCREEN_DPI} dpi")
+    segments = shared_segments()
+
+    for renderer in RENDERERS:
+        cold_page(summaries, renderer, None)
+        expected, first, last, stall = cold_page(summaries, renderer, None)
+        print(f"  {renderer:>8} script thread: first chart {first:.2f} s, all {last:.2f} s, "
+              f"other threads stalled up to {stall * 1000:.0f} ms")
+        # plotnine plots do not pickle; the pool serves the native renderer only
+        for workers in WORKERS if renderer == "native" else ():
+            start = time.perf_counter()
+            pool = FigurePool(workers)
+            warm = time.perf_counter() - start
+            try:
+                figures, first, last, stall = cold_page(summaries, renderer, pool)
+            finally:
+                pool.shutdown()
+            assert figures == expected, renderer
+            print(f"  {renderer:>8} {workers} workers: first chart {first:.2f} s, all {last:.2f} s, "
+                  f"other threads stalled up to {stall * 1000:.0f} ms (pool warm-up {warm:.1f} s)")
+
+    assert shared_segments() <= segments, shared_segments() - segments
+    print("pool PNGs match the script thread's; no shared memory segments left behind")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Parity check and comparison benchmark for the model formulation registry.
+
+Checks the registry's wb-cubic engine against the pandas pipeline it
+replaced in the Dash app for every soil and rooting depth, then evaluates
+every registered formulation on the same batch of synthetic sites and
+reports how far their LAI and GW subsidy disagree.
+
+    python benchmarks/bench_formulations.py --sites 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from coefficients import coefficients_path, evaluate_formulations, load_engine  # noqa: E402
+from model_engine import FORMULATIONS, WB_CUBIC  # noqa: E402
+
+
+def legacy_wb_cubic(dfee, dfcoeffs, soil, rd_val):
+    """The merge-based pipeline from code_python/app/app.py, with wb already divided by 100."""
+    dfclimate = dfee.copy()
+    dfclimate['wb2'] = dfclimate['wb'] ** 2
+    dfclimate['wb3'] = dfclimate['wb'] ** 3
+    dfcoeffs = dfcoeffs[(dfcoeffs['rootdepth'] == rd_val) & (dfcoeffs['soiltype'] == soil)]
+    dfclimate = pd.concat([dfclimate.assign(WTD=w) for w in [1, 3, 6, 12]], ignore_index=True)
+    dfsum = pd.merge(dfclimate, dfcoeffs, on='WTD', how='left')
+    for response in ("LAI", "aet", "aetgw", "gwsubs"):
+        dfsum[f'{response}calc'] = (
+            dfsum[f'{response}Intercept'] +
+            dfsum['wb'] * dfsum[f'{response}wbx'] +
+            dfsum['wb2'] * dfsum[f'{response}wb2x'] +
+            dfsum['wb3'] * dfsum[f'{response}wb3x']
+        )
+    return dfsum
+
+
+def check_parity(seed=0):
+    rng = np.random.default_rng(seed)
+    years = np.arange(1991, 2024)
+    dfee = pd.DataFrame({"wy": years, "pr": rng.gamma(4.0, 60.0, len(years)),
+                         "eto": rng.normal(1250.0, 80.0, len(years))})
+    dfee["wb"] = (dfee["pr"] - dfee["eto"]) / 100
+    dfcoeffs = pd.read_csv(coefficients_path(WB_CUBIC.name))
+    engine = load_engine(WB_CUBIC.name)
+
+    for soil in engine.soils:
+        for rd in engine.root_depths:
+            expected = legacy_wb_cubic(dfee, dfcoeffs, soil, rd)
+            dfsum = engine.evaluate(dfee["pr"], dfee["eto"], soil, rd).to_frame(dfee)
+            for column in ("LAIcalc", "aetcalc", "aetgwcalc"):
+                np.testing.assert_allclose(dfsum[column], expected[column], rtol=1e-9, atol=1e-9)
+            drains = expected["WTD"] != 12
+            np.testing.assert_allclose(dfsum.loc[drains, "gwsubscalc"], expected.loc[drains, "gwsubscalc"],
+                                       rtol=1e-9, atol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=30)
+    args = parser.parse_args()
+
+    check_parity()
+    print("wb-cubic engine matches the Dash pipeline for every soil and rooting depth")
+
+    rng = np.random.default_rng(1)
+    pr = rng.gamma(4.0, 60.0, (args.sites, args.years))
+    eto = rng.normal(1250.0, 80.0, (args.sites, args.years))
+    for name in FORMULATIONS:
+        load_engine(name)
+
+    start = time.perf_counter()
+    results = evaluate_formulations(pr, eto)
+    elapsed = (time.perf_counter() - start) * 1000
+    n_evaluations = sum(result.lai.size for result in results.values())
+    print(f"{len(results)} formulations x {args.sites} sites x {args.years} years, every soil/rd/WTD: "
+          f"{elapsed:.1f} ms ({n_evaluations / elapsed / 1000:.1f} M evaluations/s)")
+
+    ppetquad, wb_cubic = results["ppetquad"], results["wb-cubic"]
+    for field in ("lai", "aet", "gwsubs"):
+        diff = np.abs(getattr(ppetquad, field) - np.maximum(getattr(wb_cubic, field), 0))
+        print(f"  |ppetquad - wb-cubic| {field:<7} median {np.nanmedian(diff):8.3f}  p95 {np.nanpercentile(diff, 95):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Parity check and speed benchmark for model_engine.ModelEngine.
+
+Runs the original pandas merge/apply pipeline from the Streamlit app and the
+vectorized engine on the same climate series for every soil and rooting
+depth, asserts that LAI, AET, AETgw and GW subsidy agree, then times both.
+
+    python benchmarks/bench_model_engine.py
+"""
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from model_engine import ModelEngine  # noqa: E402
+
+COEFFICIENTS = os.path.join(APP_DIR, "MixedEffectsModelCoefficients102924_ppetquad.csv")
+OUTPUTS = ["LAIcalc", "aetcalc", "aetgwcalc", "gwsubscalc"]
+
+
+def climate_frame(seed=0, years=range(1991, 2021)):
+    rng = np.random.default_rng(seed)
+    years = list(years)
+    dfee = pd.DataFrame({
+        "wy": years,
+        "pr": rng.gamma(4.0, 60.0, len(years)),
+        "eto": rng.normal(1250.0, 80.0, len(years)),
+    })
+    dfee["wb"] = dfee["pr"] - dfee["eto"]
+    dfee["eto2"] = dfee["eto"] / 10
+    dfee["pr2"] = dfee["pr"] ** 2
+    dfee["pet2"] = dfee["eto2"] ** 2
+    return dfee
+
+
+def legacy_pipeline(dfclimate, dfcoeffs, rd, soilt):
+    """The pandas pipeline as it was written in watersmart_streamlit_app.py."""
+    dfcoeffs = dfcoeffs.copy()
+    dfcoeffs['wtd2'] = dfcoeffs['WTD'].apply(lambda x: "Free Drain" if x == 12 else f"{x} m")
+    dfcoeffs = dfcoeffs[dfcoeffs['rootdepth'] == rd]
+    dfcoeffs = dfcoeffs[dfcoeffs['soiltype'] == soilt]
+
+    wtd_values = [1, 3, 6, 12]
+    dfclimate = pd.concat([dfclimate.assign(WTD=wtd) for wtd in wtd_values], ignore_index=True)
+    dfsum = pd.merge(dfclimate, dfcoeffs, left_on='WTD', right_on='WTD', how='left')
+
+    for response in ("LAI", "aet", "aetgw"):
+        dfsum[f"{response}calc"] = (
+            dfsum[f'{response}Intercept'] +
+            dfsum['pr'] * dfsum[f'{response}Px'] +
+            dfsum['eto2'] * dfsum[f'{response}PETx'] +
+            dfsum['pr2'] * dfsum[f'{response}P2x'] +
+            dfsum['pet2'] * dfsum[f'{response}PET2x']
+        )
+
+    etabase = dfsum[(dfsum["wtd2"] == "Free Drain")].copy()
+    etabase['aetcalc2'] = etabase['aetcalc']
+    etabase2 = etabase[['wy', 'aetcalc2']]
+    dfsum = pd.merge(dfsum, etabase2, on="wy", how="left")
+    dfsum['gwsubscalc'] = (dfsum['aetcalc'] - dfsum['aetcalc2'])
+    dfsum['gwsubscalcratio'] = (dfsum['gwsubscalc'] / dfsum['aetcalc'])
+
+    dfsum["aetgwcalc"] = dfsum["aetgwcalc"].apply(lambda x: 0 if x < 1 else x)
+    dfsum["LAIcalc"] = dfsum["LAIcalc"].apply(lambda x: 0 if x < 0 else x)
+    dfsum["aetcalc"] = dfsum["aetcalc"].apply(lambda x: 0 if x < 1 else x)
+    dfsum["gwsubscalc"] = dfsum["gwsubscalc"].apply(lambda x: 0 if x < 1 else x)
+    dfsum["gwsubscalc"] = dfsum[["gwsubscalcratio", "gwsubscalc", "aetcalc"]].apply(
+        lambda x: x["aetcalc"] if x["gwsubscalcratio"] > 1 else x["gwsubscalc"], axis=1)
+    return dfsum
+
+
+def engine_pipeline(engine, dfclimate, rd, soilt):
+    result = engine.evaluate(dfclimate["pr"].to_numpy(), dfclimate["eto"].to_numpy(), soil=soilt, rootdepth=rd)
+    return result.to_frame(dfclimate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    dfcoeffs = pd.read_csv(COEFFICIENTS)
+    engine = ModelEngine.from_frame(dfcoeffs)
+    combos = [(rd, soil) for rd in engine.root_depths for soil in engine.soils]
+
+    for seed in range(5):
+        dfclimate = climate_frame(seed)
+        for rd, soil in combos:
+            expected = legacy_pipeline(dfclimate, dfcoeffs, rd, soil)
+            actual = engine_pipeline(engine, dfclimate, rd, soil)
+            for column in OUTPUTS:
+                np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=1e-9,
+                                           err_msg=f"{column} differs for {soil} / {rd} m")
+    print(f"parity: {len(combos) * 5} soil x rootdepth x climate cases match")
+
+    dfclimate = climate_frame()
+    rd, soil = 2.0, "loam"
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        legacy_pipeline(dfclimate, dfcoeffs, rd, soil)
+    legacy = (time.perf_counter() - start) / args.repeats
+
+    pr, eto = dfclimate["pr"].to_numpy(), dfclimate["eto"].to_numpy()
+    start = time.perf_counter()
+    for _ in range(args.repeats * 50):
+        engine.evaluate(pr, eto, soil=soil, rootdepth=rd)
+    vectorized = (time.perf_counter() - start) / (args.repeats * 50)
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        engine_pipeline(engine, dfclimate, rd, soil)
+    with_frame = (time.perf_counter() - start) / args.repeats
+
+    # The full location cube must slice to the same answer as a direct evaluation
+    cube = engine.evaluate_location(pr, eto)
+    for rd_i, soil_i in combos:
+        np.testing.assert_array_equal(engine.slice(cube, soil_i, rd_i).lai,
+                                      engine.evaluate(pr, eto, soil=soil_i, rootdepth=rd_i).lai)
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        engine.evaluate_location(pr, eto)
+    full_cube = (time.perf_counter() - start) / args.repeats
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        engine.slice(cube, soil, rd).to_frame(dfclimate)
+    selector = (time.perf_counter() - start) / args.repeats
+
+    print(f"pandas pipeline        {legacy * 1e3:8.2f} ms")
+    print(f"engine (arrays)        {vectorized * 1e3:8.3f} ms  ({legacy / vectorized:,.0f}x)")
+    print(f"engine + to_frame      {with_frame * 1e3:8.2f} ms  ({legacy / with_frame:,.0f}x)")
+    print(f"full location cube     {full_cube * 1e3:8.3f} ms  ({cube.lai.size} evaluations)")
+    print(f"selector change        {selector * 1e3:8.2f} ms  (slice + to_frame)")
+
+
+if __name__ == "__main__":
+    main()
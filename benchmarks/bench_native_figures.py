@@ -0,0 +1,129 @@
+"""
+Benchmark for native_figures: the matplotlib template renderer against plotnine.
+
+For the default point, a point with an extra interpolated WTD, a point
+with coefficient uncertainty bands and a point with both (the added WTD
+has no bands), renders every results chart with both
+renderers and checks that the native chart spans the same axis range as
+the plotnine one and that the two data panels look alike (correlation of
+their blurred, resampled greyscale pixels). Then times each chart per
+renderer, with the native templates already built.
+
+    python benchmarks/bench_native_figures.py
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from PIL import Image, ImageFilter  # noqa: E402
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import coefficients_path, load_engine  # noqa: E402
+from figure_cache import SCREEN_DPI, figure_png  # noqa: E402
+from model_engine import FREE_DRAIN_WTD  # noqa: E402
+from native_figures import RENDERERS  # noqa: E402
+from result_figures import PLOT_NAMES  # noqa: E402
+from result_summaries import summarize_results  # noqa: E402
+from uncertainty import CoefficientUncertainty, propagate  # noqa: E402
+
+SOIL, ROOTDEPTH, LAITHRESH = "loam", 2.0, 2.0
+# Smallest accepted image correlation, and axis range difference as a share of the plotnine range
+MIN_SIMILARITY = 0.9
+MAX_LIMIT_ERROR = 0.02
+COMPARE_SIZE = (240, 180)
+COMPARE_DPI = 100
+
+
+def build(renderer, summaries, uncertainty=None):
+    build_plots, build_lai_plots = RENDERERS[renderer]
+    return {**build_plots(summaries, uncertainty), **build_lai_plots(summaries, LAITHRESH, uncertainty)}
+
+
+def panel_image(figure):
+    """Greyscale pixels of the figure's data panel, resampled to COMPARE_SIZE and blurred."""
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=COMPARE_DPI, facecolor="white")
+    image = Image.open(buffer).convert("L")
+    box = figure.axes[0].get_window_extent().transformed(figure.dpi_scale_trans.inverted())
+    box = [round(v * COMPARE_DPI) for v in (box.x0, figure.get_figheight() - box.y1,
+                                           box.x1, figure.get_figheight() - box.y0)]
+    image = image.crop(box).resize(COMPARE_SIZE, Image.LANCZOS).filter(ImageFilter.GaussianBlur(1))
+    return np.asarray(image, dtype=np.float64)
+
+
+def limits(figure):
+    ax = figure.axes[0]
+    return np.array(ax.get_xlim() + ax.get_ylim())
+
+
+def compare(name, summaries, uncertainty=None):
+    plotnine, native = build("plotnine", summaries, uncertainty), build("native", summaries, uncertainty)
+    scores = {}
+    for plot in PLOT_NAMES:
+        figure = plotnine[plot].draw()
+        expected = limits(figure)
+        expected_panel = panel_image(figure)
+        plt.close(figure)
+        figure = native[plot].draw()
+        actual = limits(figure)
+        actual_panel = panel_image(figure)
+        span = np.repeat([expected[1] - expected[0], expected[3] - expected[2]], 2)
+        if plot.endswith("2"):
+            # Discrete WTD axis: plotnine positions the categories differently, only the y range compares
+            span[:2] = np.inf
+        error = np.abs(actual - expected) / span
+        assert np.all(error <= MAX_LIMIT_ERROR), (name, plot, expected, actual)
+        scores[plot] = float(np.corrcoef(expected_panel.ravel(), actual_panel.ravel())[0, 1])
+        assert scores[plot] >= MIN_SIMILARITY, (name, plot, scores[plot])
+    print(f"{name}: axis ranges match, image similarity "
+          + " ".join(f"{plot} {score:.2f}" for plot, score in scores.items()))
+
+
+def main():
+    engine = load_engine()
+    climate = climate_frame()
+    pr, eto = climate["pr"].to_numpy(), climate["eto"].to_numpy()
+    summaries = summarize_results(engine.evaluate(pr, eto, SOIL, ROOTDEPTH).to_frame(climate))
+    compare("modeled WTDs", summaries)
+
+    depths = sorted({wtd for wtd in engine.wtds if wtd != FREE_DRAIN_WTD} | {2.5})
+    extra = summarize_results(engine.evaluate_depths(pr, eto, SOIL, ROOTDEPTH, depths).to_frame(climate))
+    compare("extra WTD", extra)
+
+    dfse = pd.read_csv(coefficients_path(engine.name))
+    columns = [column for column in dfse.columns if column.startswith(("LAI", "aet", "gwsubs"))]
+    dfse[columns] = dfse[columns].abs() * 0.05
+    bands = propagate(engine, CoefficientUncertainty.from_standard_errors(engine, dfse), pr, eto, SOIL, ROOTDEPTH,
+                      n_samples=500)
+    compare("uncertainty bands", summaries, bands)
+    compare("extra WTD + uncertainty bands", extra, bands)
+
+    print(f"per-chart render time at {SCREEN_DPI} dpi (build + draw + PNG, best of 3):")
+    for renderer in RENDERERS:
+        plots = build(renderer, summaries)
+        figure_png(plots["lai1"], dpi=SCREEN_DPI)
+        timings = {}
+        for plot in PLOT_NAMES:
+            best = np.inf
+            for _ in range(3):
+                start = time.perf_counter()
+                figure_png(build(renderer, summaries)[plot], dpi=SCREEN_DPI)
+                best = min(best, time.perf_counter() - start)
+            timings[plot] = best
+        print(f"  {renderer:>8}: " + " ".join(f"{plot} {seconds * 1000:.0f}" for plot, seconds in timings.items())
+              + f" ms; total {sum(timings.values()):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Round-trip benchmark for the "Get Data!" lookup.
+
+Runs the original per-value getInfo() sequence and the batched
+point_data.fetch_point_data against a fake Earth Engine backend with a
+simulated network latency, and reports round trips and wall time for each.
+The cached rows repeat the lookup through a PointCache.
+
+    python benchmarks/bench_point_fetch.py --latency-ms 150
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+from fake_ee import FakeEE, sample_responses
+
+fake_ee = FakeEE(sample_responses())
+sys.modules["ee"] = fake_ee
+
+import point_data  # noqa: E402
+from point_cache import PointCache  # noqa: E402
+
+
+def legacy_fetch(ee, lat, lon):
+    """The lookup sequence the app used before fetch_point_data."""
+    coords_ee = ee.Geometry.Point([lon, lat])
+    eto_img = ee.Image(point_data.ETO_ASSET)
+    precip_img = ee.Image(point_data.PRECIP_ASSET)
+    pwd_img = ee.Image(point_data.PWD_ASSET)
+    admin_gw = ee.FeatureCollection(point_data.ADMIN_GW_ASSET)
+
+    eto_value = eto_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_eto')
+    precip_value = precip_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_pr')
+    pwd_value = pwd_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_deficit')
+    basin_id = admin_gw.filterBounds(coords_ee).getInfo()['features'][0]['properties']['BasinID']
+    basin_name = admin_gw.filterBounds(coords_ee).getInfo()['features'][0]['properties']['BasinName']
+
+    soil = ee.Image(point_data.SOIL_TEXTURE_ASSET).rename('texture')
+    soil_lu_dict = ee.Dictionary({str(code): name for code, name in point_data.SOIL_TEXTURES.items()})
+    soil_point = soil.reduceRegion(reducer=ee.Reducer.mean(), geometry=coords_ee, scale=30).get('texture')
+    soil_string = soil_lu_dict.get(ee.Number(soil_point).format('%.0f')).getInfo()
+
+    gm_wy = point_data.water_year_collection().toBands()
+    gm_point = gm_wy.reduceRegion(reducer=ee.Reducer.mean(), geometry=coords_ee, scale=4000).getInfo()
+    return eto_value, precip_value, pwd_value, basin_id, basin_name, soil_string, gm_point
+
+
+def run(label, func, repeats):
+    fake_ee.reset()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:<10} round trips/click: {fake_ee.round_trips / repeats:4.1f}   "
+          f"latency/click: {elapsed * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="simulated latency per getInfo()")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    fake_ee.latency = args.latency_ms / 1000.0
+
+    lat, lon = 39.5, -117.0
+    legacy = run("legacy", lambda: legacy_fetch(fake_ee, lat, lon), args.repeats)
+    batched = run("batched", lambda: point_data.fetch_point_data(lat, lon), args.repeats)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PointCache(os.path.join(tmp, "points.sqlite"))
+        point_data.fetch_point_data(lat, lon, cache=cache)
+        # A click ~100 m away falls in the same GRIDMET cell but a new soil cell
+        run("nearby", lambda: point_data.fetch_point_data(lat + 0.0009, lon, cache=cache), 1)
+        run("cached", lambda: point_data.fetch_point_data(lat, lon, cache=cache), args.repeats)
+
+    # Both paths must describe the same location
+    assert legacy[:6] == (batched.eto_value, batched.precip_value, batched.pwd_value,
+                          batched.basin_id, batched.basin_name, batched.soil_string)
+    assert legacy[6] == batched.gm_point
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark for report_pdf.build_report: the single-pass vector PDF report.
+
+Builds the report for one point from the same plots both ways: the raster
+path the app used before (300 DPI PNGs pasted onto letter canvases and
+saved with PdfPages, the cover page and definitions as separate ReportLab
+documents, all merged with PyPDF2) and build_report with the charts as SVG
+drawings. Each
+path runs in a fresh process so that its peak RSS is its own. Checks that
+the vector report has the same pages, all on US Letter, and that the
+chart text is real text in the PDF. Prints build time, peak RSS and size.
+
+    python benchmarks/bench_report_pdf.py
+"""
+import io
+import os
+import resource
+import sys
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.backends.backend_pdf import PdfPages  # noqa: E402
+from PIL import Image  # noqa: E402
+from PyPDF2 import PdfMerger, PdfReader  # noqa: E402
+from reportlab.lib.pagesizes import LETTER  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate  # noqa: E402
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+from definitions_references import definitions_text  # noqa: E402
+from figure_cache import figure_png, figure_svg  # noqa: E402
+from native_figures import RENDERERS  # noqa: E402
+from report_pdf import (DPI, PAIRED_PLOTS, REPORT_FIGURE_SIZES, build_report, cover_story,  # noqa: E402
+                        definitions_story)
+from result_summaries import summarize_results  # noqa: E402
+
+SOIL, ROOTDEPTH, LAITHRESH = "loam", 2.0, 2.0
+COVER = ("2026-01-01", 39.5, -117.0, SOIL, 250.0, 1250.0, ROOTDEPTH, "101", "Test Basin")
+REPEATS = 3
+LETTER_POINTS = (612, 792)
+LETTER_WIDTH_IN = 8.5
+LETTER_HEIGHT_IN = 11
+
+
+def png_bytes(size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def result_plots():
+    engine = load_engine()
+    climate = climate_frame()
+    summaries = summarize_results(
+        engine.evaluate(climate["pr"].to_numpy(), climate["eto"].to_numpy(), SOIL, ROOTDEPTH).to_frame(climate))
+    build_plots, build_lai_plots = RENDERERS["native"]
+    return {**build_plots(summaries), **build_lai_plots(summaries, LAITHRESH)}
+
+
+def story_pdf(story):
+    """A list of flowables as a standalone letter PDF buffer."""
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=LETTER).build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def add_canvas_page(pdf, canvas):
+    fig, ax = plt.subplots(figsize=(LETTER_WIDTH_IN, LETTER_HEIGHT_IN))
+    ax.axis("off")
+    ax.imshow(canvas)
+    pdf.savefig(fig, bbox_inches="tight")
+    plt.close(fig)
+
+
+def save_plots_to_pdf(images):
+    """PNG bytes by plot name pasted centred onto letter canvases: pwd1 alone, then each of PAIRED_PLOTS stacked."""
+    buffer = io.BytesIO()
+    canvas_px = (int(LETTER_WIDTH_IN * DPI), int(LETTER_HEIGHT_IN * DPI))
+    with PdfPages(buffer) as pdf:
+        for names in [("pwd1",)] + [(name1, name2) for name1, _, name2, _ in PAIRED_PLOTS]:
+            pages = [Image.open(io.BytesIO(images[name])) for name in names]
+            canvas = Image.new("RGB", canvas_px, (255, 255, 255))
+            y = (canvas_px[1] - sum(page.height for page in pages)) // 2
+            for page in pages:
+                canvas.paste(page, ((canvas_px[0] - page.width) // 2, y))
+                y += page.height
+            add_canvas_page(pdf, canvas)
+    buffer.seek(0)
+    return buffer
+
+
+def merge_pdfs(*buffers):
+    merger = PdfMerger()
+    for buffer in buffers:
+        merger.append(buffer)
+    merged = io.BytesIO()
+    merger.write(merged)
+    merger.close()
+    return merged.getvalue()
+
+
+def raster_report(plots, map_png, logo_png):
+    images = {name: figure_png(plot, REPORT_FIGURE_SIZES[name], DPI) for name, plot in plots.items()}
+    intro_page = story_pdf(cover_story(*COVER, map_img_buffer=io.BytesIO(map_png)))
+    definitions_page = story_pdf(definitions_story(definitions_text, logo_png))
+    return merge_pdfs(intro_page, save_plots_to_pdf(images), definitions_page)
+
+
+def vector_report(plots, map_png, logo_png):
+    figures = {name: figure_svg(plot, REPORT_FIGURE_SIZES[name], DPI) for name, plot in plots.items()}
+    return build_report(*COVER, figures, definitions_text, map_img_buffer=io.BytesIO(map_png), logo_png=logo_png)
+
+
+PATHS = {"raster + merge": raster_report, "single-pass vector": vector_report}
+
+
+def run(path):
+    """Child process: build one report REPEATS times; returns the PDF, best time and peak RSS (MB) before and after."""
+    plots = result_plots()
+    map_png, logo_png = png_bytes((400, 300), "lightblue"), png_bytes((700, 200), "white")
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    seconds = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        pdf = PATHS[path](plots, map_png, logo_png)
+        seconds.append(time.perf_counter() - start)
+    return pdf, min(seconds), before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    context = get_context("spawn")
+    reports = {}
+    for path in PATHS:
+        with context.Pool(1) as pool:
+            pdf, seconds, before, peak = pool.apply(run, (path,))
+        reports[path] = PdfReader(io.BytesIO(pdf))
+        print(f"{path:>18}: {seconds:.2f} s, peak RSS {peak:.0f} MB (+{peak - before:.0f} MB over the plots), "
+              f"{len(pdf) / 1024:.0f} kB, {len(reports[path].pages)} pages")
+
+    raster, vector = reports.values()
+    assert len(vector.pages) == len(raster.pages), (len(vector.pages), len(raster.pages))
+    for page in vector.pages:
+        assert tuple(round(float(value)) for value in page.mediabox.upper_right) == LETTER_POINTS
+    # Cover page, then pwd1 alone and one page per pair of a time series and a boxplot
+    chart_pages = vector.pages[1:2 + len(PAIRED_PLOTS)]
+    assert "Water Year" in chart_pages[0].extract_text()
+    for page in chart_pages[1:]:
+        assert {"Water Year", "Water Table Depth"} <= {line.strip() for line in page.extract_text().splitlines()}
+    print("same page count, all US Letter; chart text is searchable in the vector report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark for scenarios.scenario_surfaces: climate perturbation grids.
+
+Checks that the unperturbed scenario reproduces the engine's own summary
+and that every scenario matches a separate evaluation of its perturbed
+series, then times the 7 x 7 grid and a 21 x 21 grid for one location.
+
+    python benchmarks/bench_scenarios.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+
+from coefficients import load_engine  # noqa: E402
+from model_engine import lai_threshold  # noqa: E402
+from scenarios import ETO_DELTAS, PRECIP_MULTIPLIERS, scenario_surfaces  # noqa: E402
+
+
+def main():
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+    pr = rng.gamma(4.0, 60.0, 30)
+    eto = rng.normal(1250.0, 80.0, 30)
+    soil, rootdepth = "loam", 2.0
+    laithresh = lai_threshold(rootdepth)
+
+    scenarios = scenario_surfaces(engine, pr, eto, soil, rootdepth)
+    for i, multiplier in enumerate(PRECIP_MULTIPLIERS):
+        for j, delta in enumerate(ETO_DELTAS):
+            expected = engine.evaluate(pr * multiplier, eto + delta, soil, rootdepth).summary(laithresh)
+            for name, surface in scenarios.surfaces.items():
+                np.testing.assert_allclose(surface[i, j], expected[name], rtol=1e-12)
+    base = engine.evaluate(pr, eto, soil, rootdepth).summary(laithresh)
+    i, j = PRECIP_MULTIPLIERS.index(1.0), ETO_DELTAS.index(0)
+    np.testing.assert_allclose(scenarios.surfaces["lai_median"][i, j], base["lai_median"])
+    print(f"{len(PRECIP_MULTIPLIERS) * len(ETO_DELTAS)} scenarios match separate evaluations")
+
+    for n in (7, 21):
+        multipliers = np.linspace(0.7, 1.3, n)
+        deltas = np.linspace(-100, 200, n)
+        runs = 50
+        start = time.perf_counter()
+        for _ in range(runs):
+            scenario_surfaces(engine, pr, eto, soil, rootdepth, multipliers, deltas)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"{n} x {n} grid ({n * n} scenarios x {len(engine.wtds)} WTDs): {elapsed * 1000:.2f} ms")
+
+    print(scenarios.to_frame().query("WTD == 3").pivot(index="precip_multiplier", columns="eto_delta",
+                                                       values="lai_median").round(2))
+
+
+if __name__ == "__main__":
+    main()
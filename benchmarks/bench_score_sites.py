@@ -0,0 +1,138 @@
+"""
+Benchmark for score_sites.run: the resumable batch scorer.
+
+Writes a synthetic Nevada climate cube and a site table: some sites have no
+soil, some no rooting depth, some a measured WTD, and a few lie outside the
+cube. Points off the cube and missing soils go through stand-in point
+fetches (climate series from bench_model_engine.climate_frame, every soil
+loam) instead of Earth Engine. Scores the table once and prints the
+throughput. Then it deletes the parts of a few chunks, as an interrupted run
+would leave them, and reruns. Checks that exactly the rows of those chunks
+are scored again, that the results match the first run, and that a run
+with another chunk size is refused.
+
+    python benchmarks/bench_score_sites.py --sites 5000 --chunk-size 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_ee import FakeEE, sample_responses
+
+sys.modules["ee"] = FakeEE(sample_responses())
+
+CUBE_DIR = tempfile.mkdtemp(prefix="watersmart_cube_")
+os.environ["WATERSMART_CLIMATE_CUBE"] = CUBE_DIR
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import score_sites  # noqa: E402
+from bench_model_engine import climate_frame  # noqa: E402
+from climate_cube import NEVADA_BOUNDS, write_synthetic_cube  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+
+LOAM_CODE = 4
+fetched = {"climate": 0, "soil": 0}
+
+
+def fetch_climate_many(lats, lons, years=None):
+    """Stand-in for point_data.fetch_climate_many: one seeded series per point."""
+    fetched["climate"] += len(lats)
+    values = np.empty((len(lats), 2, len(years)))
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        climate = climate_frame(seed=int(abs(lat * 1000 + lon * 10)), years=years)
+        values[i] = climate[["pr", "eto"]].to_numpy().T
+    return values
+
+
+def fetch_soil_many(lats, lons):
+    """Stand-in for point_data.fetch_soil_many: every point is loam."""
+    fetched["soil"] += len(lats)
+    return np.full(len(lats), LOAM_CODE)
+
+
+def site_table(engine, n_sites, rng):
+    west, south, east, north = NEVADA_BOUNDS
+    n_outside = max(n_sites // 100, 1)
+    sites = pd.DataFrame({
+        "site_id": [f"site{i}" for i in range(n_sites)],
+        "lat": np.concatenate([rng.uniform(south + 0.1, north - 0.1, n_sites - n_outside),
+                               rng.uniform(44.0, 45.0, n_outside)]),
+        "lon": rng.uniform(west + 0.1, east - 0.1, n_sites),
+        "soil": rng.choice(engine.soils, n_sites),
+        "rootdepth": rng.choice(engine.root_depths, n_sites),
+        "wtd": np.where(rng.random(n_sites) < 0.2, rng.uniform(1, 6, n_sites), np.nan),
+    })
+    sites.loc[rng.random(n_sites) < 0.1, "soil"] = None
+    sites.loc[rng.random(n_sites) < 0.1, "rootdepth"] = np.nan
+    return sites
+
+
+SORT_KEYS = {"annual": ["site_id", "rootdepth", "WTD", "wy"], "summary": ["site_id", "rootdepth", "WTD", "wtd_source"]}
+
+
+def read_results(output_dir):
+    return {name: pd.read_parquet(os.path.join(output_dir, name)).sort_values(keys).reset_index(drop=True)
+            for name, keys in SORT_KEYS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    score_sites.fetch_climate_many = fetch_climate_many
+    score_sites.fetch_soil_many = fetch_soil_many
+    engine = load_engine()
+    write_synthetic_cube(CUBE_DIR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output_dir = os.path.join(tmp, "sites.csv"), os.path.join(tmp, "results")
+        site_table(engine, args.sites, np.random.default_rng(0)).to_csv(input_path, index=False)
+
+        start = time.perf_counter()
+        scored, skipped = score_sites.run(input_path, output_dir, chunk_size=args.chunk_size, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"first run: {scored} site rows scored, {skipped} skipped, {scored / elapsed:.0f} points/s end to end; "
+              f"stand-in fetches: {fetched['climate']} climate cells, {fetched['soil']} soils")
+        first = read_results(output_dir)
+        n_chunks = len(os.listdir(os.path.join(output_dir, "annual")))
+
+        # An interrupted run: summary written but annual part missing, and a chunk never started
+        redo = [1, n_chunks - 1]
+        os.remove(os.path.join(output_dir, "annual", f"part-{redo[0]:05d}.parquet"))
+        for name in ("annual", "summary"):
+            os.remove(os.path.join(output_dir, name, f"part-{redo[1]:05d}.parquet"))
+        fetched.update(climate=0, soil=0)
+        rescored, reskipped = score_sites.run(input_path, output_dir, chunk_size=args.chunk_size,
+                                              workers=args.workers)
+        chunk_rows = [min(args.chunk_size, scored + skipped - i * args.chunk_size) for i in redo]
+        assert rescored + reskipped == sum(chunk_rows), (rescored, reskipped, chunk_rows)
+        for name, frame in read_results(output_dir).items():
+            pd.testing.assert_frame_equal(frame, first[name])
+        print(f"resumed run: {rescored} rows of chunks {redo} scored again ({n_chunks - len(redo)} chunks skipped), "
+              f"stand-in fetches: {fetched['climate']} climate cells, {fetched['soil']} soils; "
+              f"results match the first run")
+
+        try:
+            score_sites.run(input_path, output_dir, chunk_size=args.chunk_size + 1, workers=args.workers)
+        except SystemExit as error:
+            print(f"different chunk size refused: {error}")
+        else:
+            raise AssertionError("resuming with a different chunk size was accepted")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(CUBE_DIR, ignore_errors=True)
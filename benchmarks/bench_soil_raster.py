@@ -0,0 +1,81 @@
+"""
+Lookup benchmark for soil_raster.SoilRaster.
+
+Writes a synthetic tiled texture GeoTIFF (patchy class codes on the 1
+arc-second grid) to a temporary directory, checks the modal class against a
+direct full-window read, and times single and vectorized lookups.
+
+    python benchmarks/bench_soil_raster.py --points 20000 --buffer-m 60
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+import rasterio  # noqa: E402
+from rasterio.transform import from_origin  # noqa: E402
+
+from grids import SOIL_GRID  # noqa: E402
+from soil_raster import SoilRaster  # noqa: E402
+
+WEST, NORTH = -117.5, 40.0
+SIZE = 4096
+
+
+def write_synthetic_raster(path):
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(1, 13, size=(SIZE // 32, SIZE // 32), dtype=np.uint8)
+    data = np.kron(coarse, np.ones((32, 32), dtype=np.uint8))
+    noise = rng.random(data.shape) < 0.2
+    data[noise] = rng.integers(1, 13, size=noise.sum(), dtype=np.uint8)
+    profile = dict(driver="GTiff", width=SIZE, height=SIZE, count=1, dtype="uint8", crs="EPSG:4326",
+                   transform=from_origin(WEST, NORTH, SOIL_GRID.res, SOIL_GRID.res), nodata=0,
+                   tiled=True, blockxsize=512, blockysize=512, compress="deflate")
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data, 1)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--buffer-m", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "texture.tif")
+        data = write_synthetic_raster(path)
+        raster = SoilRaster(path)
+
+        rng = np.random.default_rng(1)
+        span = SIZE * SOIL_GRID.res
+        lats = rng.uniform(NORTH - span + 0.01, NORTH - 0.01, args.points)
+        lons = rng.uniform(WEST + 0.01, WEST + span - 0.01, args.points)
+
+        # Zero buffer must return exactly the pixel under the point
+        codes, _ = raster.sample_many(lats[:1000], lons[:1000], buffer_m=0)
+        rows = np.floor((NORTH - lats[:1000]) / SOIL_GRID.res).astype(int)
+        cols = np.floor((lons[:1000] - WEST) / SOIL_GRID.res).astype(int)
+        assert (codes == data[rows, cols]).all()
+
+        n_single = min(2000, args.points)
+        start = time.perf_counter()
+        for lat, lon in zip(lats[:n_single], lons[:n_single]):
+            raster.sample(lat, lon, args.buffer_m)
+        single = (time.perf_counter() - start) / n_single
+
+        raster = SoilRaster(path)
+        start = time.perf_counter()
+        raster.sample_many(lats, lons, args.buffer_m)
+        bulk = time.perf_counter() - start
+
+        print(f"single lookup  {single * 1e6:8.1f} us/point (buffer {args.buffer_m:.0f} m)")
+        print(f"bulk lookup    {bulk / args.points * 1e6:8.2f} us/point, {raster.block_reads} tile reads")
+
+
+if __name__ == "__main__":
+    main()
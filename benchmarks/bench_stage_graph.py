@@ -0,0 +1,114 @@
+"""
+Benchmark for the memoized results page (stage_graph.StageGraph).
+
+Builds the app's stage chain climate -> model cube -> results -> summaries
+-> rendered figures (through a shared figure_cache.FigureCache) -> report
+on a synthetic climate series, with a stand-in point fetch, then times a
+cold run, an unchanged rerun, a soil change, a rooting depth change, a
+management-target LAI change, a second session opening the same point and
+the report being asked for (the page only builds it on request), and prints each stage's hit/miss counts and the figure cache's.
+
+    python benchmarks/bench_stage_graph.py
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import pandas as pd  # noqa: E402
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+from figure_cache import SCREEN_DPI, FigureCache, cached_figures  # noqa: E402
+from report_pdf import DPI, REPORT_FIGURE_SIZES, build_report  # noqa: E402
+from native_figures import DEFAULT_RENDERER, RENDERERS  # noqa: E402
+from result_figures import LAI_PLOT_NAMES, PLOT_NAMES  # noqa: E402
+from result_summaries import summarize_results  # noqa: E402
+from stage_graph import StageGraph  # noqa: E402
+
+
+def build_graph(engine, figure_cache, renderer=DEFAULT_RENDERER):
+    build_plots, build_lai_plots = RENDERERS[renderer]
+    graph = StageGraph()
+    graph.add("point_data", lambda lat, lon: SimpleNamespace(
+        dfclimate=climate_frame(), precip_value=250.0, eto_value=1250.0, basin_id="101", basin_name="Test Basin"
+    ), inputs=("lat", "lon"))
+    graph.add("climate", lambda point_data: point_data.dfclimate, upstream=("point_data",))
+    graph.add("model_cube", lambda model, climate: engine.evaluate_location(
+        climate["pr"].to_numpy(), climate["eto"].to_numpy()), inputs=("model",), upstream=("climate",))
+    graph.add("results", lambda model, soil, rootdepth, model_cube, climate: engine.slice(
+        model_cube, soil, rootdepth).to_frame(climate), inputs=("model", "soil", "rootdepth"),
+        upstream=("model_cube", "climate"))
+    graph.add("summaries", lambda results: summarize_results(results), upstream=("results",))
+
+    def add_figure_stage(name, plot_names, build, dpi, sizes=None, inputs=(), fmt="png"):
+        def stage(summaries, **values):
+            context = (values["lat"], values["lon"], values["model"], values["soil"], values["rootdepth"],
+                       values.get("laithresh"))
+            return cached_figures(figure_cache, context, plot_names, lambda: build(summaries, values.get("laithresh")),
+                                  dpi, sizes, fmt=fmt)
+
+        graph.add(name, stage, inputs=("lat", "lon", "model", "soil", "rootdepth") + inputs, upstream=("summaries",))
+
+    plot_names = tuple(name for name in PLOT_NAMES if name not in LAI_PLOT_NAMES)
+    add_figure_stage("figure_images", plot_names, lambda summaries, laithresh: build_plots(summaries), SCREEN_DPI)
+    add_figure_stage("lai_figure_images", LAI_PLOT_NAMES, build_lai_plots, SCREEN_DPI, inputs=("laithresh",))
+    add_figure_stage("report_figure_images", plot_names, lambda summaries, laithresh: build_plots(summaries), DPI,
+                     REPORT_FIGURE_SIZES, fmt="svg")
+    add_figure_stage("report_lai_figure_images", LAI_PLOT_NAMES, build_lai_plots, DPI, REPORT_FIGURE_SIZES,
+                     inputs=("laithresh",), fmt="svg")
+
+    def report(lat, lon, soil, rootdepth, date, point_data, report_figure_images, report_lai_figure_images):
+        return build_report(date, lat, lon, soil, point_data.precip_value, point_data.eto_value, rootdepth,
+                            point_data.basin_id, point_data.basin_name,
+                            {**report_figure_images, **report_lai_figure_images}, "Definitions")
+
+    graph.add("report", report, inputs=("lat", "lon", "soil", "rootdepth", "date"),
+              upstream=("point_data", "report_figure_images", "report_lai_figure_images"))
+    return graph
+
+
+def rerun(graph, report=False, **inputs):
+    """What one script run of the results page asks the graph for, with the report when it was requested."""
+    start = time.perf_counter()
+    graph.get("point_data", **inputs)
+    graph.get("summaries", **inputs)
+    graph.get("figure_images", **inputs)
+    graph.get("lai_figure_images", **inputs)
+    if report:
+        graph.get("report", **inputs)
+    return time.perf_counter() - start
+
+
+def main():
+    engine = load_engine()
+    figure_cache = FigureCache()
+    graph = build_graph(engine, figure_cache)
+    inputs = {"lat": 39.5, "lon": -117.0, "model": (engine.name, engine.version), "soil": "loam",
+              "rootdepth": 2, "laithresh": 1.5, "date": "2026-01-01"}
+
+    timings = [
+        ("cold run", rerun(graph, **inputs)),
+        ("unchanged rerun", rerun(graph, **inputs)),
+        ("soil change", rerun(graph, **{**inputs, "soil": "siltloam"})),
+        ("rooting depth change", rerun(graph, **{**inputs, "soil": "siltloam", "rootdepth": 0.5})),
+        ("back to the first soil", rerun(graph, **inputs)),
+        ("LAI target change", rerun(graph, **{**inputs, "laithresh": 2.0})),
+        ("second session", rerun(build_graph(engine, figure_cache), **inputs)),
+        ("report requested", rerun(graph, report=True, **inputs)),
+    ]
+    for label, seconds in timings:
+        print(f"{label:<24}{seconds * 1000:9.1f} ms")
+    print(pd.DataFrame(graph.stats()).T)
+    print(f"figure cache: {figure_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
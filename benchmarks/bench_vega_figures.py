@@ -0,0 +1,122 @@
+"""
+Benchmark for vega_figures: Vega-Lite specs of the results charts.
+
+For the default point, a point with an extra interpolated WTD and a point
+with coefficient uncertainty bands, checks that every spec is strict JSON,
+that each layer reads a shipped data set whose columns have one length,
+that every encoded field is a column or a calculated one, and that the
+flattened columns give back the summary values. Then compares the size
+and build time of the specs with the server-rendered PNGs they replace.
+
+    python benchmarks/bench_vega_figures.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from bench_model_engine import climate_frame  # noqa: E402
+from coefficients import coefficients_path, load_engine  # noqa: E402
+from figure_cache import SCREEN_DPI, figure_png  # noqa: E402
+from model_engine import FREE_DRAIN_WTD  # noqa: E402
+from native_figures import RENDERERS  # noqa: E402
+from result_figures import PLOT_NAMES  # noqa: E402
+from result_summaries import summarize_results  # noqa: E402
+from uncertainty import CoefficientUncertainty, propagate  # noqa: E402
+from vega_figures import DATA_DECIMALS, build_vega_lai_specs, build_vega_specs  # noqa: E402
+
+SOIL, ROOTDEPTH, LAITHRESH = "loam", 2.0, 2.0
+# Summary frame and column behind the "value" data of each time series and boxplot
+VALUES = {
+    "lai1": ("lai2", "LAIcalc"), "lai2": ("lai2", "LAIcalc"), "aet1": ("aet2", "aetcalc"),
+    "aet2": ("aet2", "aetcalc"), "gwsubs1": ("gwsubs2", "gwsubscalc"), "gwsubs2": ("gwsubs2", "gwsubscalc"),
+    "aetgw1": ("aetgw2", "aetgwcalc"), "aetgw2": ("aetgw2", "aetgwcalc"),
+}
+
+
+def build(summaries, uncertainty=None):
+    return {**build_vega_specs(summaries, uncertainty), **build_vega_lai_specs(summaries, LAITHRESH, uncertainty)}
+
+
+def encoded_fields(encoding):
+    for channel in encoding.values():
+        for definition in channel if isinstance(channel, list) else [channel]:
+            if "field" in definition:
+                yield definition["field"]
+
+
+def flattened(spec, name):
+    (row,) = spec["datasets"][name]
+    lengths = {len(values) for values in row.values()}
+    assert len(lengths) == 1, (name, lengths)
+    return pd.DataFrame(row)
+
+
+def check(name, summaries, uncertainty=None):
+    specs = build(summaries, uncertainty)
+    assert set(specs) == set(PLOT_NAMES)
+    for plot, spec in specs.items():
+        json.dumps(spec, allow_nan=False)
+        for layer in spec["layer"]:
+            if "name" not in layer["data"]:
+                continue
+            frame = flattened(spec, layer["data"]["name"])
+            fields = set(layer["transform"][0]["flatten"])
+            assert fields <= set(frame.columns), (plot, fields)
+            fields |= {step["as"] for step in layer["transform"][1:]}
+            assert set(encoded_fields(layer["encoding"])) <= fields, (plot, layer["mark"])
+        if plot in VALUES:
+            frame, column = VALUES[plot]
+            dataset = "series" if "series" in spec["datasets"] else "box"
+            shipped = flattened(spec, dataset)["value"].to_numpy(dtype=np.float64)
+            np.testing.assert_allclose(shipped, summaries[frame][column], atol=10 ** -DATA_DECIMALS)
+    print(f"{name}: {len(specs)} specs are strict JSON, layers match their data sets, values round-trip")
+    return specs
+
+
+def main():
+    engine = load_engine()
+    climate = climate_frame()
+    pr, eto = climate["pr"].to_numpy(), climate["eto"].to_numpy()
+    summaries = summarize_results(engine.evaluate(pr, eto, SOIL, ROOTDEPTH).to_frame(climate))
+    specs = check("modeled WTDs", summaries)
+    pwdsum = flattened(specs["pwd1"], "balance")
+    np.testing.assert_allclose(pwdsum["eto"], summaries["pwdsum"]["eto"], atol=10 ** -DATA_DECIMALS)
+
+    depths = sorted({wtd for wtd in engine.wtds if wtd != FREE_DRAIN_WTD} | {2.5})
+    check("extra WTD", summarize_results(engine.evaluate_depths(pr, eto, SOIL, ROOTDEPTH, depths).to_frame(climate)))
+
+    dfse = pd.read_csv(coefficients_path(engine.name))
+    columns = [column for column in dfse.columns if column.startswith(("LAI", "aet", "gwsubs"))]
+    dfse[columns] = dfse[columns].abs() * 0.05
+    bands = propagate(engine, CoefficientUncertainty.from_standard_errors(engine, dfse), pr, eto, SOIL, ROOTDEPTH,
+                      n_samples=500)
+    check("uncertainty bands", summaries, bands)
+
+    start = time.perf_counter()
+    specs = build(summaries)
+    spec_s = time.perf_counter() - start
+    spec_bytes = {plot: len(json.dumps(spec, separators=(",", ":"))) for plot, spec in specs.items()}
+    build_plots, build_lai_plots = RENDERERS["native"]
+    start = time.perf_counter()
+    plots = {**build_plots(summaries), **build_lai_plots(summaries, LAITHRESH)}
+    png_bytes = {plot: len(figure_png(plots[plot], dpi=SCREEN_DPI)) for plot in PLOT_NAMES}
+    png_s = time.perf_counter() - start
+    print("bytes per chart, spec / PNG at {} dpi: ".format(SCREEN_DPI)
+          + " ".join(f"{plot} {spec_bytes[plot] // 1024}/{png_bytes[plot] // 1024} kB" for plot in PLOT_NAMES))
+    print(f"all charts: specs {sum(spec_bytes.values()) / 1024:.0f} kB built in {spec_s * 1000:.0f} ms, "
+          f"PNGs {sum(png_bytes.values()) / 1024:.0f} kB rendered in {png_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
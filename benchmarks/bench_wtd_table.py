@@ -0,0 +1,85 @@
+"""
+Benchmark for the precomputed WTD interpolation table.
+
+Checks that the table reproduces the modeled WTDs exactly and the linear
+interpolation at every table depth, that evaluate_depths matches evaluate
+at the modeled depths and that evaluate_sites_at matches an explicit
+interpolation per site, then times the coefficients of per-site depths
+for a large batch, gathered from the table and interpolated.
+
+    python benchmarks/bench_wtd_table.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+
+from coefficients import load_engine  # noqa: E402
+from model_engine import FREE_DRAIN_WTD, RESULT_FIELDS  # noqa: E402
+
+
+def best_of(func, repeat=10):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+
+    s = np.arange(len(engine.soils))[:, None, None]
+    r = np.arange(len(engine.root_depths))[None, :, None]
+    np.testing.assert_allclose(engine.wtd_table, engine.coefficients_at(engine.table_depths, s, r), rtol=1e-12)
+    modeled = [wtd for wtd in engine.wtds if wtd != FREE_DRAIN_WTD]
+    for wtd in modeled:
+        assert np.array_equal(engine.wtd_table[:, :, engine.table_index(wtd)],
+                              engine.coefficients[:, :, engine.wtds.index(wtd)])
+    print(f"{len(engine.table_depths)} table depths match the interpolation, modeled WTDs exactly")
+
+    pr, eto = rng.gamma(4.0, 60.0, 30), rng.normal(1250.0, 80.0, 30)
+    for soil in engine.soils:
+        for rootdepth in engine.root_depths:
+            expected = engine.evaluate(pr, eto, soil, rootdepth)
+            actual = engine.evaluate_depths(pr, eto, soil, rootdepth, modeled)
+            for field in RESULT_FIELDS:
+                assert np.array_equal(getattr(expected, field), getattr(actual, field), equal_nan=True), field
+    print("evaluate_depths matches evaluate at the modeled WTDs for every soil and rooting depth")
+
+    n_sites = 100000
+    pr = rng.gamma(4.0, 60.0, (n_sites, 30))
+    eto = rng.normal(1250.0, 80.0, (n_sites, 30))
+    soils = rng.choice(engine.soils, n_sites)
+    rootdepths = rng.choice(engine.root_depths, n_sites)
+    wtds = np.round(rng.uniform(1.0, 6.0, n_sites), 1)
+
+    def interpolated():
+        coefficients = np.stack([
+            engine.coefficients_at(wtds, engine.soil_index(soils), engine.rootdepth_index(rootdepths)),
+            engine.coefficients[engine.soil_index(soils), engine.rootdepth_index(rootdepths), engine.free_drain]
+        ], axis=1)
+        raw = np.einsum("syt,swrt->swry", engine.formulation.features(pr, eto), coefficients)
+        return engine.postprocess(raw, (None, FREE_DRAIN_WTD))
+
+    expected = interpolated()
+    actual = engine.evaluate_sites_at(pr, eto, soils, rootdepths, wtds)
+    for field in ("lai", "aet", "aetgw", "gwsubs"):
+        np.testing.assert_allclose(getattr(actual, field), getattr(expected, field), rtol=1e-9, atol=1e-9)
+    print("evaluate_sites_at matches per-site interpolation")
+
+    s, r = engine.soil_index(soils), engine.rootdepth_index(rootdepths)
+    gather_s = best_of(lambda: engine.wtd_table[s, r, engine.table_index(wtds)])
+    interpolate_s = best_of(lambda: engine.coefficients_at(wtds, s, r))
+    total_s = best_of(lambda: engine.evaluate_sites_at(pr, eto, soils, rootdepths, wtds), repeat=3)
+    print(f"coefficients for {n_sites} site depths: table gather {gather_s * 1000:.1f} ms, "
+          f"interpolation {interpolate_s * 1000:.1f} ms; full evaluation {total_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Check the server-side Earth Engine model against the local ModelEngine.
+
+Offline (default): evaluates each formulation's ee.Image.expression string
+with numpy in place of Earth Engine and compares it with the engine's raw
+responses for every soil, rooting depth and WTD.
+
+Online (--points N, needs Earth Engine credentials): samples the annual
+model images at N random Nevada points together with the pr, eto and soil
+bands they were computed from, and evaluates the local engine on exactly
+those inputs.
+
+    python benchmarks/check_ee_model.py
+    python benchmarks/check_ee_model.py --points 200 --service-account-key key.json
+"""
+import argparse
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np  # noqa: E402
+
+from coefficients import load_engine  # noqa: E402
+from model_engine import FORMULATIONS  # noqa: E402
+
+
+def check_expressions():
+    from ee_model import EXPRESSIONS
+
+    rng = np.random.default_rng(0)
+    pr = rng.gamma(4.0, 60.0, 30)
+    eto = rng.normal(1250.0, 80.0, 30)
+    for name in FORMULATIONS:
+        engine = load_engine(name)
+        raw = engine.evaluate_raw(engine.formulation.features(pr, eto), engine.coefficients)
+        for s, r, w, k in np.ndindex(raw.shape[:4]):
+            coefficients = engine.coefficients[s, r, w, k]
+            if np.isnan(coefficients).any():
+                continue
+            variables = dict(zip(engine.formulation.terms, coefficients), P=pr, PET=eto)
+            expected = eval(EXPRESSIONS[name], {}, variables)
+            np.testing.assert_allclose(raw[s, r, w, k], expected, rtol=1e-9, atol=1e-9)
+        print(f"{name}: expression matches the engine for {raw.shape[0] * raw.shape[1] * raw.shape[2]} "
+              f"soil/rd/WTD combinations")
+
+
+def check_sampled_points(n_points, rootdepth, wtd, service_account_key=None):
+    from build_climate_cube import initialize
+    from climate_cube import NEVADA_BOUNDS
+    from ee_model import annual_model, soil_image
+    from point_data import SOIL_TEXTURES, YEAR_END, YEAR_START, points_collection, water_year_collection
+
+    initialize(service_account_key)
+    engine = load_engine()
+    years = list(range(YEAR_START, YEAR_END + 1))
+    rng = np.random.default_rng(1)
+    west, south, east, north = NEVADA_BOUNDS
+    lats, lons = rng.uniform(south, north, n_points), rng.uniform(west, east, n_points)
+
+    model = annual_model(engine, rootdepth, wtd).toBands()
+    climate = water_year_collection().select(['pr', 'eto']).toBands()
+    image = model.addBands(climate).addBands(soil_image())
+    samples = image.sampleRegions(collection=points_collection(lats, lons), properties=['i'], scale=30,
+                                  geometries=False).getInfo()['features']
+
+    worst = {response: 0.0 for response in ('lai', 'aet', 'aetgw', 'gwsubs')}
+    n_compared = 0
+    for feature in samples:
+        properties = feature['properties']
+        soil = SOIL_TEXTURES.get(int(properties.get('texture', 0)))
+        if soil not in engine.soils:
+            continue
+        pr = np.array([properties[f"{year}_pr"] for year in years])
+        eto = np.array([properties[f"{year}_eto"] for year in years])
+        local = engine.evaluate(pr, eto, soil, rootdepth).take(engine.wtds.index(wtd))
+        for response in worst:
+            remote = np.array([properties[f"{year}_{response}"] for year in years])
+            worst[response] = max(worst[response], float(np.max(np.abs(remote - getattr(local, response)))))
+        n_compared += 1
+
+    print(f"compared {n_compared} points ({rootdepth} m roots, WTD {wtd} m); max |EE - local|:")
+    for response, diff in worst.items():
+        print(f"  {response:<7}{diff:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=0, help="also sample N points through Earth Engine")
+    parser.add_argument("--rootdepth", type=float, default=2.0)
+    parser.add_argument("--wtd", type=int, default=1)
+    parser.add_argument("--service-account-key")
+    args = parser.parse_args()
+
+    check_expressions()
+    if args.points:
+        check_sampled_points(args.points, args.rootdepth, args.wtd, args.service_account_key)
+
+
+if __name__ == "__main__":
+    main()
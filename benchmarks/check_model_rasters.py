@@ -0,0 +1,74 @@
+"""
+Check model_rasters.build_rasters against the point model.
+
+Writes a synthetic Nevada climate cube and builds the rasters of one soil
+and rooting depth for every WTD from it, then reads back randomly sampled
+cells of every annual, summary and exceedance COG and compares them with
+ModelEngine.evaluate on the same cell's climate series.
+
+    python benchmarks/check_model_rasters.py --cells 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+import numpy as np  # noqa: E402
+import rasterio  # noqa: E402
+
+from climate_cube import write_synthetic_cube  # noqa: E402
+from coefficients import load_engine  # noqa: E402
+from model_engine import LAI_THRESHOLD_GRID, lai_threshold  # noqa: E402
+from model_rasters import ANNUAL_VARIABLES, SUMMARY_BANDS, build_rasters, raster_stem  # noqa: E402
+
+SOIL, ROOTDEPTH = "loam", 2.0
+
+
+def read_cells(path, rows, cols):
+    """Every band of the raster at the sampled cells, shaped (cell, band)."""
+    with rasterio.open(path) as src:
+        return src.read()[:, rows, cols].T
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    engine = load_engine()
+    with tempfile.TemporaryDirectory() as tmp:
+        cube_dir, output_dir = os.path.join(tmp, "cube"), os.path.join(tmp, "rasters")
+        cube = write_synthetic_cube(cube_dir)
+        start = time.perf_counter()
+        paths = build_rasters(SOIL, ROOTDEPTH, output_dir=output_dir, cube_dir=cube_dir, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        rows, cols = cube.shape
+        print(f"{len(paths)} COGs of {rows} x {cols} cells in {elapsed:.2f} s")
+
+        rng = np.random.default_rng(0)
+        cell = rng.choice(rows * cols, args.cells, replace=False)
+        cell_rows, cell_cols = np.unravel_index(cell, (rows, cols))
+        expected = [engine.evaluate(cube.data[r, c, 0], cube.data[r, c, 1], SOIL, ROOTDEPTH)
+                    for r, c in zip(cell_rows, cell_cols)]
+        for i, wtd in enumerate(engine.wtds):
+            stem = os.path.join(output_dir, raster_stem(SOIL, ROOTDEPTH, wtd))
+            for variable in ANNUAL_VARIABLES:
+                actual = read_cells(f"{stem}_{variable}.tif", cell_rows, cell_cols)
+                values = np.stack([getattr(result, variable)[i] for result in expected])
+                np.testing.assert_allclose(actual, values, rtol=1e-5, atol=1e-3, err_msg=f"{stem}_{variable}")
+            actual = read_cells(f"{stem}_summary.tif", cell_rows, cell_cols)
+            stats = [result.summary(lai_threshold(ROOTDEPTH)) for result in expected]
+            values = np.array([[s[band][i] for band in SUMMARY_BANDS] for s in stats])
+            np.testing.assert_allclose(actual, values, rtol=1e-5, atol=1e-3, err_msg=f"{stem}_summary")
+            actual = read_cells(f"{stem}_exceedance.tif", cell_rows, cell_cols)
+            values = np.stack([result.exceedance(LAI_THRESHOLD_GRID)[i] for result in expected])
+            np.testing.assert_allclose(actual, values, rtol=1e-5, atol=1e-3, err_msg=f"{stem}_exceedance")
+        print(f"{args.cells} sampled cells match ModelEngine.evaluate in every band of {len(paths)} rasters")
+
+
+if __name__ == "__main__":
+    main()
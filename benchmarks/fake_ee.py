@@ -0,0 +1,122 @@
+"""
+A local stand-in for the earthengine-api module used by the benchmarks.
+
+Every ee call builds a lazy expression node, exactly like the real client
+library, and nothing leaves the process until getInfo() is called. Each
+getInfo() counts as one round trip and sleeps for `latency` seconds so the
+benchmarks can report both the number of round trips and the wall time they
+would cost against the real service.
+"""
+import time
+
+
+def _assets(value, found=None):
+    """Collect every asset-id string referenced anywhere in an expression."""
+    found = set() if found is None else found
+    if isinstance(value, Node):
+        _assets(value._args, found)
+        _assets(value._kwargs, found)
+        if value._parent is not None:
+            _assets(value._parent, found)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _assets(item, found)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _assets(item, found)
+    elif isinstance(value, str) and "/" in value:
+        found.add(value)
+    return found
+
+
+class Node:
+    """A lazy Earth Engine expression: attribute access and calls build new nodes."""
+
+    def __init__(self, backend, op, parent=None, args=(), kwargs=None):
+        self._backend = backend
+        self._op = op
+        self._parent = parent
+        self._args = args
+        self._kwargs = kwargs or {}
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Node(self._backend, name, parent=self)
+
+    def __call__(self, *args, **kwargs):
+        return Node(self._backend, self._op, parent=self._parent, args=args, kwargs=kwargs)
+
+    def getInfo(self):
+        return self._backend.get_info(self)
+
+
+class FakeEE(Node):
+    """Drop-in replacement for the `ee` module that answers from canned values."""
+
+    def __init__(self, responses, latency=0.0):
+        super().__init__(self, "ee")
+        self.responses = responses
+        self.latency = latency
+        self.round_trips = 0
+
+    def reset(self):
+        self.round_trips = 0
+
+    def get_info(self, node):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.resolve(node)
+
+    def resolve(self, node):
+        if not isinstance(node, Node):
+            return node
+        if node._op == "Dictionary" and node._args and isinstance(node._args[0], dict):
+            return {key: self.resolve(value) for key, value in node._args[0].items()}
+        if node._op == "Dictionary":
+            return self.responses["soil_lookup"]
+        if node._op == "get" and node._parent is not None and node._parent._op == "Dictionary":
+            code = self.responses["soil"]["texture"]
+            return self.responses["soil_lookup"].get(str(int(round(code))))
+        if node._op == "toDictionary":
+            return dict(self.responses["basin"])
+        if node._op == "filterBounds":
+            return {"features": [{"properties": dict(self.responses["basin"])}]}
+        if node._op == "reduceRegion":
+            return self._reduce_region(_assets(node))
+        if node._op == "get":
+            return self.resolve(node._parent).get(node._args[0])
+        raise NotImplementedError(f"FakeEE cannot resolve '{node._op}'")
+
+    def _reduce_region(self, assets):
+        if any("GRIDMET" in asset and "Mean_Annual" not in asset for asset in assets):
+            return dict(self.responses["gm_point"])
+        if any("texture" in asset for asset in assets):
+            return dict(self.responses["soil"])
+        result = {}
+        for asset in assets:
+            result.update(self.responses["normals"].get(asset, {}))
+        return result
+
+
+def sample_responses(year_start=1991, year_end=2020):
+    """Plausible canned values for a central Nevada point."""
+    gm_point = {}
+    for i, year in enumerate(range(year_start, year_end + 1)):
+        pr = 200.0 + 15.0 * (i % 7)
+        eto = 1250.0 + 10.0 * (i % 5)
+        gm_point[f"{year}_pr"] = pr
+        gm_point[f"{year}_eto"] = eto
+        gm_point[f"{year}_wb"] = pr - eto
+    return {
+        "normals": {
+            "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_ETo_1991_2020": {"mean_annual_eto": 1290.4},
+            "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Precip_1991_2020": {"mean_annual_pr": 243.1},
+            "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Water_Deficit_1991_2020": {"mean_annual_deficit": -1047.3},
+        },
+        "basin": {"BasinID": "137A", "BasinName": "Big Smoky Valley-Tonopah Flat"},
+        "soil": {"texture": 4.0},
+        "soil_lookup": {"4": "loam"},
+        "gm_point": gm_point,
+    }
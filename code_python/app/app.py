@@ -1,4 +1,5 @@
 import os
+import sys
 import dash
 import dash_leaflet as dl
 from dash import dcc, html, Input, Output, State, callback_context
@@ -8,6 +9,11 @@ import base64
 import ee
 import datetime
 
+# The model registry lives with the Streamlit app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "streamlit_app"))
+from coefficients import load_engine
+from model_engine import FORMULATIONS
+
 ####################
 # 1) INITIAL SETUP
 ####################
@@ -61,6 +67,18 @@ app.layout = html.Div([
 
     html.Br(),
 
+    # Model formulation from the registry
+    html.Label("Model Formulation"),
+    dcc.Dropdown(
+        id="dropdown_model",
+        options=[{"label": f"{name} ({f.description})", "value": name} for name, f in FORMULATIONS.items()],
+        value="wb-cubic",
+        clearable=False,
+        style={"width": "480px"}
+    ),
+
+    html.Br(),
+
     # C) Text input for soil override
     html.Label("Override Soil Type (optional)"),
     dcc.Input(
@@ -141,10 +159,11 @@ def capture_map_click(click_lat_lng):
         State("store_latlon", "data"),
         State("dropdown_rd", "value"),
         State("input_soil_override", "value"),
+        State("dropdown_model", "value"),
     ],
     prevent_initial_call=True
 )
-def run_ee_and_generate_plots(n_clicks, store_latlon, rd_val, soil_override):
+def run_ee_and_generate_plots(n_clicks, store_latlon, rd_val, soil_override, model_name):
     """
     When user clicks "Compute & Generate Plots", read lat/lon from store,
     read rd_val, soil_override, then run Earth Engine, build data frames,
@@ -242,54 +261,13 @@ def run_ee_and_generate_plots(n_clicks, store_latlon, rd_val, soil_override):
     dfee = pd.DataFrame(parsed_data)
     dfee = dfee.groupby('wy').first().reset_index()
 
-    dfee['wb2'] = dfee['wb']**2
-    dfee['wb3'] = dfee['wb']**3
-    dfclimate = dfee.copy()
-
     ########################################
-    # 2) MERGE WITH MODEL COEFFICIENTS
+    # 2) EVALUATE THE SELECTED FORMULATION
     ########################################
-    dfcoeffs = pd.read_csv('../data/MixedEffectsModelCoefficients102924_LAI_AET_AETG_GWsubs.csv')
-    dfcoeffs['wtd2'] = dfcoeffs['WTD'].apply(lambda x: "Free Drain" if x == 12 else f"{x} m")
-
-    # Filter by rd_val & soil type
-    dfcoeffs = dfcoeffs[dfcoeffs['rootdepth'] == rd_val]
-    dfcoeffs = dfcoeffs[dfcoeffs['soiltype'] == st]
-
-    # Expand dfclimate with WTD [1,3,6,12]
-    wtd_values = [1, 3, 6, 12]
-    dfclimate = pd.concat(
-        [dfclimate.assign(WTD=w) for w in wtd_values],
-        ignore_index=True
-    )
-
-    dfsum = pd.merge(dfclimate, dfcoeffs, on='WTD', how='left')
-
-    # Compute LAI, AET, etc.
-    dfsum['LAIcalc'] = (
-        dfsum['LAIIntercept'] +
-        dfsum['wb'] * dfsum['LAIwbx'] +
-        dfsum['wb2'] * dfsum['LAIwb2x'] +
-        dfsum['wb3'] * dfsum['LAIwb3x']
-    )
-    dfsum['aetcalc'] = (
-        dfsum['aetIntercept'] +
-        dfsum['wb'] * dfsum['aetwbx'] +
-        dfsum['wb2'] * dfsum['aetwb2x'] +
-        dfsum['wb3'] * dfsum['aetwb3x']
-    )
-    dfsum['aetgwcalc'] = (
-        dfsum['aetgwIntercept'] +
-        dfsum['wb'] * dfsum['aetgwwbx'] +
-        dfsum['wb2'] * dfsum['aetgwwb2x'] +
-        dfsum['wb3'] * dfsum['aetgwwb3x']
-    )
-    dfsum['gwsubscalc'] = (
-        dfsum['gwsubsIntercept'] +
-        dfsum['wb'] * dfsum['gwsubswbx'] +
-        dfsum['wb2'] * dfsum['gwsubswb2x'] +
-        dfsum['wb3'] * dfsum['gwsubswb3x']
-    )
+    # LAI, AET, AETgw and GW subsidy for every WTD, one row per WTD and water year
+    engine = load_engine(model_name)
+    result = engine.evaluate(dfee['pr'].to_numpy(), dfee['eto'].to_numpy(), soil=st, rootdepth=rd_val)
+    dfsum = result.to_frame(dfee)
 
     # LAI threshold logic
     if rd_val == 0.5:
@@ -0,0 +1,87 @@
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+DEFAULT_BASIN_PATH = os.environ.get(
+    "WATERSMART_BASINS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "basins", "NVAdminGWBoundaries.geojson")
+)
+
+
+class BasinIndex:
+    """
+    In-process point-in-basin lookup for the Nevada administrative groundwater basins.
+
+    Polygons are prepared once and held in a packed STRtree, so a single
+    lookup is a tree query plus a prepared containment test and bulk lookups
+    run vectorized over whole arrays of points.
+
+    Args:
+        basin_ids (list): BasinID for each polygon
+        basin_names (list): BasinName for each polygon
+        geometries (list): shapely polygons in EPSG:4326
+    """
+
+    def __init__(self, basin_ids, basin_names, geometries):
+        self.basin_ids = np.asarray(basin_ids, dtype=object)
+        self.basin_names = np.asarray(basin_names, dtype=object)
+        self.geometries = np.asarray(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_geojson(cls, path=DEFAULT_BASIN_PATH):
+        with open(path) as f:
+            collection = json.load(f)
+        features = collection["features"]
+        return cls(
+            [feature["properties"]["BasinID"] for feature in features],
+            [feature["properties"]["BasinName"] for feature in features],
+            [shape(feature["geometry"]) for feature in features]
+        )
+
+    @classmethod
+    def open_default(cls):
+        """Load the bundled basin polygons, or return None if they have not been exported."""
+        if not os.path.exists(DEFAULT_BASIN_PATH):
+            return None
+        return cls.from_geojson(DEFAULT_BASIN_PATH)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def lookup_index(self, lats, lons):
+        """
+        Return the polygon index containing each point, or -1 where no basin contains it.
+
+        Where polygons share a boundary the lowest index wins, which keeps the
+        answer deterministic for points that fall exactly on an edge.
+        """
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        points = np.atleast_1d(points)
+        point_idx, basin_idx = self.tree.query(points, predicate="intersects")
+        result = np.full(len(points), -1, dtype=np.int64)
+        # Assign in reverse so the first match per point is kept
+        order = np.lexsort((-basin_idx, point_idx))
+        result[point_idx[order]] = basin_idx[order]
+        return result
+
+    def lookup_many(self, lats, lons):
+        """Vectorized lookup returning (basin_ids, basin_names) arrays, None where outside."""
+        idx = self.lookup_index(lats, lons)
+        inside = idx >= 0
+        basin_ids = np.full(len(idx), None, dtype=object)
+        basin_names = np.full(len(idx), None, dtype=object)
+        basin_ids[inside] = self.basin_ids[idx[inside]]
+        basin_names[inside] = self.basin_names[idx[inside]]
+        return basin_ids, basin_names
+
+    def lookup(self, lat, lon):
+        """Return {'BasinID': ..., 'BasinName': ...} for a point, or None if it is outside every basin."""
+        idx = self.lookup_index([lat], [lon])[0]
+        if idx < 0:
+            return None
+        return {"BasinID": self.basin_ids[idx], "BasinName": self.basin_names[idx]}
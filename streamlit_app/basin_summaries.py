@@ -0,0 +1,267 @@
+"""
+Whole-basin model distributions for the Nevada administrative groundwater basins.
+
+For a basin polygon every GRIDMET cell it touches is evaluated with its own
+soil class, and the cells are weighted by the area they share with the
+basin. The result is the area-weighted 10th/50th/90th percentile of LAI,
+AET and GW subsidy over cells and water years, per rooting depth and WTD.
+
+Building the table for every basin once makes basin queries a lookup:
+
+    python basin_summaries.py --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from basin_index import BasinIndex
+from climate_cube import DEFAULT_CUBE_DIR, ClimateCube
+from coefficients import load_engine
+from model_engine import DEFAULT_FORMULATION, lai_threshold, wtd_label
+from point_data import SOIL_TEXTURES
+
+DEFAULT_TABLE_PATH = os.environ.get(
+    "WATERSMART_BASIN_SUMMARIES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "basins", "basin_summaries.parquet")
+)
+KM_PER_DEGREE = 111.32
+QUANTILES = (("p10", 0.1), ("median", 0.5), ("p90", 0.9))
+VARIABLES = (("LAI", "lai"), ("aet", "aet"), ("gwsubs", "gwsubs"))
+
+
+def basin_cells(geometry, grid, shape):
+    """
+    GRIDMET cells touched by a basin polygon.
+
+    Returns:
+        (rows, cols, weights, sample_points): cube cell indices, the area in
+        km2 each cell shares with the basin, and a point inside each shared
+        area where the cell's soil is read.
+    """
+    west, south, east, north = geometry.bounds
+    row0, col0 = grid.cell(north, west)
+    row1, col1 = grid.cell(south, east)
+    row0, col0 = max(row0, 0), max(col0, 0)
+    row1, col1 = min(row1, shape[0] - 1), min(col1, shape[1] - 1)
+    rows, cols = np.meshgrid(np.arange(row0, row1 + 1), np.arange(col0, col1 + 1), indexing="ij")
+    rows, cols = rows.ravel(), cols.ravel()
+
+    cell_north = grid.north - rows * grid.res
+    cell_west = grid.west + cols * grid.res
+    cells = shapely.box(cell_west, cell_north - grid.res, cell_west + grid.res, cell_north)
+    shared = shapely.intersection(cells, geometry)
+    area = shapely.area(shared)
+    keep = area > 0
+    shared = shared[keep]
+    lat = shapely.get_y(shapely.centroid(shared))
+    weights = area[keep] * KM_PER_DEGREE ** 2 * np.cos(np.radians(lat))
+    return rows[keep], cols[keep], weights, shapely.point_on_surface(shared)
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Weighted quantiles along the first axis.
+
+    Args:
+        values (np.ndarray): Shaped (sample, ...)
+        weights (np.ndarray): One weight per sample
+        quantiles (list): Quantiles in [0, 1]
+
+    Returns:
+        Array shaped (len(quantiles), ...).
+    """
+    order = np.argsort(values, axis=0)
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    cumulative = np.cumsum(weights[order], axis=0)
+    cumulative = (cumulative - 0.5 * weights[order]) / cumulative[-1]
+    result = np.empty((len(quantiles),) + values.shape[1:])
+    for index in np.ndindex(values.shape[1:]):
+        column = (slice(None),) + index
+        result[(slice(None),) + index] = np.interp(quantiles, cumulative[column], sorted_values[column])
+    return result
+
+
+def summarize_cells(engine, pr, eto, soils, weights, rootdepth, chunk_cells=2000):
+    """
+    Area-weighted distribution of the model over a set of cells.
+
+    Cells are evaluated in chunks; each cell-year is one sample weighted by
+    the cell's shared area.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        pr (np.ndarray): Annual precipitation per cell, shaped (cell, year)
+        eto (np.ndarray): Annual reference ET per cell, same shape
+        soils (np.ndarray): Soil type name per cell
+        weights (np.ndarray): Area weight per cell
+        rootdepth (float): Rooting depth (m)
+        chunk_cells (int): Cells evaluated at once
+
+    Returns:
+        DataFrame with one row per WTD.
+    """
+    n_cells, n_years = pr.shape
+    responses = {name: [] for _, name in VARIABLES}
+    for start in range(0, n_cells, chunk_cells):
+        stop = start + chunk_cells
+        result = engine.evaluate_sites(pr[start:stop], eto[start:stop], soils[start:stop],
+                                       np.full(len(pr[start:stop]), rootdepth))
+        for _, name in VARIABLES:
+            responses[name].append(getattr(result, name))
+
+    sample_weights = np.repeat(weights, n_years)
+    laithresh = lai_threshold(rootdepth)
+    summary = {"WTD": list(engine.wtds), "wtd2": [wtd_label(wtd) for wtd in engine.wtds]}
+    for label, name in VARIABLES:
+        # (cell, WTD, year) -> (cell * year, WTD)
+        values = np.concatenate(responses[name]).transpose(0, 2, 1).reshape(-1, len(engine.wtds))
+        stats = weighted_quantiles(values, sample_weights, [q for _, q in QUANTILES])
+        for (suffix, _), column in zip(QUANTILES, stats):
+            summary[f"{label}_{suffix}"] = column
+        if name == "lai":
+            over = (values >= laithresh) * sample_weights[:, None]
+            summary["percoverthresh"] = over.sum(axis=0) / sample_weights.sum() * 100
+    summary["n_cells"] = n_cells
+    summary["area_km2"] = weights.sum()
+    return pd.DataFrame(summary)
+
+
+def basin_summary(engine, cube, basins, index, rootdepths=None, soil=None, soil_raster=None):
+    """
+    Model distributions for one basin.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        cube (ClimateCube): Water-year climate
+        basins (BasinIndex): Basin polygons
+        index (int): Position of the basin in `basins`
+        rootdepths (list): Rooting depths, or None for all of them
+        soil (str): Soil type for every cell, or None to read it per cell from `soil_raster`
+        soil_raster (SoilRaster): Texture raster used when `soil` is None
+
+    Returns:
+        DataFrame with one row per rooting depth and WTD (empty when no cell is modeled).
+    """
+    rows, cols, weights, points = basin_cells(basins.geometries[index], cube.grid, cube.shape)
+    climate = np.asarray(cube.data[rows, cols], dtype=np.float64)
+    if soil is not None:
+        soils = np.full(len(rows), soil, dtype=object)
+    else:
+        codes, _ = soil_raster.sample_many(shapely.get_y(points), shapely.get_x(points))
+        soils = np.array([SOIL_TEXTURES.get(int(code)) for code in codes], dtype=object)
+
+    valid = ~np.isnan(climate).any(axis=(1, 2)) & np.isin(soils, engine.soils)
+    if not valid.any():
+        return pd.DataFrame()
+    climate, soils, weights = climate[valid], soils[valid], weights[valid]
+
+    rootdepths = rootdepths or engine.root_depths
+    frame = pd.concat([summarize_cells(engine, climate[:, 0], climate[:, 1], soils, weights, rootdepth)
+                       for rootdepth in rootdepths], ignore_index=True)
+    keys = pd.DataFrame({
+        "BasinID": basins.basin_ids[index],
+        "BasinName": basins.basin_names[index],
+        "rootdepth": np.repeat(rootdepths, len(engine.wtds))
+    })
+    return pd.concat([keys, frame], axis=1)
+
+
+class BasinSummaries:
+    """
+    Precomputed basin distributions, indexed by BasinID for instant lookups.
+
+    Args:
+        table (pd.DataFrame): Output of build_table
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._groups = {key: group.reset_index(drop=True) for key, group in table.groupby(["BasinID", "rootdepth"])}
+        self._basins = {key: group.reset_index(drop=True) for key, group in table.groupby("BasinID")}
+
+    @classmethod
+    def open_default(cls):
+        """Load the bundled table, or return None if it has not been built."""
+        if not os.path.exists(DEFAULT_TABLE_PATH):
+            return None
+        return cls(pd.read_parquet(DEFAULT_TABLE_PATH))
+
+    def __len__(self):
+        return len(self._basins)
+
+    def lookup(self, basin_id, rootdepth=None):
+        """Rows for one basin (and rooting depth), or None when the basin is not in the table."""
+        if rootdepth is None:
+            return self._basins.get(basin_id)
+        return self._groups.get((basin_id, float(rootdepth)))
+
+
+_worker_state = {}
+
+
+def _init_worker(formulation, cube_dir, soil):
+    from soil_raster import SoilRaster
+
+    _worker_state.update(
+        engine=load_engine(formulation),
+        cube=ClimateCube.open(cube_dir),
+        basins=BasinIndex.open_default(),
+        soil=soil,
+        soil_raster=SoilRaster.open_default() if soil is None else None
+    )
+
+
+def _summarize_basin(index):
+    state = _worker_state
+    return basin_summary(state["engine"], state["cube"], state["basins"], index, soil=state["soil"],
+                         soil_raster=state["soil_raster"])
+
+
+def build_table(output_path=DEFAULT_TABLE_PATH, formulation=DEFAULT_FORMULATION, cube_dir=DEFAULT_CUBE_DIR,
+                soil=None, workers=None):
+    """Compute the distributions for every basin and write them as one Parquet table."""
+    basins = BasinIndex.open_default()
+    if basins is None:
+        raise SystemExit("the basin polygons have not been exported (see build_basin_index.py)")
+    if soil is None:
+        from soil_raster import SoilRaster
+        if SoilRaster.open_default() is None:
+            raise SystemExit("per-cell soil needs the soil texture raster (see build_soil_raster.py); "
+                             "pass --soil to use one soil type everywhere")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(formulation, cube_dir, soil)) as pool:
+        frames = list(pool.map(_summarize_basin, range(len(basins))))
+    table = pd.concat([frame for frame in frames if len(frame)], ignore_index=True)
+    table["formulation"] = formulation
+    table["coefficients"] = load_engine(formulation).version
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    table.to_parquet(output_path, index=False)
+    print(f"{table['BasinID'].nunique()} basins in {time.perf_counter() - start:.1f} s -> {output_path}",
+          file=sys.stderr)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--model", default=DEFAULT_FORMULATION)
+    parser.add_argument("--cube", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--soil", help="one soil type for every cell instead of the texture raster")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    build_table(args.output, args.model, args.cube, args.soil, args.workers)
+
+
+if __name__ == "__main__":
+    main()
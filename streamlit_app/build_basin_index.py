@@ -0,0 +1,50 @@
+"""
+Export the Nevada administrative groundwater basin polygons for local lookup.
+
+Pulls NVAdminGWBoundaries from Earth Engine once, keeping only the BasinID
+and BasinName properties, and writes it as GeoJSON in EPSG:4326 for
+basin_index.BasinIndex:
+
+    python build_basin_index.py --service-account-key key.json
+"""
+import argparse
+import json
+import os
+
+import ee
+
+from basin_index import DEFAULT_BASIN_PATH
+from build_climate_cube import initialize
+from point_data import ADMIN_GW_ASSET
+
+
+def export_basins(output_path):
+    basins = ee.FeatureCollection(ADMIN_GW_ASSET).select(["BasinID", "BasinName"])
+    collection = basins.getInfo()
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": feature["properties"], "geometry": feature["geometry"]}
+            for feature in collection["features"]
+        ]
+    }
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(collection, f)
+    print(f"Wrote {len(collection['features'])} basins to {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_BASIN_PATH)
+    parser.add_argument("--service-account-key", help="path to a service account JSON key")
+    args = parser.parse_args()
+
+    initialize(args.service_account_key)
+    export_basins(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Export the GRIDMET water-year climate for Nevada into the bundled climate cube.
+
+Uses the same calculate_wy_stats aggregation as the explorer and pulls the
+annual pr/eto bands with ee.data.computePixels in row chunks, so the output
+matches what a live point lookup returns. Run once per data release and ship
+the resulting climate_cube/ directory with the container:
+
+    python build_climate_cube.py --service-account-key key.json
+"""
+import argparse
+import json
+
+import ee
+import numpy as np
+
+from climate_cube import DEFAULT_CUBE_DIR, VARIABLES, nevada_window, write_cube
+from grids import GRIDMET, GridSpec
+from point_data import YEAR_END, YEAR_START, water_year_collection
+
+
+def initialize(service_account_key=None):
+    if service_account_key:
+        with open(service_account_key) as f:
+            email = json.load(f)["client_email"]
+        ee.Initialize(ee.ServiceAccountCredentials(email, service_account_key))
+    else:
+        ee.Initialize()
+
+
+def fetch_block(image, band_names, grid, row0, col0, rows, cols):
+    """Download one block of the stacked annual image as a (rows, cols, bands) array."""
+    request = {
+        "expression": image,
+        "fileFormat": "NUMPY_NDARRAY",
+        "bandIds": band_names,
+        "grid": {
+            "dimensions": {"width": cols, "height": rows},
+            "affineTransform": {
+                "scaleX": grid.res,
+                "shearX": 0,
+                "translateX": grid.west + col0 * grid.res,
+                "shearY": 0,
+                "scaleY": -grid.res,
+                "translateY": grid.north - row0 * grid.res
+            },
+            "crsCode": "EPSG:4326"
+        }
+    }
+    block = ee.data.computePixels(request)
+    return np.stack([block[name] for name in band_names], axis=-1).astype(np.float32)
+
+
+def build_cube(output_dir, year_start=YEAR_START, year_end=YEAR_END, block_rows=32):
+    years = list(range(year_start, year_end + 1))
+    image = water_year_collection(year_start, year_end).select(list(VARIABLES)).toBands()
+    band_names = [f"{year}_{var}" for var in VARIABLES for year in years]
+
+    row0, col0, rows, cols = nevada_window()
+    data = np.full((rows, cols, len(VARIABLES), len(years)), np.nan, dtype=np.float32)
+    for start in range(0, rows, block_rows):
+        n = min(block_rows, rows - start)
+        block = fetch_block(image, band_names, GRIDMET, row0 + start, col0, n, cols)
+        data[start:start + n] = block.reshape(n, cols, len(VARIABLES), len(years))
+        print(f"rows {start}-{start + n - 1} of {rows}")
+
+    grid = GridSpec("cube", west=GRIDMET.west + col0 * GRIDMET.res,
+                    north=GRIDMET.north - row0 * GRIDMET.res, res=GRIDMET.res)
+    write_cube(output_dir, data, grid, years)
+    print(f"Wrote {rows}x{cols} cells x {len(years)} years to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--service-account-key", help="path to a service account JSON key")
+    parser.add_argument("--year-start", type=int, default=YEAR_START)
+    parser.add_argument("--year-end", type=int, default=YEAR_END)
+    parser.add_argument("--block-rows", type=int, default=32)
+    args = parser.parse_args()
+
+    initialize(args.service_account_key)
+    build_cube(args.output_dir, args.year_start, args.year_end, args.block_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Produce the Nevada soil-texture Cloud-Optimized GeoTIFF read by soil_raster.SoilRaster.
+
+Step 1 starts an Earth Engine export of texture_2550 clipped to Nevada on the
+1 arc-second lat/lon grid used by grids.SOIL_GRID (nearest-neighbour, so the
+class codes are preserved):
+
+    python build_soil_raster.py export --bucket my-bucket --service-account-key key.json
+
+Step 2 rewrites the downloaded file as a tiled, compressed COG:
+
+    python build_soil_raster.py cog texture_2550_nv.tif
+"""
+import argparse
+import os
+
+from soil_raster import DEFAULT_SOIL_PATH
+
+
+def start_export(bucket, prefix, service_account_key=None):
+    import ee
+
+    from build_climate_cube import initialize
+    from climate_cube import NEVADA_BOUNDS
+    from grids import SOIL_GRID
+    from point_data import SOIL_TEXTURE_ASSET
+
+    initialize(service_account_key)
+    west, south, east, north = NEVADA_BOUNDS
+    region = ee.Geometry.Rectangle([west, south, east, north], "EPSG:4326", False)
+    image = ee.Image(SOIL_TEXTURE_ASSET).toUint8()
+    task = ee.batch.Export.image.toCloudStorage(
+        image=image,
+        description="texture_2550_nv",
+        bucket=bucket,
+        fileNamePrefix=prefix,
+        region=region,
+        crs="EPSG:4326",
+        crsTransform=[SOIL_GRID.res, 0, SOIL_GRID.west, 0, -SOIL_GRID.res, SOIL_GRID.north],
+        maxPixels=1e10,
+        formatOptions={"cloudOptimized": True}
+    )
+    task.start()
+    print(f"Started export task {task.id} to gs://{bucket}/{prefix}.tif")
+
+
+def write_cog(src_path, dst_path=DEFAULT_SOIL_PATH, blocksize=512):
+    import rasterio
+    from rasterio.shutil import copy as rio_copy
+
+    directory = os.path.dirname(dst_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with rasterio.open(src_path) as src:
+        rio_copy(src, dst_path, driver="COG", blocksize=blocksize, compress="DEFLATE",
+                 predictor=2, overview_resampling="mode", nodata=src.nodata if src.nodata is not None else 0)
+    print(f"Wrote {dst_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="start the Earth Engine export")
+    export.add_argument("--bucket", required=True)
+    export.add_argument("--prefix", default="texture_2550_nv")
+    export.add_argument("--service-account-key", help="path to a service account JSON key")
+
+    cog = commands.add_parser("cog", help="rewrite a downloaded GeoTIFF as a tiled COG")
+    cog.add_argument("source")
+    cog.add_argument("--output", default=DEFAULT_SOIL_PATH)
+    cog.add_argument("--blocksize", type=int, default=512)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        start_export(args.bucket, args.prefix, args.service_account_key)
+    else:
+        write_cog(args.source, args.output, args.blocksize)
+
+
+if __name__ == "__main__":
+    main()
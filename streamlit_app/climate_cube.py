@@ -0,0 +1,156 @@
+import json
+import os
+
+import numpy as np
+
+from grids import GRIDMET, GridSpec
+
+DEFAULT_CUBE_DIR = os.environ.get(
+    "WATERSMART_CLIMATE_CUBE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "climate_cube")
+)
+CUBE_FILE = "cube.npy"
+META_FILE = "cube.json"
+VARIABLES = ("pr", "eto")
+
+# Nevada bounding box (west, south, east, north) with a one-cell margin
+NEVADA_BOUNDS = (-120.05, 34.95, -114.0, 42.05)
+
+
+def nevada_window(grid=GRIDMET, bounds=NEVADA_BOUNDS):
+    """Return (row0, col0, rows, cols) of the GRIDMET cells covering Nevada."""
+    west, south, east, north = bounds
+    row0, col0 = grid.cell(north, west)
+    row1, col1 = grid.cell(south, east)
+    return row0, col0, row1 - row0 + 1, col1 - col0 + 1
+
+
+class ClimateCube:
+    """
+    Memory-mapped annual water-year pr/eto for every GRIDMET cell over Nevada.
+
+    The cube is stored as a single .npy array laid out (row, col, variable, year)
+    so the 30-year series of one cell is a contiguous, zero-copy slice and row
+    blocks can be streamed for raster work. A small JSON sidecar records the
+    grid and the water years.
+    """
+
+    def __init__(self, data, grid, years):
+        self.data = data
+        self.grid = grid
+        self.years = np.asarray(years)
+
+    @classmethod
+    def open(cls, directory=DEFAULT_CUBE_DIR):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        data = np.load(os.path.join(directory, CUBE_FILE), mmap_mode="r")
+        grid = GridSpec("cube", west=meta["west"], north=meta["north"], res=meta["res"])
+        return cls(data, grid, meta["years"])
+
+    @classmethod
+    def open_default(cls):
+        """Open the bundled cube, or return None if it has not been built."""
+        if not os.path.exists(os.path.join(DEFAULT_CUBE_DIR, CUBE_FILE)):
+            return None
+        return cls.open(DEFAULT_CUBE_DIR)
+
+    @property
+    def shape(self):
+        return self.data.shape[:2]
+
+    def cell(self, lat, lon):
+        """Return the (row, col) of a point in cube coordinates, or None if it is outside."""
+        row, col = self.grid.cell(lat, lon)
+        rows, cols = self.shape
+        if 0 <= row < rows and 0 <= col < cols:
+            return row, col
+        return None
+
+    def series(self, lat, lon):
+        """Return a (2, n_years) view of [pr, eto] for a point, or None if not covered."""
+        cell = self.cell(lat, lon)
+        if cell is None:
+            return None
+        values = self.data[cell]
+        if np.isnan(values).any():
+            return None
+        return values
+
+    def series_many(self, lats, lons):
+        """
+        Vectorized series() for many points.
+
+        Returns:
+            (n, 2, n_years) float array of [pr, eto]; rows are NaN where the
+            cube does not cover the point.
+        """
+        rows, cols = self.grid.cells(lats, lons)
+        n_rows, n_cols = self.shape
+        inside = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+        values = np.full((len(rows), 2, len(self.years)), np.nan)
+        values[inside] = self.data[rows[inside], cols[inside]]
+        return values
+
+    def gm_point(self, lat, lon):
+        """Return a point series in the '<year>_<band>' form produced by Earth Engine."""
+        values = self.series(lat, lon)
+        if values is None:
+            return None
+        pr, eto = values
+        gm_point = {}
+        for year, pr_year, eto_year in zip(self.years.tolist(), pr.tolist(), eto.tolist()):
+            gm_point[f"{year}_eto"] = eto_year
+            gm_point[f"{year}_pr"] = pr_year
+            gm_point[f"{year}_wb"] = pr_year - eto_year
+        return gm_point
+
+    def normals(self, lat, lon):
+        """Return the 1991-2020 mean annual values keyed like the normals assets."""
+        values = self.series(lat, lon)
+        if values is None:
+            return None
+        pr, eto = values.mean(axis=1, dtype=np.float64).tolist()
+        return {"mean_annual_pr": pr, "mean_annual_eto": eto, "mean_annual_deficit": pr - eto}
+
+    def row_blocks(self, block_rows=16):
+        """Yield (row0, block) pairs covering the cube in row chunks."""
+        rows = self.shape[0]
+        for row0 in range(0, rows, block_rows):
+            yield row0, self.data[row0:row0 + block_rows]
+
+
+def write_cube(directory, data, grid, years):
+    """
+    Write a cube array and its metadata.
+
+    Args:
+        directory (str): Output directory
+        data (np.ndarray): float32 array shaped (rows, cols, 2, n_years) holding [pr, eto]
+        grid (GridSpec): Grid of the cube's upper-left cell
+        years (list): Water years along the last axis
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, CUBE_FILE), np.ascontiguousarray(data, dtype=np.float32))
+    meta = {
+        "west": grid.west,
+        "north": grid.north,
+        "res": grid.res,
+        "years": [int(year) for year in years],
+        "variables": list(VARIABLES),
+        "layout": ["row", "col", "variable", "year"]
+    }
+    with open(os.path.join(directory, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def write_synthetic_cube(directory, years=range(1991, 2021), seed=0):
+    """Write a Nevada-sized cube of plausible random climate, for tests and benchmarks."""
+    row0, col0, rows, cols = nevada_window()
+    rng = np.random.default_rng(seed)
+    years = list(years)
+    data = np.empty((rows, cols, 2, len(years)), dtype=np.float32)
+    data[:, :, 0, :] = rng.gamma(4.0, 60.0, size=(rows, cols, len(years)))
+    data[:, :, 1, :] = rng.normal(1250.0, 80.0, size=(rows, cols, len(years)))
+    north, west = GRIDMET.north - row0 * GRIDMET.res, GRIDMET.west + col0 * GRIDMET.res
+    write_cube(directory, data, GridSpec("cube", west=west, north=north, res=GRIDMET.res), years)
+    return ClimateCube.open(directory)
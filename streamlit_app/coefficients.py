@@ -0,0 +1,201 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from model_engine import (DEFAULT_FORMULATION, FORMULATIONS, FREE_DRAIN_WTD, RESPONSES, TERMS, WTD_TABLE_STEP,
+                          ModelEngine, coefficient_tensor, get_formulation, interpolation_table)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+COEFFICIENTS_DIR = os.environ.get("WATERSMART_COEFFICIENTS_DIR", APP_DIR)
+COMPILED_DIR = os.environ.get("WATERSMART_COMPILED_DIR", os.path.join(APP_DIR, "compiled"))
+KEY_COLUMNS = ("soiltype", "rootdepth", "WTD")
+
+# Release manifest shipped next to the coefficient CSVs: file name -> SHA-256 (computed with LF line
+# endings). An edited or truncated copy of a listed file is rejected instead of silently used; a new
+# release replaces the CSV and its manifest entry together.
+MANIFEST_FILE = "coefficients_manifest.json"
+
+_lock = threading.Lock()
+_engines = {}
+
+
+def content_hash(raw):
+    """SHA-256 of a coefficient file, independent of CRLF/LF line endings."""
+    return hashlib.sha256(raw.replace(b"\r\n", b"\n")).hexdigest()
+
+
+def release_manifest(directory):
+    """Published SHA-256 by file name from the manifest in `directory`, empty when there is none."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def validate_table(dfcoeffs, responses=RESPONSES, terms=TERMS):
+    """
+    Check a coefficient table against the expected schema.
+
+    Every soil x rootdepth x WTD combination must appear exactly once, the
+    free-drain WTD must be present and every coefficient must be finite,
+    except the GW subsidy terms at free drain, which are blank because there
+    is no subsidy without a water table. Raises ValueError describing the first problem found.
+    """
+    columns = [f"{response}{term}" for response in responses for term in terms]
+    missing = [column for column in KEY_COLUMNS + tuple(columns) if column not in dfcoeffs.columns]
+    if missing:
+        raise ValueError(f"coefficient table is missing columns: {', '.join(missing)}")
+
+    duplicated = dfcoeffs.duplicated(list(KEY_COLUMNS))
+    if duplicated.any():
+        raise ValueError(f"duplicate coefficient rows: {dfcoeffs.loc[duplicated, list(KEY_COLUMNS)].values.tolist()}")
+
+    n_expected = (dfcoeffs["soiltype"].nunique() * dfcoeffs["rootdepth"].nunique() * dfcoeffs["WTD"].nunique())
+    if len(dfcoeffs) != n_expected:
+        raise ValueError(f"coefficient table has {len(dfcoeffs)} rows, expected a full grid of {n_expected}")
+
+    if FREE_DRAIN_WTD not in set(dfcoeffs["WTD"]):
+        raise ValueError(f"coefficient table has no free-drain rows (WTD == {FREE_DRAIN_WTD})")
+
+    free_drain = (dfcoeffs["WTD"] == FREE_DRAIN_WTD).to_numpy()
+    values = dfcoeffs[columns].to_numpy(dtype=np.float64)
+    finite = np.isfinite(values)
+    finite[free_drain] |= np.array([column.startswith("gwsubs") for column in columns])
+    if not finite.all():
+        raise ValueError("coefficient table contains missing or non-finite values")
+
+
+def compile_coefficients(path, output_dir=COMPILED_DIR, responses=RESPONSES, terms=TERMS):
+    """
+    Validate a coefficient CSV and write its tensor as .npy plus a JSON index.
+
+    The WTD interpolation table (every WTD_TABLE_STEP metres between the
+    modeled depths) is written next to it as <stem>_wtd_table.npy.
+
+    Returns:
+        Path of the JSON index.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = content_hash(raw)
+    name = os.path.basename(path)
+    published = release_manifest(os.path.dirname(os.path.abspath(path))).get(name)
+    if published is not None and published != digest:
+        raise ValueError(f"{name} does not match the published release in {MANIFEST_FILE} (sha256 {digest})")
+
+    dfcoeffs = pd.read_csv(io.BytesIO(raw))
+    validate_table(dfcoeffs, responses, terms)
+    tensor, soils, root_depths, wtds = coefficient_tensor(dfcoeffs, responses, terms)
+
+    stem = os.path.splitext(name)[0]
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, f"{stem}.npy"), tensor)
+    table, table_depths = interpolation_table(tensor, wtds, WTD_TABLE_STEP)
+    np.save(os.path.join(output_dir, f"{stem}_wtd_table.npy"), table)
+    index = {
+        "source": name,
+        "sha256": digest,
+        "soils": soils,
+        "root_depths": root_depths,
+        "wtds": wtds,
+        "responses": list(responses),
+        "terms": list(terms),
+        "layout": ["soil", "rootdepth", "WTD", "response", "term"],
+        "wtd_table": {"step": WTD_TABLE_STEP, "depths": table_depths.tolist(),
+                      "layout": ["soil", "rootdepth", "depth", "response", "term"]}
+    }
+    index_path = os.path.join(output_dir, f"{stem}.json")
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+    return index_path
+
+
+def load_compiled(path, output_dir=COMPILED_DIR, responses=RESPONSES, terms=TERMS):
+    """
+    Return (tensor, wtd_table, index) for a coefficient CSV, compiling it first if needed.
+
+    The compiled tensor and WTD interpolation table are memory-mapped. They
+    are rebuilt whenever the CSV's content hash no longer matches the one
+    recorded in the index, or the index predates the table. If the
+    output directory is read-only the compiled files are written to a
+    temporary directory instead.
+    """
+    with open(path, "rb") as f:
+        digest = content_hash(f.read())
+    stem = os.path.splitext(os.path.basename(path))[0]
+    index_path = os.path.join(output_dir, f"{stem}.json")
+
+    index = None
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    if index is None or index["sha256"] != digest or index.get("wtd_table", {}).get("step") != WTD_TABLE_STEP:
+        try:
+            index_path = compile_coefficients(path, output_dir, responses, terms)
+        except OSError:
+            output_dir = os.path.join(tempfile.gettempdir(), "watersmart_compiled")
+            index_path = compile_coefficients(path, output_dir, responses, terms)
+        with open(index_path) as f:
+            index = json.load(f)
+
+    tensor = np.load(os.path.join(output_dir, f"{stem}.npy"), mmap_mode="r")
+    wtd_table = np.load(os.path.join(output_dir, f"{stem}_wtd_table.npy"), mmap_mode="r")
+    return tensor, wtd_table, index
+
+
+def coefficients_path(name=DEFAULT_FORMULATION):
+    """Bundled coefficient CSV of a registered formulation."""
+    return os.path.join(COEFFICIENTS_DIR, get_formulation(name).filename)
+
+
+def load_engine(name=DEFAULT_FORMULATION, path=None):
+    """The ModelEngine for a registered formulation, built once per process."""
+    formulation = get_formulation(name)
+    path = path or coefficients_path(name)
+    with _lock:
+        engine = _engines.get((name, path))
+        if engine is None:
+            tensor, wtd_table, index = load_compiled(path, terms=formulation.terms)
+            engine = ModelEngine(tensor, index["soils"], index["root_depths"], index["wtds"],
+                                 version=index["sha256"], formulation=formulation, wtd_table=wtd_table,
+                                 table_depths=index["wtd_table"]["depths"])
+            _engines[(name, path)] = engine
+        return engine
+
+
+def reload_coefficients(name=DEFAULT_FORMULATION, path=None):
+    """
+    Drop the loaded engine and rebuild it from the file on disk.
+
+    Call this after dropping a new coefficient release in place, together
+    with its entry in the release manifest; results cached against the
+    previous release can be recognised by engine.version.
+    """
+    path = path or coefficients_path(name)
+    with _lock:
+        _engines.pop((name, path), None)
+    return load_engine(name, path)
+
+
+def evaluate_formulations(pr, eto, names=None, soil=None, rootdepth=None):
+    """
+    Evaluate several formulations on the same climate batch.
+
+    Args:
+        pr (array-like): Annual precipitation (mm), shaped (..., year)
+        eto (array-like): Annual reference ET (mm), same shape as pr
+        names (list): Registered formulation names, or None for all of them
+        soil (str): Soil type, or None for every soil
+        rootdepth (float): Rooting depth (m), or None for every depth
+
+    Returns:
+        Dictionary of formulation name -> ModelResult shaped (..., WTD, year).
+    """
+    return {name: load_engine(name).evaluate(pr, eto, soil, rootdepth) for name in (names or FORMULATIONS)}
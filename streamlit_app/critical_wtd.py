@@ -0,0 +1,242 @@
+"""
+Critical water table depth: the deepest groundwater that still keeps LAI on target.
+
+For every site, soil and rooting depth the model coefficients are
+interpolated linearly between the modeled water table depths (1, 3 and
+6 m). Meeting the target is not monotone in depth everywhere (the 3.6 m
+rooting depth can miss it at some depth and meet it again deeper, in
+windows down to a few millimetres), so the solver looks for the first
+depth where LAI stops reaching the target in the required share of years.
+Each year's LAI is linear in depth between the modeled WTDs, so a site can
+only start or stop meeting the target where some year's LAI crosses it.
+Those crossings are computed directly, the target is checked once between
+each consecutive pair from the shallow end, and the crossing opening the
+first miss is the critical depth, for all sites at once. The result per
+site is
+
+    a depth (m)   LAI reaches the target down to this water table
+    6 (deepest)   met down to the deepest modeled WTD but not at free drain; the
+                  critical depth lies deeper than the model resolves
+    inf           met at free drain, i.e. without groundwater
+    NaN           missed even at the shallowest modeled WTD, or the site has
+                  no climate
+
+Run as a script it writes a statewide raster over the bundled climate cube,
+with free drain (12) standing for "no groundwater needed":
+
+    <soil>_<rd>m_critical_p<percent>.tif
+
+    python critical_wtd.py --soil loam --rootdepth 2 --percent 80
+    python critical_wtd.py --soil raster --rootdepth 3.6 --laithresh 0.8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from climate_cube import DEFAULT_CUBE_DIR, ClimateCube
+from coefficients import load_engine
+from model_engine import DEFAULT_FORMULATION, FORMULATIONS, FREE_DRAIN_WTD, lai_threshold
+from model_rasters import DEFAULT_RASTER_DIR, SOIL_FROM_RASTER, cell_soils, write_cog
+
+# % of years LAI must reach the target
+DEFAULT_PERCENT = 50
+
+_cubes = {}
+
+
+def percent_over(engine, features, coefficients, laithresh):
+    """
+    % of years with LAI at or above the target for per-site coefficients.
+
+    Args:
+        engine (ModelEngine): Model whose post-processing rules apply
+        features (np.ndarray): Climate terms shaped (site, year, term)
+        coefficients (np.ndarray): Coefficients shaped (site, response, term)
+        laithresh (np.ndarray): Target LAI per site
+
+    Returns:
+        Array shaped (site,).
+    """
+    lai = np.einsum("syt,st->sy", features, coefficients[:, 0])
+    if engine.formulation.clamp:
+        lai = np.where(lai < 0, 0, lai)
+    return (lai >= laithresh[:, None]).mean(axis=-1) * 100
+
+
+def critical_wtd(engine, pr, eto, soils, rootdepths, laithresh=None, percent=DEFAULT_PERCENT):
+    """
+    Deepest water table down to which LAI reaches the target in `percent` % of years.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        pr (array-like): Annual precipitation (mm), shaped (site, year)
+        eto (array-like): Annual reference ET (mm), same shape as pr
+        soils (array-like): Soil type name per site
+        rootdepths (array-like): Rooting depth (m) per site
+        laithresh (float or array-like): Target LAI, one value or one per
+            site; defaults to each rooting depth's threshold
+        percent (float): Required % of years at or above the target
+
+    Returns:
+        Array shaped (site,) of depths (m), inf or NaN as described in the module docstring.
+    """
+    pr = np.asarray(pr, dtype=np.float64)
+    eto = np.asarray(eto, dtype=np.float64)
+    n_sites = pr.shape[0]
+    s = engine.soil_index(soils)
+    r = engine.rootdepth_index(rootdepths)
+    if laithresh is None:
+        laithresh = lai_threshold(rootdepths)
+    laithresh = np.broadcast_to(np.asarray(laithresh, dtype=np.float64), (n_sites,))
+    features = engine.formulation.features(pr, eto)
+
+    index = [i for i, wtd in enumerate(engine.wtds) if wtd != FREE_DRAIN_WTD]
+    modeled = np.asarray(engine.wtds, dtype=np.float64)[index]
+    shallow, deep = modeled[0], modeled[-1]
+
+    def meets(wtd, sites):
+        coefficients = engine.coefficients_at(wtd, s[sites], r[sites])
+        return percent_over(engine, features[sites], coefficients, laithresh[sites]) >= percent
+
+    free_drain = percent_over(engine, features, engine.coefficients[s, r, engine.free_drain], laithresh) >= percent
+
+    # Depths where a year's LAI crosses the target inside a segment between modeled WTDs, shaped (site, segment, year)
+    lai = np.einsum("syt,swt->swy", features, engine.coefficients[s, r][:, index, 0])
+    upper, lower = lai[:, 1:], lai[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = (laithresh[:, None, None] - lower) / (upper - lower)
+    crossings = modeled[:-1, None] + fraction * np.diff(modeled)[:, None]
+    crossings = np.where((fraction > 0) & (fraction < 1), crossings, np.inf).reshape(n_sites, -1)
+    # Sorted candidate depths, with the segment starts where the slopes change; inf pads sites with fewer crossings
+    candidates = np.sort(np.concatenate([np.broadcast_to(modeled[:-1], (n_sites, len(modeled) - 1)), crossings,
+                                         np.full((n_sites, 1), np.inf)], axis=1), axis=1)
+
+    result = np.full(n_sites, np.nan)
+    pending = np.flatnonzero(meets(np.full(n_sites, shallow), slice(None)))
+    result[pending] = deep
+    # Meeting the target is constant between consecutive candidates; check each gap from the shallow end
+    for k in range(candidates.shape[1] - 1):
+        start = candidates[pending, k]
+        pending, start = pending[start < deep], start[start < deep]
+        if not len(pending):
+            break
+        ok = meets((start + np.minimum(candidates[pending, k + 1], deep)) / 2, pending)
+        result[pending[~ok]] = start[~ok]
+        pending = pending[ok]
+
+    result[free_drain] = np.inf
+    result[~(np.isfinite(pr).all(axis=-1) & np.isfinite(eto).all(axis=-1))] = np.nan
+    return result
+
+
+def solve_rows(cube_dir, formulation, row0, block_rows, soils, rootdepth, laithresh, percent):
+    """Worker entry point: critical WTD of rows [row0, row0 + block_rows) of the cube."""
+    cube = _cubes.get(cube_dir)
+    if cube is None:
+        cube = _cubes[cube_dir] = ClimateCube.open(cube_dir)
+    engine = load_engine(formulation)
+    block = cube.data[row0:row0 + block_rows]
+
+    depths = np.full(block.shape[:2], np.nan, dtype=np.float32)
+    valid = ~np.isnan(block).any(axis=(2, 3)) & np.isin(soils, engine.soils)
+    if valid.any():
+        climate = np.asarray(block[valid], dtype=np.float64)
+        depths[valid] = critical_wtd(engine, climate[:, 0], climate[:, 1], soils[valid],
+                                     np.full(len(climate), rootdepth), laithresh, percent)
+    return row0, depths
+
+
+def build_critical_raster(soil, rootdepth, percent=DEFAULT_PERCENT, laithresh=None, output_dir=DEFAULT_RASTER_DIR,
+                          formulation=DEFAULT_FORMULATION, cube_dir=DEFAULT_CUBE_DIR, block_rows=16, workers=None):
+    """
+    Solve the critical WTD for every cube cell and write it as a COG.
+
+    Args:
+        soil (str): Soil type name, or "raster" to read it from the texture raster
+        rootdepth (float): Rooting depth (m)
+        percent (float): Required % of years at or above the target
+        laithresh (float): Target LAI, defaults to the rooting depth's threshold
+        output_dir (str): Directory for the GeoTIFF
+        formulation (str): Registered model formulation
+        cube_dir (str): Climate cube directory
+        block_rows (int): Cube rows solved per task
+        workers (int): Worker processes (default: CPU count)
+
+    Returns:
+        Path of the written raster.
+    """
+    engine = load_engine(formulation)
+    cube = ClimateCube.open(cube_dir)
+    rows, cols = cube.shape
+    rootdepth = engine.root_depths[engine.rootdepth_index([rootdepth])[0]]
+    laithresh = laithresh if laithresh is not None else lai_threshold(rootdepth)
+
+    if soil == SOIL_FROM_RASTER:
+        from soil_raster import SoilRaster
+        soil_raster = SoilRaster.open_default()
+        if soil_raster is None:
+            raise SystemExit("--soil raster needs the bundled soil texture raster (see build_soil_raster.py)")
+        soils = cell_soils(cube, soil_raster, block_rows)
+    else:
+        engine.soil_index([soil])
+        soils = np.full((rows, cols), soil, dtype=object)
+
+    depths = np.full((rows, cols), np.nan, dtype=np.float32)
+    start = time.perf_counter()
+    workers = max(workers or os.cpu_count() or 1, 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+
+        def collect(done):
+            for future in done:
+                row0, block = future.result()
+                depths[row0:row0 + block.shape[0]] = block
+
+        for row0 in range(0, rows, block_rows):
+            in_flight.add(pool.submit(solve_rows, cube_dir, formulation, row0, block_rows,
+                                      soils[row0:row0 + block_rows], rootdepth, laithresh, percent))
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(in_flight)
+    elapsed = time.perf_counter() - start
+
+    # Averaged overviews cannot hold inf, so "no groundwater needed" is written as free drain
+    depths[np.isinf(depths)] = FREE_DRAIN_WTD
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{soil}_{rootdepth:g}m_critical_p{percent:g}.tif")
+    tags = {"soil": soil, "rootdepth": rootdepth, "percent": percent, "laithresh": laithresh,
+            "formulation": formulation, "coefficients": engine.version, "variable": "critical_wtd",
+            "free_drain": FREE_DRAIN_WTD}
+    write_cog(path, depths[None], cube, ["critical_wtd"], tags)
+
+    n_cells = int((~np.isnan(depths)).sum())
+    print(f"{n_cells} cells solved in {elapsed:.2f} s with {workers} workers", file=sys.stderr)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--soil", required=True, help=f"soil type name, or '{SOIL_FROM_RASTER}' for the texture raster")
+    parser.add_argument("--rootdepth", type=float, required=True)
+    parser.add_argument("--percent", type=float, default=DEFAULT_PERCENT,
+                        help="%% of years LAI must reach the target")
+    parser.add_argument("--laithresh", type=float, default=None,
+                        help="target LAI (default: the rooting depth's threshold)")
+    parser.add_argument("--model", default=DEFAULT_FORMULATION, choices=sorted(FORMULATIONS))
+    parser.add_argument("--cube", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--output", default=DEFAULT_RASTER_DIR)
+    parser.add_argument("--block-rows", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(build_critical_raster(args.soil, args.rootdepth, args.percent, args.laithresh, args.output, args.model,
+                                args.cube, args.block_rows, args.workers))
+
+
+if __name__ == "__main__":
+    main()
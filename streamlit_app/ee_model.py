@@ -0,0 +1,125 @@
+import ee
+
+from map_layers import LAYER_OPACITY
+from model_engine import FREE_DRAIN_WTD, RESPONSES, lai_threshold
+from model_rasters import SUMMARY_LAYERS
+from point_data import SOIL_TEXTURE_ASSET, SOIL_TEXTURES, YEAR_END, YEAR_START, water_year_collection
+
+# Each formulation as an ee.Image.expression over the annual P and PET bands;
+# coefficient variables are named after the formulation's terms
+EXPRESSIONS = {
+    "ppetquad": "Intercept + Px * P + PETx * (PET / 10) + P2x * P ** 2 + PET2x * (PET / 10) ** 2",
+    "wb-cubic": "Intercept + wbx * ((P - PET) / 100) + wb2x * ((P - PET) / 100) ** 2 + wb3x * ((P - PET) / 100) ** 3",
+}
+
+MODEL_LAYERS = {
+    "Modeled LAI": "lai_median",
+    "Modeled GW subsidy": "gwsubs_mean",
+}
+
+
+def soil_image():
+    return ee.Image(SOIL_TEXTURE_ASSET).rename('texture')
+
+
+def coefficient_image(engine, soil, rootdepth, wtd, response):
+    """
+    Coefficients of one response as an image with one band per term.
+
+    Each texture class code in `soil` is remapped to the coefficients of its
+    soil type, so every pixel carries its own model. Classes without
+    coefficients (sand) are masked.
+    """
+    r = engine.root_depths.index(float(rootdepth))
+    w = engine.wtds.index(wtd)
+    k = RESPONSES.index(response)
+    codes = [code for code, name in SOIL_TEXTURES.items() if name in engine.soils]
+    bands = []
+    for t, term in enumerate(engine.formulation.terms):
+        values = [float(engine.coefficients[engine.soils.index(SOIL_TEXTURES[code]), r, w, k, t]) for code in codes]
+        bands.append(soil.remap(codes, values).rename(term))
+    return ee.Image.cat(bands)
+
+
+def response_image(engine, annual, coefficients):
+    """Evaluate the formulation's expression for one water year."""
+    variables = {'P': annual.select('pr'), 'PET': annual.select('eto')}
+    for term in engine.formulation.terms:
+        variables[term] = coefficients.select(term)
+    return annual.expression(EXPRESSIONS[engine.name], variables)
+
+
+def annual_model(engine, rootdepth, wtd, soil=None, year_start=YEAR_START, year_end=YEAR_END):
+    """
+    LAI, AET, AETgw and GW subsidy for every water year, computed server-side.
+
+    Mirrors ModelEngine.postprocess: GW subsidy is derived from AET relative
+    to free drain or taken from the fitted response, and the same clamps are
+    applied.
+
+    Returns:
+        ee.ImageCollection of annual images with bands lai, aet, aetgw, gwsubs.
+    """
+    soil = soil if soil is not None else soil_image()
+    coefficients = {response: coefficient_image(engine, soil, rootdepth, wtd, response)
+                    for response in ('LAI', 'aet', 'aetgw')}
+    direct_gwsubs = engine.formulation.gwsubs != "aet_difference"
+    if direct_gwsubs and wtd != FREE_DRAIN_WTD:
+        coefficients['gwsubs'] = coefficient_image(engine, soil, rootdepth, wtd, 'gwsubs')
+    if not direct_gwsubs:
+        coefficients['aet_free_drain'] = coefficient_image(engine, soil, rootdepth, FREE_DRAIN_WTD, 'aet')
+    clamp = engine.formulation.clamp
+
+    def evaluate(annual):
+        annual = ee.Image(annual)
+        lai = response_image(engine, annual, coefficients['LAI'])
+        aet = response_image(engine, annual, coefficients['aet'])
+        aetgw = response_image(engine, annual, coefficients['aetgw'])
+        if direct_gwsubs:
+            gwsubs = (response_image(engine, annual, coefficients['gwsubs'])
+                      if 'gwsubs' in coefficients else aet.multiply(0))
+        else:
+            gwsubs = aet.subtract(response_image(engine, annual, coefficients['aet_free_drain']))
+        ratio = gwsubs.divide(aet)
+
+        if clamp:
+            # Remove remnant error in calcs
+            aetgw = aetgw.where(aetgw.lt(1), 0)
+            lai = lai.where(lai.lt(0), 0)
+            aet = aet.where(aet.lt(1), 0)
+            gwsubs = gwsubs.where(gwsubs.lt(1), 0)
+            gwsubs = gwsubs.where(ratio.gt(1), aet)
+
+        return (ee.Image.cat([lai.rename('lai'), aet.rename('aet'), aetgw.rename('aetgw'), gwsubs.rename('gwsubs')])
+                .copyProperties(annual, ['system:time_start', 'system:index', 'year']))
+
+    return water_year_collection(year_start, year_end).map(evaluate)
+
+
+def summary_image(engine, rootdepth, wtd, laithresh=None, soil=None, year_start=YEAR_START, year_end=YEAR_END):
+    """
+    Summary over the water years, computed server-side.
+
+    Returns:
+        ee.Image with bands lai_median, noverthresh (exceedance count),
+        percoverthresh, gwsubs_mean and aet_mean.
+    """
+    laithresh = laithresh if laithresh is not None else lai_threshold(rootdepth)
+    model = annual_model(engine, rootdepth, wtd, soil, year_start, year_end)
+    n_years = year_end - year_start + 1
+    exceedances = model.select('lai').map(lambda image: ee.Image(image).gte(laithresh)).sum().rename('noverthresh')
+    return ee.Image.cat([
+        model.select('lai').median().rename('lai_median'),
+        exceedances,
+        exceedances.multiply(100.0 / n_years).rename('percoverthresh'),
+        model.select('gwsubs').mean().rename('gwsubs_mean'),
+        model.select('aet').mean().rename('aet_mean'),
+    ])
+
+
+def layer_request(label, engine, rootdepth, wtd):
+    """Return the (ee image, vis params) pair drawn for a modeled map layer."""
+    band = MODEL_LAYERS[label]
+    _, vis = SUMMARY_LAYERS[band]
+    image = summary_image(engine, rootdepth, wtd).select(band)
+    return image, {**vis, 'opacity': LAYER_OPACITY}
@@ -0,0 +1,214 @@
+"""
+Rendered result figures shared by every session.
+
+Figures are stored as encoded PNG bytes keyed by everything they depend on
+(GRIDMET cell, model, soil, rooting depth, LAI target, ..., figure name and
+DPI), so the page and the PDF report read the same images and each figure
+is rendered at most once per key, whichever session asks first. The page
+uses PNGs and the PDF report SVGs, which it embeds as vector drawings. The
+cache is bounded by the total size of the stored images and drops the
+least recently used ones first.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+# st.pyplot's own savefig resolution
+SCREEN_DPI = 200
+
+
+class FigureCache:
+    """
+    Thread-safe LRU store of encoded images.
+
+    Args:
+        max_bytes (int): Upper bound on the summed size of the stored images
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self._rendering = {}
+
+    def get(self, key):
+        """Stored bytes for `key`, or None."""
+        with self._lock:
+            data = self._images.get(key)
+            if data is not None:
+                self._images.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        """Store bytes under `key`, evicting the least recently used images beyond max_bytes."""
+        with self._lock:
+            if key in self._images:
+                self.nbytes -= len(self._images.pop(key))
+            self._images[key] = data
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def get_or_render(self, key, render):
+        """
+        Stored bytes for `key`, calling `render()` to produce them on a miss.
+
+        Concurrent requests for the same key wait for the first render
+        instead of repeating it.
+        """
+        with self._lock:
+            key_lock = self._rendering.setdefault(key, threading.Lock())
+        with key_lock:
+            data = self.get(key)
+            if data is not None:
+                self.hits += 1
+                return data
+            data = render()
+            self.misses += 1
+            self.put(key, data)
+        with self._lock:
+            self._rendering.pop(key, None)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Entry count, stored bytes, hits and misses."""
+        return {"entries": len(self._images), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._images)
+
+
+def figure_png(plot, size=None, dpi=SCREEN_DPI):
+    """
+    Draw a plot, optionally at `size` inches, and return it as PNG bytes.
+
+    plotnine plots are cropped to their content; native_figures.NativePlot
+    lays itself out for the size and renders through its own png method.
+    """
+    if hasattr(plot, "png"):
+        return plot.png(size, dpi)
+    fig = plot.draw()
+    if size is not None:
+        fig.set_size_inches(*size)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def figure_svg(plot, size=None, dpi=SCREEN_DPI):
+    """
+    Draw a plot, optionally at `size` inches, and return it as SVG bytes.
+
+    Text stays text rather than glyph outlines, so it is searchable in the
+    report and far smaller. It is set in the PDF standard fonts, which have
+    no Unicode minus sign, so negative ticks use a hyphen. `dpi` only
+    applies to embedded images such as the colour bar.
+    """
+    with plt.rc_context({"svg.fonttype": "none", "axes.unicode_minus": False}):
+        if hasattr(plot, "svg"):
+            return plot.svg(size, dpi)
+        fig = plot.draw()
+        if size is not None:
+            fig.set_size_inches(*size)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="svg", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# Renderer of each image format by name
+FIGURE_FORMATS = {"png": figure_png, "svg": figure_svg}
+
+
+def cached_figures(cache, context, names, build, dpi=SCREEN_DPI, sizes=None, pool=None, fmt="png"):
+    """
+    Image bytes of the named plots, rendering only those not in the cache.
+
+    Args:
+        cache (FigureCache): Shared image store
+        context (tuple): Everything the plots depend on; the cache key is
+            context + (name, dpi, fmt)
+        names (tuple): Plot names to return
+        build (callable): () -> dict of plots by name; called at most once,
+            and only when some plot is missing
+        dpi (int): Render resolution
+        sizes (dict): Figure size in inches by plot name, default size when absent
+        pool (FigurePool): Worker processes rendering the missing plots in
+            parallel, or None to render them here one after another
+        fmt (str): Image format, a key of FIGURE_FORMATS
+
+    Returns:
+        dict of plot name -> image bytes.
+    """
+    if pool is not None:
+        figures = dict(iter_cached_figures(cache, [(context, names, build)], dpi, sizes, pool, fmt))
+        return {name: figures[name] for name in names}
+
+    plots = {}
+
+    def render(name):
+        if not plots:
+            plots.update(build())
+        return FIGURE_FORMATS[fmt](plots[name], (sizes or {}).get(name), dpi)
+
+    return {name: cache.get_or_render(context + (name, dpi, fmt), lambda name=name: render(name)) for name in names}
+
+
+def iter_cached_figures(cache, groups, dpi=SCREEN_DPI, sizes=None, pool=None, fmt="png"):
+    """
+    Image bytes of the plots of several cached_figures calls, each as soon as it is ready.
+
+    Cached plots come first; the missing ones of every group are then
+    rendered together, in parallel when a pool is given, and stored as they
+    complete. Unlike cached_figures without a pool, two sessions missing
+    the same plot at the same moment both render it.
+
+    Args:
+        cache (FigureCache): Shared image store
+        groups (list): (context, names, build) of each set of plots, as
+            taken by cached_figures
+        dpi (int): Render resolution
+        sizes (dict): Figure size in inches by plot name, default size when absent
+        pool (FigurePool): Worker processes, or None to render here
+        fmt (str): Image format, a key of FIGURE_FORMATS
+
+    Yields:
+        (plot name, image bytes).
+    """
+    sizes = sizes or {}
+    missing = {}
+    for context, names, build in groups:
+        absent = []
+        for name in names:
+            data = cache.get(context + (name, dpi, fmt))
+            if data is None:
+                absent.append(name)
+            else:
+                cache.hits += 1
+                yield name, data
+        if absent:
+            plots = build()
+            missing.update({context + (name, dpi, fmt): (name, plots[name]) for name in absent})
+
+    if pool is None:
+        rendered = ((key, FIGURE_FORMATS[fmt](plot, sizes.get(name), dpi)) for key, (name, plot) in missing.items())
+    else:
+        rendered = pool.render_many({key: plot for key, (_, plot) in missing.items()},
+                                    {key: sizes.get(name) for key, (name, _) in missing.items()}, dpi, fmt)
+    for key, data in rendered:
+        cache.misses += 1
+        cache.put(key, data)
+        yield missing[key][0], data
@@ -0,0 +1,107 @@
+"""
+Results charts rendered in a pool of warm worker processes.
+
+Rendering holds the GIL for the whole draw, so charts rendered on a
+Streamlit script thread stall every other session served by the process.
+A FigurePool hands them to worker processes instead. Each worker imports
+matplotlib, plotnine and the renderers once, at start-up, and draws one
+throwaway chart to load fonts.
+
+A chart travels to the worker as its native_figures.NativePlot, which is
+just the arrays and labels of the chart; plotnine plots cannot be pickled,
+so the pool only serves the native renderer. The image comes back through a
+shared memory segment that the worker creates and the parent copies out
+and unlinks, so only the segment name and size go through the result pipe.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+from figure_cache import FIGURE_FORMATS, SCREEN_DPI
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def warm_worker():
+    """Worker initializer: import the plotting stack and draw once so the first real chart is not cold."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import plotnine  # noqa: F401
+
+    from native_figures import NativePlot
+    NativePlot("series", 1, series=[("1 m", [1991.0, 1992.0], [0.0, 1.0])], x=[1991.0, 1992.0], y=[0.0, 1.0],
+               wb=[0.0, 1.0], bands=None, hline=None, title="", subtitle="", xlabel="", ylabel="", legend_title="",
+               linetype_title="").png()
+
+
+def ping():
+    return os.getpid()
+
+
+def render_shared(plot, size, dpi, fmt="png"):
+    """Worker task: render `plot` and leave the image in a new shared memory segment; returns (name, size)."""
+    data = FIGURE_FORMATS[fmt](plot, size, dpi)
+    segment = SharedMemory(create=True, size=max(len(data), 1))
+    segment.buf[:len(data)] = data
+    name = segment.name
+    segment.close()
+    return name, len(data)
+
+
+def collect_shared(name, size):
+    """Copy a worker's image out of its shared memory segment and free the segment."""
+    segment = SharedMemory(name=name)
+    try:
+        return bytes(segment.buf[:size])
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+class FigurePool:
+    """
+    Process pool rendering plots to image bytes.
+
+    Args:
+        workers (int): Worker processes, started and warmed up front
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        # Fresh interpreters rather than forks of a threaded server process
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                             initializer=warm_worker)
+        for future in [self._executor.submit(ping) for _ in range(workers)]:
+            future.result()
+
+    def render_many(self, plots, sizes=None, dpi=SCREEN_DPI, fmt="png"):
+        """
+        Render plots in parallel and yield them as they complete.
+
+        Args:
+            plots (dict): NativePlots by key
+            sizes (dict): Figure size in inches by key, default size when absent
+            dpi (int): Render resolution
+            fmt (str): Image format, a key of figure_cache.FIGURE_FORMATS
+
+        Yields:
+            (key, image bytes) in completion order.
+        """
+        sizes = sizes or {}
+        pending = {self._executor.submit(render_shared, plot, sizes.get(key), dpi, fmt): key
+                   for key, plot in plots.items()}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    yield key, collect_shared(*future.result())
+        finally:
+            # A consumer that stops early still frees the segments of the remaining renders
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    collect_shared(*future.result())
+
+    def shutdown(self):
+        self._executor.shutdown()
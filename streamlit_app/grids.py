@@ -0,0 +1,46 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    """A north-up lat/lon grid described by its upper-left corner and cell size in degrees."""
+    name: str
+    west: float
+    north: float
+    res: float
+
+    def cell(self, lat, lon):
+        """Return the (row, col) of the cell containing a point."""
+        row = int(math.floor((self.north - lat) / self.res))
+        col = int(math.floor((lon - self.west) / self.res))
+        return row, col
+
+    def cells(self, lats, lons):
+        """Vectorized cell(): (rows, cols) integer arrays for many points."""
+        rows = np.floor((self.north - np.asarray(lats, dtype=float)) / self.res).astype(np.int64)
+        cols = np.floor((np.asarray(lons, dtype=float) - self.west) / self.res).astype(np.int64)
+        return rows, cols
+
+    def center(self, row, col):
+        """Return the (lat, lon) of a cell center."""
+        return self.north - (row + 0.5) * self.res, self.west + (col + 0.5) * self.res
+
+    def snap(self, lat, lon):
+        """Snap a point to the center of its cell."""
+        return self.center(*self.cell(lat, lon))
+
+    def key(self, lat, lon):
+        """Stable string key for the cell containing a point, e.g. 'gridmet:241:181'."""
+        row, col = self.cell(lat, lon)
+        return f"{self.name}:{row}:{col}"
+
+
+# IDAHO_EPSCOR/GRIDMET native grid (1/24 degree, EPSG:4326)
+GRIDMET = GridSpec("gridmet", west=-124.78749996666667, north=49.42083333333334, res=1 / 24)
+
+# The CSRL texture raster is 30 m; a 1 arc-second grid is the closest lat/lon
+# equivalent and keeps every cached soil/basin answer within one source pixel.
+SOIL_GRID = GridSpec("soil", west=-180.0, north=90.0, res=1 / 3600)
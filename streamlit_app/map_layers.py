@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+
+import ee
+
+from point_data import ADMIN_GW_ASSET, ETO_ASSET, PRECIP_ASSET, PWD_ASSET, SOIL_TEXTURE_ASSET
+
+# Earth Engine map tokens are valid for a few hours; refresh well before that
+DEFAULT_REFRESH_SECONDS = 2 * 3600
+LAYER_OPACITY = 0.5
+
+LAYER_ASSETS = {
+    "Administrative groundwater boundaries": ADMIN_GW_ASSET,
+    "Soil texture": SOIL_TEXTURE_ASSET,
+    "Average potential evapotranspiration": ETO_ASSET,
+    "Average precipitation": PRECIP_ASSET,
+    "Average potential water deficit": PWD_ASSET,
+}
+
+LAYER_VIS_PARAMS = {
+    "Soil texture": {
+        'min': 1,
+        'max': 12,
+        'palette': [
+            '#BEBEBE',  # 1 - sand
+            '#FDFD9E',  # 2 - loamy sand
+            '#ebd834',  # 3 - sandy loam
+            '#307431',  # 4 - loam
+            '#CD94EA',  # 5 - silt loam
+            '#546BC3',  # 6 - silt
+            '#92C158',  # 7 - sandy clay loam
+            '#EA6996',  # 8 - clay loam
+            '#6D94E5',  # 9 - silty clay loam
+            '#4C5323',  # 10 - sandy clay
+            '#E93F4A',  # 11 - silty clay
+            '#AF4732'   # 12 - clay
+        ]
+    },
+
+    "Average precipitation": {
+        'min': 0,
+        'max': 750,
+        'palette': ["#f7fbff", "#deebf7", "#c6dbef", "#9ecae1", "#6baed6", "#4292c6", "#2171b5", "#08519c", "#08306b"]
+    },
+    "Average potential evapotranspiration": {
+        'min': 0,
+        'max': 2500,
+        'palette': ['#ffffcc', '#ffe692', '#febf5a', '#fd8d3c', '#f43d25', '#ca0923', '#800026']
+    },
+    "Average potential water deficit": {
+        'min': 0,
+        'max': 2000,
+        'palette': ['#081d58', '#24429b', '#1f80b8', '#41b6c4', '#97d6b9', '#e0f3b2', '#ffffd9']
+    }
+}
+
+# Styling of the groundwater boundary outlines
+BOUNDARY_STYLE = {'color': 'black', 'width': 5}
+BOUNDARY_OPACITY = 0.65
+
+
+def layer_key(label):
+    """Cache key for a sidebar layer: its asset and everything that changes how it is drawn."""
+    asset_id = LAYER_ASSETS[label]
+    if asset_id == ADMIN_GW_ASSET:
+        vis = {"style": BOUNDARY_STYLE, "opacity": BOUNDARY_OPACITY}
+    else:
+        vis = {**LAYER_VIS_PARAMS.get(label, {}), "opacity": LAYER_OPACITY}
+    return asset_id, json.dumps(vis, sort_keys=True)
+
+
+def layer_request(label):
+    """Return the (ee image, vis params) pair drawn for a sidebar layer."""
+    asset_id = LAYER_ASSETS[label]
+    if asset_id == ADMIN_GW_ASSET:
+        # Styled outlines are rendered to an image on the server
+        styled = ee.FeatureCollection(asset_id).style(**BOUNDARY_STYLE)
+        return styled.visualize(**{"opacity": BOUNDARY_OPACITY}), {}
+    vis_params = {**LAYER_VIS_PARAMS.get(label, {}), "opacity": LAYER_OPACITY}
+    return ee.Image(asset_id), vis_params
+
+
+class MapIdCache:
+    """
+    Process-wide cache of Earth Engine tile URLs for the map overlay layers.
+
+    Entries are keyed by (asset, vis params) and shared by every Streamlit
+    session, so redrawing the map never calls getMapId() for a layer that has
+    already been requested. A background thread re-requests each entry before
+    its map token expires.
+
+    Args:
+        refresh_seconds (float): Age at which an entry is re-requested
+    """
+
+    def __init__(self, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._entries = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+        self.hits = 0
+        self.misses = 0
+
+    def _fetch(self, key):
+        with self._lock:
+            image, vis_params = self._requests[key]
+        url = ee.Image(image).getMapId(vis_params)['tile_fetcher'].url_format
+        with self._lock:
+            self._entries[key] = (url, time.time())
+        return url
+
+    def tile_url(self, label):
+        """Return the tile URL template for a sidebar layer, requesting it only on first use."""
+        key = layer_key(label)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] < self.refresh_seconds:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        request = layer_request(label)
+        with self._lock:
+            self._requests[key] = request
+        return self._fetch(key)
+
+    def prewarm(self, labels=None):
+        """
+        Request tile URLs for the overlay layers up front.
+
+        A layer whose request fails is skipped and left to tile_url() on first use.
+
+        Returns:
+            Labels of the layers that could not be requested.
+        """
+        failed = []
+        for label in labels or LAYER_ASSETS:
+            try:
+                self.tile_url(label)
+            except Exception:
+                failed.append(label)
+        return failed
+
+    def refresh_stale(self, margin=0.1):
+        """Re-request entries that are within `margin` of their refresh age."""
+        cutoff = time.time() - self.refresh_seconds * (1 - margin)
+        with self._lock:
+            stale = [key for key, (_, fetched) in self._entries.items() if fetched < cutoff]
+        for key in stale:
+            self._fetch(key)
+
+    def start_refresher(self, interval=300):
+        """Refresh entries in a daemon thread every `interval` seconds."""
+        if self._refresher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_stale()
+                except Exception:
+                    # Keep serving the current URLs; the next tile_url() call refetches if needed
+                    pass
+
+        self._refresher = threading.Thread(target=loop, name="map-id-refresher", daemon=True)
+        self._refresher.start()
@@ -0,0 +1,516 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+RESPONSES = ("LAI", "aet", "aetgw", "gwsubs")
+TERMS = ("Intercept", "Px", "PETx", "P2x", "PET2x")
+WB_CUBIC_TERMS = ("Intercept", "wbx", "wb2x", "wb3x")
+WTD_VALUES = (1, 3, 6, 12)
+FREE_DRAIN_WTD = 12
+# Depth resolution (m) of the precomputed WTD interpolation table
+WTD_TABLE_STEP = 0.1
+RESULT_FIELDS = ("lai", "aet", "aetgw", "gwsubs", "gwsubs_ratio")
+
+# Target LAI by rooting depth (m): meadow, grassland, shrubland
+LAI_THRESHOLDS = {0.5: 1.5, 2.0: 2.0, 3.6: 1.0}
+# Target LAI values at which batch and raster outputs report exceedance curves
+LAI_THRESHOLD_GRID = tuple(round(0.25 * i, 2) for i in range(1, 17))
+
+
+def wtd_label(wtd):
+    """Display label for a water table depth; 12 m stands for free drainage."""
+    return "Free Drain" if wtd == FREE_DRAIN_WTD else f"{wtd:g} m"
+
+
+def lai_threshold(rootdepth):
+    """Target LAI for a rooting depth, vectorized over arrays of depths (NaN when unknown)."""
+    rootdepth = np.asarray(rootdepth, dtype=np.float64)
+    thresholds = np.full(rootdepth.shape, np.nan)
+    for depth, threshold in LAI_THRESHOLDS.items():
+        thresholds[rootdepth == depth] = threshold
+    return thresholds if thresholds.ndim else float(thresholds)
+
+
+def exceedance_column(threshold):
+    """Output column / band name of the % of years with LAI at or above `threshold`."""
+    return f"percover_lai{threshold:g}"
+
+
+def exceedance_percent(sorted_lai, thresholds):
+    """
+    Percent of years with LAI at or above each threshold.
+
+    Works on LAI already sorted along the last axis (NaN last, as np.sort
+    leaves it), so a query is a binary search instead of a pass over the
+    years. Every row is shifted into its own value range and all rows are
+    searched with a single np.searchsorted call.
+
+    Args:
+        sorted_lai (np.ndarray): LAI sorted ascending along the last axis, shaped (..., year)
+        thresholds (array-like): Target LAI values
+
+    Returns:
+        Array shaped (..., threshold); NaN for rows without valid years.
+    """
+    sorted_lai = np.asarray(sorted_lai, dtype=np.float64)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    n_years = sorted_lai.shape[-1]
+    rows = sorted_lai.reshape(-1, n_years)
+    missing = np.isnan(rows)
+    n_valid = n_years - missing.sum(axis=1)
+    if n_valid.sum() == 0:
+        return np.full(sorted_lai.shape[:-1] + thresholds.shape, np.nan)
+
+    low, high = rows[~missing].min(), rows[~missing].max()
+    offsets = np.arange(len(rows))[:, None] * (high - low + 2)
+    # NaN is parked above every threshold, so it never counts as below one
+    shifted = (np.where(missing, high + 1, rows) - low + offsets).ravel()
+    queries = np.clip(thresholds, low, high + 0.5) - low + offsets
+    below = np.searchsorted(shifted, queries.ravel(), side="left").reshape(queries.shape)
+    below -= np.arange(len(rows))[:, None] * n_years
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = (n_valid[:, None] - below) / n_valid[:, None] * 100
+    return percent.reshape(sorted_lai.shape[:-1] + thresholds.shape)
+
+
+def wtd_segments(wtds, wtd):
+    """
+    Bracketing modeled WTDs of arbitrary depths, free drain excluded.
+
+    Depths outside the modeled range are clipped to the shallowest or deepest one.
+
+    Returns:
+        (lower, upper, weight): positions of the bracketing depths along the
+        WTD axis and the linear weight of the deeper one.
+    """
+    modeled = np.array([i for i, depth in enumerate(wtds) if depth != FREE_DRAIN_WTD])
+    depths = np.array(wtds, dtype=np.float64)[modeled]
+    wtd = np.clip(np.asarray(wtd, dtype=np.float64), depths[0], depths[-1])
+    segment = np.clip(np.searchsorted(depths, wtd, side="right") - 1, 0, len(depths) - 2)
+    weight = (wtd - depths[segment]) / (depths[segment + 1] - depths[segment])
+    return modeled[segment], modeled[segment + 1], weight
+
+
+def interpolation_table(coefficients, wtds, step=WTD_TABLE_STEP):
+    """
+    Coefficients interpolated every `step` metres between the shallowest and deepest modeled WTD.
+
+    Returns:
+        (table, depths) with table shaped (soil, rootdepth, depth, response, term).
+    """
+    modeled = [depth for depth in wtds if depth != FREE_DRAIN_WTD]
+    depths = np.round(np.arange(modeled[0], modeled[-1] + step / 2, step), 6)
+    lower, upper, weight = wtd_segments(wtds, depths)
+    weight = weight[:, None, None]
+    table = (1 - weight) * coefficients[:, :, lower] + weight * coefficients[:, :, upper]
+    return table, depths
+
+
+def ppetquad_features(pr, eto):
+    """Model terms [1, P, PET/10, P^2, (PET/10)^2] stacked on a trailing axis."""
+    pr = np.asarray(pr, dtype=np.float64)
+    eto2 = np.asarray(eto, dtype=np.float64) / 10
+    return np.stack([np.ones_like(pr), pr, eto2, pr ** 2, eto2 ** 2], axis=-1)
+
+
+def wb_cubic_features(pr, eto):
+    """Model terms [1, WB, WB^2, WB^3] with WB = (P - PET) / 100, stacked on a trailing axis."""
+    wb = (np.asarray(pr, dtype=np.float64) - np.asarray(eto, dtype=np.float64)) / 100
+    return np.stack([np.ones_like(wb), wb, wb ** 2, wb ** 3], axis=-1)
+
+
+@dataclass(frozen=True)
+class Formulation:
+    """
+    A published set of model coefficients and how to evaluate it.
+
+    Args:
+        name (str): Registry key
+        version (str): Coefficient release the formulation was fitted for
+        filename (str): Bundled coefficient CSV
+        terms (tuple): Coefficient column suffixes, in the order produced by `features`
+        features (callable): (pr, eto) -> climate terms stacked on a trailing axis
+        gwsubs (str): "aet_difference" derives GW subsidy from AET relative to
+            free drain, "direct" uses the fitted gwsubs response
+        clamp (bool): Zero out negative LAI and sub-1 mm AET, AETgw and GW subsidy
+        description (str): Short human-readable label
+    """
+    name: str
+    version: str
+    filename: str
+    terms: tuple
+    features: object
+    gwsubs: str = "aet_difference"
+    clamp: bool = True
+    description: str = ""
+
+
+FORMULATIONS = {}
+
+
+def register_formulation(formulation):
+    """Add a formulation to the registry, replacing any with the same name."""
+    FORMULATIONS[formulation.name] = formulation
+    return formulation
+
+
+def get_formulation(name):
+    """Look up a registered formulation by name."""
+    try:
+        return FORMULATIONS[name]
+    except KeyError:
+        raise ValueError(f"unknown model formulation {name!r}; expected one of {sorted(FORMULATIONS)}") from None
+
+
+PPETQUAD = register_formulation(Formulation(
+    name="ppetquad",
+    version="2024-10-29",
+    filename="MixedEffectsModelCoefficients102924_ppetquad.csv",
+    terms=TERMS,
+    features=ppetquad_features,
+    description="Quadratic in P and PET/10, GW subsidy from AET differences"
+))
+
+WB_CUBIC = register_formulation(Formulation(
+    name="wb-cubic",
+    version="2024-10-29",
+    filename="MixedEffectsModelCoefficients102924_LAI_AET_AETG_GWsubs.csv",
+    terms=WB_CUBIC_TERMS,
+    features=wb_cubic_features,
+    gwsubs="direct",
+    clamp=False,
+    description="Cubic in water balance (P - PET)/100, fitted GW subsidy"
+))
+
+DEFAULT_FORMULATION = PPETQUAD.name
+
+
+def coefficient_tensor(dfcoeffs, responses=RESPONSES, terms=TERMS):
+    """
+    Pivot a long coefficient table into a dense tensor.
+
+    Returns:
+        (tensor, soils, root_depths, wtds) with tensor shaped
+        (soil, rootdepth, WTD, response, term) and sorted axis labels.
+    """
+    soils = sorted(dfcoeffs['soiltype'].unique())
+    root_depths = sorted(float(rd) for rd in dfcoeffs['rootdepth'].unique())
+    wtds = sorted(int(wtd) for wtd in dfcoeffs['WTD'].unique())
+    columns = [f"{response}{term}" for response in responses for term in terms]
+
+    tensor = np.full((len(soils), len(root_depths), len(wtds), len(responses), len(terms)), np.nan)
+    s = dfcoeffs['soiltype'].map({soil: i for i, soil in enumerate(soils)}).to_numpy()
+    r = dfcoeffs['rootdepth'].astype(float).map({rd: i for i, rd in enumerate(root_depths)}).to_numpy()
+    w = dfcoeffs['WTD'].astype(int).map({wtd: i for i, wtd in enumerate(wtds)}).to_numpy()
+    tensor[s, r, w] = dfcoeffs[columns].to_numpy(dtype=np.float64).reshape(-1, len(responses), len(terms))
+    return tensor, soils, root_depths, wtds
+
+
+@dataclass(frozen=True)
+class ModelResult:
+    """
+    Modeled annual responses, each shaped (..., WTD, year).
+
+    Leading axes follow the climate batch and then the coefficient selection,
+    e.g. (WTD, year) for one soil and rooting depth, or
+    (soil, rootdepth, WTD, year) for the full cube of one location.
+    """
+    lai: np.ndarray
+    aet: np.ndarray
+    aetgw: np.ndarray
+    gwsubs: np.ndarray
+    gwsubs_ratio: np.ndarray
+    wtds: tuple
+
+    def take(self, index):
+        """Index every response array with the same leading-axis index."""
+        return ModelResult(**{name: getattr(self, name)[index] for name in RESULT_FIELDS}, wtds=self.wtds)
+
+    def summary(self, laithresh):
+        """
+        Per-WTD statistics over the water years (the last axis).
+
+        Args:
+            laithresh (float or np.ndarray): Target LAI, broadcast against the
+                leading axes (e.g. one value per site)
+
+        Returns:
+            Dictionary of arrays shaped (..., WTD).
+        """
+        laithresh = np.asarray(laithresh, dtype=np.float64)
+        if laithresh.ndim:
+            laithresh = laithresh[..., None, None]
+        with np.errstate(invalid="ignore"):
+            over = (self.lai >= laithresh).mean(axis=-1) * 100
+        return {
+            "lai_median": np.median(self.lai, axis=-1),
+            "lai_p10": np.percentile(self.lai, 10, axis=-1),
+            "lai_p90": np.percentile(self.lai, 90, axis=-1),
+            "percoverthresh": over,
+            "aet_mean": self.aet.mean(axis=-1),
+            "aetgw_mean": self.aetgw.mean(axis=-1),
+            "gwsubs_mean": self.gwsubs.mean(axis=-1),
+            "gwsubs_ratio_mean": np.nanmean(np.where(np.isfinite(self.gwsubs_ratio), self.gwsubs_ratio, np.nan), axis=-1)
+        }
+
+    def exceedance(self, thresholds=LAI_THRESHOLD_GRID):
+        """% of years with LAI at or above each threshold, shaped (..., WTD, threshold)."""
+        return exceedance_percent(np.sort(self.lai, axis=-1), thresholds)
+
+    def to_frame(self, dfclimate):
+        """
+        Long DataFrame in the layout of the original dfsum (one row per WTD and water year).
+
+        Only valid for a single soil and rooting depth, i.e. responses shaped (WTD, year).
+        """
+        n_wtd, n_years = self.lai.shape
+        dfsum = dfclimate.iloc[np.tile(np.arange(n_years), n_wtd)].reset_index(drop=True)
+        dfsum['WTD'] = np.repeat(self.wtds, n_years)
+        dfsum['wtd2'] = np.repeat([wtd_label(wtd) for wtd in self.wtds], n_years)
+        dfsum['LAIcalc'] = self.lai.reshape(-1)
+        dfsum['aetcalc'] = self.aet.reshape(-1)
+        dfsum['aetgwcalc'] = self.aetgw.reshape(-1)
+        dfsum['gwsubscalc'] = self.gwsubs.reshape(-1)
+        dfsum['gwsubscalcratio'] = self.gwsubs_ratio.reshape(-1)
+        return dfsum
+
+
+class ModelEngine:
+    """
+    Vectorized evaluator for one mixed-effects model formulation.
+
+    Coefficients are held as one dense tensor indexed
+    [soil, rootdepth, WTD, response, term], so every response for every WTD
+    is evaluated with a single matrix product against the climate features.
+
+    Args:
+        coefficients (np.ndarray): Tensor shaped (soil, rootdepth, WTD, response, term)
+        soils (list): Soil type names along the first axis
+        root_depths (list): Rooting depths (m) along the second axis
+        wtds (list): Water table depths (m) along the third axis
+        version (str): Identifier of the coefficient release, e.g. its content hash
+        formulation (Formulation): Feature transform and post-processing rules
+        wtd_table (np.ndarray): Precomputed interpolation_table output shaped
+            (soil, rootdepth, depth, response, term), built here when None
+        table_depths (array-like): Water table depths (m) along the table's depth axis
+    """
+
+    def __init__(self, coefficients, soils, root_depths, wtds=WTD_VALUES, version=None, formulation=PPETQUAD,
+                 wtd_table=None, table_depths=None):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.version = version
+        self.formulation = formulation
+        self.name = formulation.name
+        self.soils = list(soils)
+        self.root_depths = [float(rd) for rd in root_depths]
+        self.wtds = tuple(wtds)
+        self.free_drain = self.wtds.index(FREE_DRAIN_WTD)
+        if wtd_table is None:
+            wtd_table, table_depths = interpolation_table(self.coefficients, self.wtds)
+        self.wtd_table = wtd_table
+        self.table_depths = np.asarray(table_depths, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, dfcoeffs, version=None, formulation=PPETQUAD):
+        """Build the engine from a coefficient table in the layout of `formulation`."""
+        tensor, soils, root_depths, wtds = coefficient_tensor(dfcoeffs, terms=formulation.terms)
+        return cls(tensor, soils, root_depths, wtds, version=version, formulation=formulation)
+
+    def select(self, soil=None, rootdepth=None):
+        """Coefficient tensor for one soil and/or rooting depth (all when None)."""
+        coefficients = self.coefficients
+        if rootdepth is not None:
+            coefficients = coefficients[:, self.root_depths.index(float(rootdepth))]
+        if soil is not None:
+            coefficients = coefficients[self.soils.index(soil)]
+        return coefficients
+
+    def evaluate_raw(self, features, coefficients):
+        """
+        Unclamped responses for a batch of climate features.
+
+        Args:
+            features (np.ndarray): Climate terms shaped (..., year, term)
+            coefficients (np.ndarray): Coefficients shaped (..., response, term)
+
+        Returns:
+            Array shaped (*climate_batch, *coefficient_batch, response, year).
+        """
+        raw = np.tensordot(features, coefficients, axes=([-1], [-1]))
+        return np.moveaxis(raw, features.ndim - 2, -1)
+
+    def evaluate(self, pr, eto, soil=None, rootdepth=None):
+        """
+        Evaluate LAI, AET, AETgw and GW subsidy for water-year climate.
+
+        Args:
+            pr (array-like): Annual precipitation (mm), shaped (..., year)
+            eto (array-like): Annual reference ET (mm), same shape as pr
+            soil (str): Soil type, or None for every soil
+            rootdepth (float): Rooting depth (m), or None for every depth
+
+        Returns:
+            ModelResult with responses shaped (..., WTD, year).
+        """
+        features = self.formulation.features(pr, eto)
+        raw = self.evaluate_raw(features, self.select(soil, rootdepth))
+        return self.postprocess(raw)
+
+    def soil_index(self, soils):
+        """Positions of soil type names along the soil axis; raises ValueError for unknown soils."""
+        names = np.array(self.soils)
+        soils = np.asarray(soils).astype(names.dtype)
+        index = np.minimum(np.searchsorted(names, soils), len(names) - 1)
+        unknown = names[index] != soils
+        if unknown.any():
+            raise ValueError(f"unknown soil types: {sorted(set(soils[unknown].tolist()))}")
+        return index
+
+    def rootdepth_index(self, rootdepths):
+        """Positions of rooting depths along the rootdepth axis; raises ValueError for unknown depths."""
+        depths = np.array(self.root_depths)
+        rootdepths = np.asarray(rootdepths, dtype=np.float64)
+        index = np.minimum(np.searchsorted(depths, rootdepths), len(depths) - 1)
+        unknown = depths[index] != rootdepths
+        if unknown.any():
+            raise ValueError(f"unknown rooting depths: {sorted(set(rootdepths[unknown].tolist()))}")
+        return index
+
+    def evaluate_sites(self, pr, eto, soils, rootdepths):
+        """
+        Evaluate a batch of sites, each with its own soil and rooting depth.
+
+        Args:
+            pr (array-like): Annual precipitation (mm), shaped (site, year)
+            eto (array-like): Annual reference ET (mm), same shape as pr
+            soils (array-like): Soil type name per site
+            rootdepths (array-like): Rooting depth (m) per site
+
+        Returns:
+            ModelResult with responses shaped (site, WTD, year).
+        """
+        coefficients = self.coefficients[self.soil_index(soils), self.rootdepth_index(rootdepths)]
+        features = self.formulation.features(pr, eto)
+        raw = np.einsum("syt,swrt->swry", features, coefficients)
+        return self.postprocess(raw)
+
+    def coefficients_at(self, wtd, soil_index, rootdepth_index):
+        """
+        Coefficients at arbitrary water table depths, linear between the modeled ones.
+
+        Free drain has no depth, so only the WTDs above it are interpolated and
+        depths outside their range are clipped to the shallowest or deepest one.
+
+        Args:
+            wtd (array-like): Water table depth (m)
+            soil_index (array-like): Positions along the soil axis (see soil_index)
+            rootdepth_index (array-like): Positions along the rootdepth axis
+
+        Returns:
+            Array shaped (*broadcast shape of the arguments, response, term).
+        """
+        lower, upper, weight = wtd_segments(self.wtds, wtd)
+        weight = weight[..., None, None]
+        return ((1 - weight) * self.coefficients[soil_index, rootdepth_index, lower]
+                + weight * self.coefficients[soil_index, rootdepth_index, upper])
+
+    def table_index(self, wtd):
+        """
+        Nearest rows of the interpolation table for water table depths (m).
+
+        Depths outside the modeled range are clipped to it; raises ValueError for missing depths.
+        """
+        wtd = np.asarray(wtd, dtype=np.float64)
+        if not np.isfinite(wtd).all():
+            raise ValueError("water table depths must be finite")
+        step = self.table_depths[1] - self.table_depths[0]
+        index = np.rint((wtd - self.table_depths[0]) / step).astype(int)
+        return np.clip(index, 0, len(self.table_depths) - 1)
+
+    def evaluate_depths(self, pr, eto, soil, rootdepth, depths):
+        """
+        Evaluate one soil and rooting depth at arbitrary water table depths.
+
+        Coefficients are gathered from the interpolation table, so depths are
+        snapped to its resolution; free drain is always appended as the last WTD.
+
+        Returns:
+            ModelResult with responses shaped (..., depth + free drain, year)
+            and wtds holding the snapped depths.
+        """
+        s = self.soils.index(soil)
+        r = self.root_depths.index(float(rootdepth))
+        index = self.table_index(depths)
+        coefficients = np.concatenate([self.wtd_table[s, r, index],
+                                       self.coefficients[s, r, self.free_drain:self.free_drain + 1]])
+        wtds = tuple(float(depth) for depth in self.table_depths[index]) + (FREE_DRAIN_WTD,)
+        raw = self.evaluate_raw(self.formulation.features(pr, eto), coefficients)
+        return self.postprocess(raw, wtds)
+
+    def evaluate_sites_at(self, pr, eto, soils, rootdepths, wtds):
+        """
+        Evaluate a batch of sites, each at its own water table depth (e.g. a measured well).
+
+        Returns:
+            ModelResult with responses shaped (site, 2, year): the site's
+            depth, snapped to the interpolation table, then free drain. Its
+            wtds are (None, free drain) as the first depth varies by site.
+        """
+        s = self.soil_index(soils)
+        r = self.rootdepth_index(rootdepths)
+        coefficients = np.stack([self.wtd_table[s, r, self.table_index(wtds)],
+                                 self.coefficients[s, r, self.free_drain]], axis=1)
+        features = self.formulation.features(pr, eto)
+        raw = np.einsum("syt,swrt->swry", features, coefficients)
+        return self.postprocess(raw, (None, FREE_DRAIN_WTD))
+
+    def evaluate_location(self, pr, eto):
+        """
+        Evaluate every soil x rooting depth x WTD combination for one location.
+
+        The result is shaped (soil, rootdepth, WTD, year) and is meant to be
+        computed once when data is fetched; use slice() to pick the
+        combination shown on screen.
+        """
+        return self.evaluate(pr, eto)
+
+    def slice(self, result, soil, rootdepth):
+        """Select one soil and rooting depth from a full-location result without recomputing."""
+        s = self.soils.index(soil)
+        r = self.root_depths.index(float(rootdepth))
+        return result.take((s, r))
+
+    def postprocess(self, raw, wtds=None):
+        """
+        Derive GW subsidy as the formulation declares and apply its clamping rules.
+
+        `wtds` labels the WTD axis of `raw` when it is not the engine's own.
+        """
+        wtds = self.wtds if wtds is None else tuple(wtds)
+        free_drain = wtds.index(FREE_DRAIN_WTD)
+        lai = raw[..., 0, :]
+        aet = raw[..., 1, :]
+        aetgw = raw[..., 2, :]
+
+        if self.formulation.gwsubs == "aet_difference":
+            # GW subsidy is the AET gained relative to the free-drain case
+            aet_free_drain = aet[..., free_drain:free_drain + 1, :]
+            gwsubs = aet - aet_free_drain
+        else:
+            # Fitted directly; the free-drain rows have no coefficients as there is no subsidy
+            gwsubs = raw[..., 3, :].copy()
+            gwsubs[..., free_drain, :] = 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gwsubs_ratio = gwsubs / aet
+
+        if not self.formulation.clamp:
+            return ModelResult(lai=lai, aet=aet, aetgw=aetgw, gwsubs=gwsubs, gwsubs_ratio=gwsubs_ratio, wtds=wtds)
+
+        # Remove remnant error in calcs
+        aetgw = np.where(aetgw < 1, 0, aetgw)
+        lai = np.where(lai < 0, 0, lai)
+        aet = np.where(aet < 1, 0, aet)
+        gwsubs = np.where(gwsubs < 1, 0, gwsubs)
+        gwsubs = np.where(gwsubs_ratio > 1, aet, gwsubs)
+
+        return ModelResult(lai=lai, aet=aet, aetgw=aetgw, gwsubs=gwsubs, gwsubs_ratio=gwsubs_ratio, wtds=wtds)
@@ -0,0 +1,343 @@
+"""
+Statewide model rasters: LAI, AET and GW subsidy for every GRIDMET cell in Nevada.
+
+Evaluates the model over the bundled climate cube for one soil (or the soil
+read from the texture raster at each cell center) and one rooting depth,
+and writes Cloud-Optimized GeoTIFFs per water table depth:
+
+    <soil>_<rd>m_wtd<WTD>_lai.tif       one band per water year
+    <soil>_<rd>m_wtd<WTD>_aet.tif
+    <soil>_<rd>m_wtd<WTD>_gwsubs.tif
+    <soil>_<rd>m_wtd<WTD>_summary.tif   median LAI, % years over laithresh,
+                                         mean GW subsidy, mean AET
+    <soil>_<rd>m_wtd<WTD>_exceedance.tif  % years over each LAI target in
+                                         LAI_THRESHOLD_GRID, one band each
+
+The cube is read in row blocks by a pool of worker processes, and each
+finished block is written straight into its window of the output rasters
+(staged as striped GeoTIFFs, then copied to COGs), so memory stays bounded by
+the number of blocks in flight. Summary rasters in the default output
+directory are offered as map layers by the explorer.
+
+    python model_rasters.py --soil loam --rootdepth 2
+    python model_rasters.py --soil raster --rootdepth 3.6 --wtd 1 --wtd 3
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+
+import numpy as np
+
+from climate_cube import DEFAULT_CUBE_DIR, ClimateCube
+from coefficients import load_engine
+from model_engine import (DEFAULT_FORMULATION, FORMULATIONS, LAI_THRESHOLD_GRID, exceedance_column, lai_threshold,
+                          wtd_label)
+from point_data import SOIL_TEXTURES
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RASTER_DIR = os.environ.get("WATERSMART_MODEL_RASTERS", os.path.join(APP_DIR, "model_rasters"))
+SOIL_FROM_RASTER = "raster"
+
+ANNUAL_VARIABLES = ("lai", "aet", "gwsubs")
+SUMMARY_BANDS = ("lai_median", "percoverthresh", "gwsubs_mean", "aet_mean")
+
+# Summary bands offered as map layers, with their legend label and colour ramp
+SUMMARY_LAYERS = {
+    "lai_median": ("Modeled median LAI", {
+        'min': 0, 'max': 3,
+        'palette': ['#ffffe5', '#d9f0a3', '#78c679', '#238443', '#004529']
+    }),
+    "percoverthresh": ("Modeled % of years over LAI target", {
+        'min': 0, 'max': 100,
+        'palette': ['#f7fcf5', '#c7e9c0', '#74c476', '#238b45', '#00441b']
+    }),
+    "gwsubs_mean": ("Modeled mean GW subsidy (mm)", {
+        'min': 0, 'max': 600,
+        'palette': ['#f7fbff', '#c6dbef', '#6baed6', '#2171b5', '#08306b']
+    }),
+}
+
+_cubes = {}
+
+
+def raster_stem(soil, rootdepth, wtd):
+    return f"{soil}_{rootdepth:g}m_wtd{wtd}"
+
+
+def cell_soils(cube, soil_raster, block_rows=16):
+    """Soil type name at every cube cell center from the texture raster (None where unmodeled)."""
+    rows, cols = cube.shape
+    soils = np.empty((rows, cols), dtype=object)
+    col_index = np.arange(cols)
+    for row0 in range(0, rows, block_rows):
+        rr, cc = np.meshgrid(np.arange(row0, min(row0 + block_rows, rows)), col_index, indexing="ij")
+        lats, lons = cube.grid.center(rr.ravel(), cc.ravel())
+        codes, _ = soil_raster.sample_many(lats, lons)
+        soils[rr, cc] = np.array([SOIL_TEXTURES.get(int(code)) for code in codes], dtype=object).reshape(rr.shape)
+    return soils
+
+
+def evaluate_block(engine, block, soils, rootdepth, wtd_index):
+    """
+    Evaluate one row block of the climate cube.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        block (np.ndarray): Climate shaped (rows, cols, 2, year)
+        soils (np.ndarray): Soil type name per cell, shaped (rows, cols)
+        rootdepth (float): Rooting depth (m)
+        wtd_index (list): Positions of the requested WTDs in engine.wtds
+
+    Returns:
+        (annual, summary, exceedance): float32 arrays shaped (rows, cols, WTD,
+        variable, year), (rows, cols, WTD, band) and (rows, cols, WTD,
+        threshold), NaN where there is no climate or soil.
+    """
+    rows, cols, _, n_years = block.shape
+    n_wtd = len(wtd_index)
+    annual = np.full((rows, cols, n_wtd, len(ANNUAL_VARIABLES), n_years), np.nan, dtype=np.float32)
+    summary = np.full((rows, cols, n_wtd, len(SUMMARY_BANDS)), np.nan, dtype=np.float32)
+    exceedance = np.full((rows, cols, n_wtd, len(LAI_THRESHOLD_GRID)), np.nan, dtype=np.float32)
+
+    valid = ~np.isnan(block).any(axis=(2, 3)) & np.isin(soils, engine.soils)
+    if not valid.any():
+        return annual, summary, exceedance
+    climate = np.asarray(block[valid], dtype=np.float64)
+    result = engine.evaluate_sites(climate[:, 0], climate[:, 1], soils[valid], np.full(len(climate), rootdepth))
+    result = result.take((slice(None), wtd_index))
+
+    annual[valid] = np.stack([getattr(result, name) for name in ANNUAL_VARIABLES], axis=-2)
+    stats = result.summary(lai_threshold(rootdepth))
+    summary[valid] = np.stack([stats[name] for name in SUMMARY_BANDS], axis=-1)
+    exceedance[valid] = result.exceedance(LAI_THRESHOLD_GRID)
+    return annual, summary, exceedance
+
+
+def score_rows(cube_dir, formulation, row0, block_rows, soils, rootdepth, wtd_index):
+    """Worker entry point: evaluate rows [row0, row0 + block_rows) of the cube."""
+    cube = _cubes.get(cube_dir)
+    if cube is None:
+        cube = _cubes[cube_dir] = ClimateCube.open(cube_dir)
+    block = cube.data[row0:row0 + block_rows]
+    return (row0,) + evaluate_block(load_engine(formulation), block, soils, rootdepth, wtd_index)
+
+
+def open_staging(path, cube, band_names, tags):
+    """Open a float32 GeoTIFF on the cube grid, one band per name, for writing in row windows before to_cog."""
+    import rasterio
+    from rasterio.transform import from_origin
+
+    rows, cols = cube.shape
+    profile = {
+        "driver": "GTiff", "dtype": "float32", "nodata": np.nan, "count": len(band_names),
+        "height": rows, "width": cols, "crs": "EPSG:4326", "interleave": "band",
+        "transform": from_origin(cube.grid.west, cube.grid.north, cube.grid.res, cube.grid.res)
+    }
+    dst = rasterio.open(path, "w", **profile)
+    dst.update_tags(**tags)
+    for band, name in enumerate(band_names, start=1):
+        dst.set_band_description(band, str(name))
+    return dst
+
+
+def to_cog(staging, path):
+    """Copy a closed staging GeoTIFF to a COG at `path`."""
+    import rasterio
+    from rasterio.shutil import copy as rio_copy
+
+    with rasterio.open(staging) as src:
+        rio_copy(src, path, driver="COG", blocksize=256, compress="DEFLATE", predictor=3,
+                 overview_resampling="average")
+
+
+def write_cog(path, data, cube, band_names, tags):
+    """Write a (band, rows, cols) float32 array as a COG on the cube grid."""
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = os.path.join(tmp, "staging.tif")
+        with open_staging(staging, cube, band_names, tags) as dst:
+            dst.write(data)
+        to_cog(staging, path)
+
+
+def build_rasters(soil, rootdepth, wtds=None, output_dir=DEFAULT_RASTER_DIR, formulation=DEFAULT_FORMULATION,
+                  cube_dir=DEFAULT_CUBE_DIR, block_rows=16, workers=None):
+    """
+    Evaluate the model for every cube cell and write the annual and summary COGs.
+
+    Args:
+        soil (str): Soil type name, or "raster" to read it from the texture raster
+        rootdepth (float): Rooting depth (m)
+        wtds (list): Water table depths to write, or None for all of them
+        output_dir (str): Directory for the GeoTIFFs
+        formulation (str): Registered model formulation
+        cube_dir (str): Climate cube directory
+        block_rows (int): Cube rows evaluated per task
+        workers (int): Worker processes (default: CPU count)
+
+    Returns:
+        List of written paths.
+    """
+    engine = load_engine(formulation)
+    cube = ClimateCube.open(cube_dir)
+    rows, cols = cube.shape
+    years = [int(year) for year in cube.years]
+    wtds = list(wtds or engine.wtds)
+    wtd_index = [engine.wtds.index(wtd) for wtd in wtds]
+    rootdepth = engine.root_depths[engine.rootdepth_index([rootdepth])[0]]
+
+    if soil == SOIL_FROM_RASTER:
+        from soil_raster import SoilRaster
+        soil_raster = SoilRaster.open_default()
+        if soil_raster is None:
+            raise SystemExit("--soil raster needs the bundled soil texture raster (see build_soil_raster.py)")
+        soils = cell_soils(cube, soil_raster, block_rows)
+    else:
+        engine.soil_index([soil])
+        soils = np.full((rows, cols), soil, dtype=object)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Output path, band names and tags per (WTD position, variable)
+    outputs = {}
+    for i, wtd in enumerate(wtds):
+        stem = raster_stem(soil, rootdepth, wtd)
+        tags = {"soil": soil, "rootdepth": rootdepth, "wtd": wtd, "formulation": formulation,
+                "coefficients": engine.version, "laithresh": lai_threshold(rootdepth)}
+        for variable in ANNUAL_VARIABLES:
+            outputs[i, variable] = (os.path.join(output_dir, f"{stem}_{variable}.tif"), years,
+                                    {**tags, "variable": variable})
+        outputs[i, "summary"] = (os.path.join(output_dir, f"{stem}_summary.tif"), SUMMARY_BANDS,
+                                 {**tags, "variable": "summary"})
+        outputs[i, "exceedance"] = (os.path.join(output_dir, f"{stem}_exceedance.tif"),
+                                    [exceedance_column(t) for t in LAI_THRESHOLD_GRID],
+                                    {**tags, "variable": "exceedance"})
+
+    from rasterio.windows import Window
+
+    n_cells = 0
+    start = time.perf_counter()
+    workers = max(workers or os.cpu_count() or 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = {key: os.path.join(tmp, f"{key[0]}_{key[1]}.tif") for key in outputs}
+        with ExitStack() as stack, ProcessPoolExecutor(max_workers=workers) as pool:
+            datasets = {key: stack.enter_context(open_staging(staging[key], cube, names, tags))
+                        for key, (_, names, tags) in outputs.items()}
+            in_flight = set()
+
+            def collect(done):
+                nonlocal n_cells
+                for future in done:
+                    row0, block_annual, block_summary, block_exceedance = future.result()
+                    window = Window(0, row0, cols, block_annual.shape[0])
+                    for i in range(len(wtds)):
+                        for j, variable in enumerate(ANNUAL_VARIABLES):
+                            datasets[i, variable].write(np.moveaxis(block_annual[:, :, i, j], -1, 0), window=window)
+                        datasets[i, "summary"].write(np.moveaxis(block_summary[:, :, i], -1, 0), window=window)
+                        datasets[i, "exceedance"].write(np.moveaxis(block_exceedance[:, :, i], -1, 0), window=window)
+                    n_cells += int((~np.isnan(block_summary[:, :, 0, 0])).sum())
+
+            for row0 in range(0, rows, block_rows):
+                in_flight.add(pool.submit(score_rows, cube_dir, formulation, row0, block_rows,
+                                          soils[row0:row0 + block_rows], rootdepth, wtd_index))
+                if len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(in_flight)
+        elapsed = time.perf_counter() - start
+
+        paths = []
+        for key, (path, _, _) in outputs.items():
+            to_cog(staging[key], path)
+            paths.append(path)
+
+    print(f"{n_cells} cells x {len(wtds)} WTDs x {len(years)} years in {elapsed:.2f} s "
+          f"with {workers} workers", file=sys.stderr)
+    return paths
+
+
+def model_layers(directory=DEFAULT_RASTER_DIR):
+    """
+    Summary rasters in `directory` offered as map layers.
+
+    Returns:
+        Dictionary of layer label -> (path, band, vis params), empty when no
+        rasters have been built.
+    """
+    if not os.path.isdir(directory):
+        return {}
+    import rasterio
+
+    layers = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith("_summary.tif"):
+            continue
+        path = os.path.join(directory, name)
+        with rasterio.open(path) as src:
+            tags = src.tags()
+        setting = f"{tags['soil']}, {float(tags['rootdepth']):g} m roots, {wtd_label(int(tags['wtd']))}"
+        for band, key in enumerate(SUMMARY_BANDS, start=1):
+            if key in SUMMARY_LAYERS:
+                label, vis = SUMMARY_LAYERS[key]
+                layers[f"{label} ({setting})"] = (path, band, vis)
+    return layers
+
+
+def render_overlay(path, band, vis):
+    """
+    Colour one band of a model raster for a folium ImageOverlay.
+
+    Rows are resampled to even Web Mercator spacing so the 4 km cells line up
+    with the basemap. Returns (PNG data URL, [[south, west], [north, east]]).
+    """
+    import rasterio
+    from matplotlib.colors import LinearSegmentedColormap
+    from PIL import Image
+
+    with rasterio.open(path) as src:
+        values = src.read(band)
+        west, south, east, north = src.bounds
+
+    def mercator_y(lat):
+        return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+    y = np.linspace(mercator_y(north), mercator_y(south), values.shape[0])
+    lats = np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+    source_rows = np.clip(((north - lats) / (north - south) * values.shape[0]).astype(int), 0, values.shape[0] - 1)
+    values = values[source_rows]
+
+    cmap = LinearSegmentedColormap.from_list("model", vis['palette'])
+    scaled = np.clip((values - vis['min']) / (vis['max'] - vis['min']), 0, 1)
+    rgba = cmap(np.nan_to_num(scaled), bytes=True)
+    rgba[np.isnan(values), 3] = 0
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, mode="RGBA").save(buffer, format="PNG")
+    url = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    return url, [[south, west], [north, east]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--soil", required=True, help=f"soil type name, or '{SOIL_FROM_RASTER}' for the texture raster")
+    parser.add_argument("--rootdepth", type=float, required=True)
+    parser.add_argument("--wtd", type=int, action="append", help="water table depth (repeatable; default all)")
+    parser.add_argument("--model", default=DEFAULT_FORMULATION, choices=sorted(FORMULATIONS))
+    parser.add_argument("--cube", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--output", default=DEFAULT_RASTER_DIR)
+    parser.add_argument("--block-rows", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = build_rasters(args.soil, args.rootdepth, args.wtd, args.output, args.model, args.cube,
+                          args.block_rows, args.workers)
+    print(json.dumps(paths, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+"""
+Native matplotlib renderer for the results charts.
+
+Draws the charts of result_figures directly with matplotlib artists,
+without plotnine's layout and theming pass. Each chart kind has a pool of
+templates (a figure with its axes, artists, titles and legends, built
+once), and rendering a chart checks one out, only moves the new data into
+its artists (set_data, set_offsets, set_height, ...), rescales the axes
+and returns it to the pool. Streamlit runs every rerun on a new thread, so
+the pool is shared by all threads rather than kept per thread. The charts
+follow theme_bw and the plotnine scales closely enough to be used in their
+place; benchmarks/bench_native_figures.py compares the two renderers.
+"""
+import io
+import threading
+
+import numpy as np
+from matplotlib import cbook
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import AutoMinorLocator, FixedLocator, MaxNLocator, NullLocator
+
+from result_figures import LINETYPES, build_lai_plots, build_plots, uncertainty_frames
+from result_summaries import first_by_group, group_labels, percent_over
+
+DEFAULT_SIZE = (6.4, 4.8)
+# theme_bw
+BASE_SIZE = 11
+BORDER_COLOR = "#7F7F7F"
+MAJOR_GRID_COLOR = "#E5E5E5"
+MINOR_GRID_COLOR = "#FAFAFA"
+TICK_COLOR = "#333333"
+TICK_TEXT_COLOR = "#4D4D4D"
+# plotnine sizes in points (size * sqrt(pi)) and point areas
+LINE_WIDTH = 0.5 * np.sqrt(np.pi)
+POINT_AREA = (1.5 + 0.5) ** 2 * np.pi
+COLORMAP = "YlGnBu"
+BAR_WIDTH = 0.9
+BOX_WIDTH = 0.75
+ERRORBAR_WIDTH = 0.3
+# Scale expansion: 5 % of the range for continuous axes, 0.6 units for discrete ones
+EXPAND = 0.05
+DISCRETE_EXPAND = 0.6
+# Layout (inches)
+MARGIN_LEFT = 0.85
+MARGIN_BOTTOM = 0.6
+MARGIN_RIGHT = 0.15
+LEGEND_WIDTH = 1.3
+TITLE_LINE = 0.23
+SUBTITLE_LINE = 0.2
+LEGEND_LINE = 0.19
+COLORBAR_HEIGHT = 1.3
+
+# Renderer the app uses unless WATERSMART_FIGURE_RENDERER names another key of RENDERERS
+DEFAULT_RENDERER = "native"
+
+# Idle templates by (kind, shape); the pool grows to the number of charts rendered at the same time
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def expanded(lo, hi, expand=EXPAND):
+    """Axis limits of the data range [lo, hi] with plotnine's continuous expansion."""
+    pad = (hi - lo) * expand if hi > lo else max(abs(lo) * expand, 0.5)
+    return lo - pad, hi + pad
+
+
+def style_axes(ax):
+    """theme_bw on bare axes: white panel, grey border, light major and minor grid."""
+    ax.set_facecolor("white")
+    for spine in ax.spines.values():
+        spine.set_color(BORDER_COLOR)
+        spine.set_linewidth(LINE_WIDTH)
+    ax.set_axisbelow(True)
+    ax.grid(True, which="major", color=MAJOR_GRID_COLOR, linewidth=LINE_WIDTH)
+    ax.grid(True, which="minor", color=MINOR_GRID_COLOR, linewidth=LINE_WIDTH / 2)
+    ax.tick_params(which="major", length=BASE_SIZE / 4, width=LINE_WIDTH, color=TICK_COLOR,
+                   labelsize=0.8 * BASE_SIZE, labelcolor=TICK_TEXT_COLOR)
+    ax.tick_params(which="minor", length=0)
+    # About as many breaks as mizani's extended breaks, with minor grid lines halfway between
+    for axis in (ax.xaxis, ax.yaxis):
+        axis.set_major_locator(MaxNLocator(nbins=5, steps=[1, 2, 5, 10]))
+        axis.set_minor_locator(AutoMinorLocator(2))
+    ax.xaxis.label.set_size(BASE_SIZE)
+    ax.yaxis.label.set_size(BASE_SIZE)
+
+
+class NativePlot:
+    """
+    One chart ready to draw: its template kind and the data and labels to put in it.
+
+    Args:
+        kind (str): Template kind, a key of TEMPLATES
+        shape (int): Size of the template (groups or years); templates are
+            reused between charts of the same kind and shape
+        **spec: Keyword arguments of the template's update method
+    """
+
+    def __init__(self, kind, shape, **spec):
+        self.kind = kind
+        self.shape = shape
+        self.spec = spec
+
+    def checkout(self):
+        """An idle template of the chart's kind and shape, built if there is none."""
+        with _templates_lock:
+            idle = _templates.get((self.kind, self.shape))
+            if idle:
+                return idle.pop()
+        return TEMPLATES[self.kind](self.shape)
+
+    def draw(self, size=DEFAULT_SIZE):
+        """The chart as a matplotlib figure, on a template that the caller keeps."""
+        template = self.checkout()
+        template.update(size=size, **self.spec)
+        return template.figure
+
+    def png(self, size=None, dpi=100):
+        """Draw the chart, at `size` inches or the default size, and return it as PNG bytes."""
+        return self.save(size, dpi, "png")
+
+    def svg(self, size=None, dpi=100):
+        """Draw the chart as SVG bytes; `dpi` only sets the resolution of the colour bar image."""
+        return self.save(size, dpi, "svg")
+
+    def save(self, size, dpi, format):
+        template = self.checkout()
+        template.update(size=size or DEFAULT_SIZE, **self.spec)
+        buffer = io.BytesIO()
+        template.figure.savefig(buffer, format=format, dpi=dpi, facecolor="white")
+        # Only returned to the pool once it rendered; a template that failed half-filled is dropped
+        with _templates_lock:
+            _templates.setdefault((self.kind, self.shape), []).append(template)
+        return buffer.getvalue()
+
+
+class ChartTemplate:
+    """
+    Figure, axes, titles and colour-mapped points shared by every chart kind.
+
+    Subclasses add their artists in __init__ and fill them in update.
+    """
+    legend = True
+
+    def __init__(self):
+        self.figure = Figure(figsize=DEFAULT_SIZE, facecolor="white")
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_axes((0, 0, 1, 1))
+        style_axes(self.ax)
+        self.title = self.figure.text(0, 1, "", size=1.2 * BASE_SIZE, ha="left", va="top")
+        self.subtitle = self.figure.text(0, 1, "", size=BASE_SIZE, ha="left", va="top")
+        self.points = self.ax.scatter(np.empty(0), np.empty(0), c=np.empty(0), cmap=COLORMAP, s=POINT_AREA,
+                                      linewidths=LINE_WIDTH, edgecolors="face", zorder=4)
+        self.points.set_clim(0, 1)
+        self.colorbar = None
+        if self.legend:
+            self.colorbar = self.figure.colorbar(self.points, cax=self.figure.add_axes((0, 0, 1, 1)))
+            self.colorbar.outline.set_visible(False)
+            self.colorbar.ax.tick_params(length=0, labelsize=0.8 * BASE_SIZE)
+            self.colorbar_title = self.colorbar.ax.set_title("", size=BASE_SIZE, loc="center", pad=6)
+
+    def layout(self, size, title, subtitle, xlabel, ylabel):
+        """Resize the figure and place the panel below the titles; returns the panel box in inches."""
+        width, height = size
+        self.figure.set_size_inches(width, height)
+        title_height = TITLE_LINE * (title.count("\n") + 1) + (SUBTITLE_LINE if subtitle else 0)
+        top = 0.12 + title_height + 0.1
+        right = MARGIN_RIGHT + (LEGEND_WIDTH if self.legend else 0)
+        panel = (MARGIN_LEFT, MARGIN_BOTTOM, width - MARGIN_LEFT - right, height - MARGIN_BOTTOM - top)
+        self.ax.set_position((panel[0] / width, panel[1] / height, panel[2] / width, panel[3] / height))
+        self.title.set_text(title)
+        self.title.set_position((MARGIN_LEFT / width, 1 - 0.12 / height))
+        self.subtitle.set_text(subtitle)
+        self.subtitle.set_position((MARGIN_LEFT / width, 1 - (0.12 + title_height - SUBTITLE_LINE) / height))
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        # Shrink long axis titles to the figure height instead of cutting them off (about 0.55 em per character)
+        self.ax.yaxis.label.set_size(min(BASE_SIZE, (height - 0.2) * 72 / (0.55 * max(len(ylabel), 1))))
+        return panel
+
+    def place_colorbar(self, panel, size, title, below=0.0):
+        """
+        Colour bar right of the panel, centred together with `below` inches of further legend.
+
+        Returns the top of the space left below the colour bar, in inches.
+        """
+        width, height = size
+        title_height = LEGEND_LINE * (title.count("\n") + 1) + 0.1
+        bar = float(np.clip(panel[3] - title_height - below, 0.5, COLORBAR_HEIGHT))
+        block = title_height + bar + below
+        top = panel[1] + (panel[3] + block) / 2 - title_height
+        left = panel[0] + panel[2] + 0.25
+        self.colorbar.ax.set_position((left / width, (top - bar) / height, 0.2 / width, bar / height))
+        self.colorbar_title.set_text(title)
+        return top - bar
+
+    def set_points(self, x, y, color):
+        """Move the colour-mapped points and rescale their colours to the new values."""
+        self.points.set_offsets(np.column_stack([x, y]))
+        self.points.set_array(np.asarray(color, dtype=np.float64))
+        finite = np.asarray(color, dtype=np.float64)[np.isfinite(color)]
+        if len(finite):
+            self.points.set_clim(finite.min(), finite.max())
+
+
+class BalanceTemplate(ChartTemplate):
+    """Precipitation and negative ETo bars with the water balance line and points, one bar pair per year."""
+
+    def __init__(self, n_years):
+        super().__init__()
+        x = np.arange(n_years, dtype=np.float64)
+        self.pr_bars = self.ax.bar(x, np.zeros(n_years), BAR_WIDTH, color="blue", alpha=0.5, zorder=2).patches
+        self.eto_bars = self.ax.bar(x, np.zeros(n_years), BAR_WIDTH, color="brown", alpha=0.5, zorder=2).patches
+        self.line = self.ax.add_line(Line2D([], [], color="white", linewidth=LINE_WIDTH, zorder=3))
+        self.eto_label = self.ax.text(0, 0, "Potential ET", color="brown", size=BASE_SIZE, ha="left", va="top")
+        self.pr_label = self.ax.text(0, 0, "Precipitation", color="blue", size=BASE_SIZE, ha="left", va="center")
+
+    def update(self, size, years, pr, eto, wb, label_x, mineto, maxp, title, xlabel, ylabel, legend_title):
+        panel = self.layout(size, title, "", xlabel, ylabel)
+        self.place_colorbar(panel, size, legend_title)
+        for bar, year, value in zip(self.pr_bars, years, pr):
+            bar.set_x(year - BAR_WIDTH / 2)
+            bar.set_height(value)
+        for bar, year, value in zip(self.eto_bars, years, eto):
+            bar.set_x(year - BAR_WIDTH / 2)
+            bar.set_height(-value)
+        self.line.set_data(years, wb)
+        self.set_points(years, wb, wb)
+        self.eto_label.set_position((label_x, mineto))
+        self.pr_label.set_position((label_x, maxp))
+
+        self.ax.set_xlim(expanded(min(label_x, years.min() - BAR_WIDTH / 2), years.max() + BAR_WIDTH / 2))
+        self.ax.set_ylim(expanded(min(mineto, -np.nanmax(eto), np.nanmin(wb), 0),
+                                  max(maxp, np.nanmax(pr), np.nanmax(wb), 0)))
+
+
+class SeriesTemplate(ChartTemplate):
+    """One line per WTD in its own line type, colour-mapped points, optional bands and target line."""
+
+    def __init__(self, n_groups):
+        super().__init__()
+        styles = [LINETYPES[i % len(LINETYPES)] for i in range(n_groups)]
+        self.lines = [self.ax.add_line(Line2D([], [], color="black", linestyle=style, linewidth=LINE_WIDTH, zorder=3))
+                      for style in styles]
+        self.bands = self.ax.add_collection(PolyCollection([], facecolor="grey", alpha=0.3, linewidth=0, zorder=2))
+        self.hline = self.ax.axhline(0, color="black", alpha=0.5, linewidth=LINE_WIDTH, zorder=3)
+        handles = [Line2D([], [], color="black", linestyle=style, linewidth=LINE_WIDTH) for style in styles]
+        self.linetype_legend = self.ax.legend(
+            handles, [""] * n_groups, title=" ", loc="upper left", frameon=False, fontsize=0.8 * BASE_SIZE,
+            title_fontsize=BASE_SIZE, alignment="left", handlelength=2.5
+        )
+
+    def update(self, size, series, x, y, wb, bands, hline, title, subtitle, xlabel, ylabel, legend_title,
+               linetype_title):
+        panel = self.layout(size, title, subtitle, xlabel, ylabel)
+        below = 0.25 + LEGEND_LINE * (linetype_title.count("\n") + 1 + len(series))
+        legend_top = self.place_colorbar(panel, size, legend_title, below)
+        self.linetype_legend.set_bbox_to_anchor((panel[0] + panel[2] + 0.1, legend_top - 0.1),
+                                                transform=self.figure.dpi_scale_trans)
+        self.linetype_legend.set_title(linetype_title)
+        for line, text, (label, years, values) in zip(self.lines, self.linetype_legend.get_texts(), series):
+            line.set_data(years, values)
+            text.set_text(label)
+        self.set_points(x, y, wb)
+
+        lo, hi = np.nanmin(y), np.nanmax(y)
+        if bands is None:
+            self.bands.set_verts([])
+        else:
+            self.bands.set_verts([np.concatenate([np.column_stack([years, band_lo]),
+                                                  np.column_stack([years[::-1], band_hi[::-1]])])
+                                  for years, band_lo, band_hi in bands])
+            lo = min(lo, min(np.nanmin(band_lo) for _, band_lo, _ in bands))
+            hi = max(hi, max(np.nanmax(band_hi) for _, _, band_hi in bands))
+        self.hline.set_visible(hline is not None)
+        if hline is not None:
+            self.hline.set_ydata([hline, hline])
+            lo, hi = min(lo, hline), max(hi, hline)
+
+        self.ax.set_xlim(expanded(np.nanmin(x), np.nanmax(x)))
+        self.ax.set_ylim(expanded(lo, hi))
+
+
+class BoxTemplate(ChartTemplate):
+    """Boxplot per WTD with the years as colour-mapped points, range labels and optional median intervals."""
+    legend = False
+
+    def __init__(self, n_groups):
+        super().__init__()
+        line = {"color": TICK_COLOR, "linewidth": LINE_WIDTH, "zorder": 2}
+        self.boxes = [self.ax.add_patch(Rectangle((0, 0), 0, 0, facecolor="white", edgecolor=TICK_COLOR,
+                                                  linewidth=LINE_WIDTH, zorder=2)) for _ in range(n_groups)]
+        self.medians = [self.ax.add_line(Line2D([], [], **{**line, "linewidth": 2 * LINE_WIDTH}))
+                        for _ in range(n_groups)]
+        self.whiskers = [self.ax.add_line(Line2D([], [], **line)) for _ in range(n_groups)]
+        self.outliers = self.ax.scatter(np.empty(0), np.empty(0), color="black", s=POINT_AREA, linewidths=0, zorder=3)
+        self.intervals = self.ax.add_collection(LineCollection([], colors="red", linewidths=LINE_WIDTH, zorder=5))
+        self.labels = [self.ax.text(i + 1, 0, "", size=BASE_SIZE, ha="center", va="center", zorder=5)
+                       for i in range(n_groups)]
+        self.hline = self.ax.axhline(0, color="black", alpha=0.5, linewidth=LINE_WIDTH, zorder=3)
+        self.ax.xaxis.set_major_locator(FixedLocator(np.arange(1, n_groups + 1)))
+        self.ax.xaxis.set_minor_locator(NullLocator())
+        self.ax.set_xlim(1 - DISCRETE_EXPAND, n_groups + DISCRETE_EXPAND)
+
+    def update(self, size, groups, values, wb, intervals, range_labels, ylim, hline, title, subtitle, xlabel,
+               ylabel):
+        self.layout(size, title, subtitle, xlabel, ylabel)
+        self.ax.set_xticklabels(groups)
+        outliers = []
+        for i, (box, median, whisker, group_values) in enumerate(zip(self.boxes, self.medians, self.whiskers,
+                                                                       values)):
+            x = i + 1
+            finite = group_values[np.isfinite(group_values)]
+            if not len(finite):
+                box.set_visible(False)
+                median.set_data([], [])
+                whisker.set_data([], [])
+                continue
+            stats = cbook.boxplot_stats(finite, whis=1.5)[0]
+            box.set_visible(True)
+            box.set_bounds(x - BOX_WIDTH / 2, stats["q1"], BOX_WIDTH, stats["q3"] - stats["q1"])
+            median.set_data([x - BOX_WIDTH / 2, x + BOX_WIDTH / 2], [stats["med"], stats["med"]])
+            whisker.set_data([x, x, np.nan, x, x], [stats["whislo"], stats["q1"], np.nan, stats["q3"], stats["whishi"]])
+            outliers.extend((x, value) for value in stats["fliers"])
+        self.outliers.set_offsets(np.asarray(outliers, dtype=np.float64).reshape(-1, 2))
+        self.set_points(np.repeat(np.arange(1, len(values) + 1), [len(v) for v in values]), np.concatenate(values), wb)
+
+        if intervals is None:
+            self.intervals.set_segments([])
+        else:
+            segments = []
+            for i, interval in enumerate(intervals):
+                if interval is None:
+                    continue
+                x, (lo, hi) = i + 1, interval
+                segments += [[(x, lo), (x, hi)],
+                             [(x - ERRORBAR_WIDTH / 2, lo), (x + ERRORBAR_WIDTH / 2, lo)],
+                             [(x - ERRORBAR_WIDTH / 2, hi), (x + ERRORBAR_WIDTH / 2, hi)]]
+            self.intervals.set_segments(segments)
+        for text, label in zip(self.labels, range_labels):
+            text.set_text(label)
+            text.set_y(ylim[1])
+        self.hline.set_visible(hline is not None)
+        if hline is not None:
+            self.hline.set_ydata([hline, hline])
+        self.ax.set_ylim(expanded(*ylim))
+
+
+TEMPLATES = {"balance": BalanceTemplate, "series": SeriesTemplate, "box": BoxTemplate}
+
+
+def series_plot(summaries, frame, column, bands, title, ylabel, hline=None, subtitle=""):
+    """NativePlot of `column` over the water years, one line per WTD."""
+    labels = group_labels(summaries, frame)
+    series = []
+    for label in labels:
+        rows = frame[frame["wtd2"] == label]
+        series.append((label, rows["wy"].to_numpy(dtype=np.float64), rows[column].to_numpy(dtype=np.float64)))
+    band_series = None
+    if bands is not None:
+        band_frame = bands["series"]
+        band_series = []
+        # Added WTDs have no sampled bands
+        for label in labels:
+            rows = band_frame[band_frame["wtd2"] == label]
+            if len(rows):
+                band_series.append((rows["wy"].to_numpy(dtype=np.float64), rows[f"{column}_lo"].to_numpy(),
+                                    rows[f"{column}_hi"].to_numpy()))
+        band_series = band_series or None
+    return NativePlot(
+        "series", len(labels), series=series, x=frame["wy"].to_numpy(dtype=np.float64),
+        y=frame[column].to_numpy(dtype=np.float64), wb=frame["wb"].to_numpy(), bands=band_series, hline=hline,
+        title=title, subtitle=subtitle, xlabel="Water Year", ylabel=ylabel,
+        legend_title="Annual\nPotential\nWater\nDeficit (mm)", linetype_title="Water Table\nDepth"
+    )
+
+
+def box_plot(summaries, frame, column, bands, range_labels, ylim, title, ylabel, hline=None, subtitle=""):
+    """NativePlot of `column` as one boxplot per WTD, labelled above with `range_labels` (label per WTD)."""
+    labels = group_labels(summaries, frame)
+    rows = [frame[frame["wtd2"] == label] for label in labels]
+    intervals = None
+    if bands is not None:
+        medians = bands["medians"].set_index("wtd2")
+        # Added WTDs have no sampled bands, so no interval
+        intervals = [(medians.loc[label, f"{column}_lo"], medians.loc[label, f"{column}_hi"])
+                     if label in medians.index else None for label in labels]
+    return NativePlot(
+        "box", len(labels), groups=labels, values=[r[column].to_numpy(dtype=np.float64) for r in rows],
+        wb=np.concatenate([r["wb"].to_numpy() for r in rows]), intervals=intervals,
+        range_labels=[str(range_labels[label]) for label in labels], ylim=ylim, hline=hline, title=title,
+        subtitle=subtitle, xlabel="Water Table Depth", ylabel=ylabel
+    )
+
+
+def build_native_plots(summaries, uncertainty=None):
+    """
+    The results charts of result_figures.build_plots, as NativePlots.
+
+    Args:
+        summaries (dict): Output of result_summaries.summarize_results
+        uncertainty (UncertaintyBands): Coefficient uncertainty drawn as bands
+            on the time series and intervals on the boxplots, or None
+
+    Returns:
+        dict of NativePlot keyed by the names in PLOT_NAMES, except the LAI
+        plots (see build_native_lai_plots).
+    """
+    bands = uncertainty_frames(summaries, uncertainty)
+    pwdsum = summaries["pwdsum"]
+    aet2 = summaries["aet2"]
+    gwsubs2 = summaries["gwsubs2"]
+    aetgw2 = summaries["aetgw2"]
+
+    return {
+        "pwd1": NativePlot(
+            "balance", len(pwdsum), years=pwdsum["wy"].to_numpy(dtype=np.float64),
+            pr=pwdsum["pr"].to_numpy(dtype=np.float64), eto=pwdsum["eto"].to_numpy(dtype=np.float64),
+            wb=pwdsum["wb"].to_numpy(dtype=np.float64), label_x=1990, mineto=summaries["mineto"],
+            maxp=summaries["maxp"], title="Annual Precipitation, Potential ET, and Potential Water Deficit",
+            xlabel="Water Year", ylabel="Annual Water Balance (mm)", legend_title="Potential\nWater\nDeficit (mm)"
+        ),
+        "aet1": series_plot(summaries, aet2, "aetcalc", bands, "Timeseries of Annual Actual\nEvapotranspiration (mm)",
+                            "Annual Actual Evapotranspiration (mm)"),
+        "aet2": box_plot(summaries, aet2, "aetcalc", bands, first_by_group(aet2, "rangelab"),
+                         (summaries["minaet"], summaries["maxaet1"]), "Range of Annual\nActual ET (mm)",
+                         "Annual Actual Evapotranspiration (mm)"),
+        "gwsubs1": series_plot(summaries, gwsubs2, "gwsubscalc", bands,
+                               "Timeseries of Annual Groundwater\nSubsidy (% of Actual ET)",
+                               "Annual Groundwater Subsidy (mm)"),
+        "gwsubs2": box_plot(summaries, gwsubs2, "gwsubscalc", bands, first_by_group(gwsubs2, "rangelabperc"),
+                            (summaries["mingwsubs"], summaries["maxgwsubs1"]),
+                            "Range of Annual Groundwater\nSubsidy (% of Actual ET)", "Annual Groundwater Subsidy (mm)"),
+        "aetgw1": series_plot(summaries, aetgw2, "aetgwcalc", bands,
+                              "Timeseries of Annual Groundwater ET\n(% of Actual ET)",
+                              "Annual Actual Evapotranspiration-Groundwater (mm)"),
+        "aetgw2": box_plot(summaries, aetgw2, "aetgwcalc", bands, first_by_group(aetgw2, "rangelabperc"),
+                           (summaries["minaetgw"], summaries["maxaetgw1"]),
+                           "Range of Annual Groundwater\nET (% of Actual ET)",
+                           "Annual Actual Evapotranspiration-Groundwater (mm)"),
+    }
+
+
+def build_native_lai_plots(summaries, laithresh, uncertainty=None):
+    """The LAI time series and boxplot of result_figures.build_lai_plots, as NativePlots."""
+    bands = uncertainty_frames(summaries, uncertainty)
+    lai2 = summaries["lai2"]
+    overthresh = percent_over(summaries, laithresh).set_index("wtd2")["percoverthresh"]
+    return {
+        "lai1": series_plot(summaries, lai2, "LAIcalc", bands, "Timeseries of Annual Maximum\nLeaf Area Index (LAI)",
+                            "Annual Maximum Leaf Area Index (LAI)", hline=laithresh,
+                            subtitle=f"Ex. Management Target, LAI={laithresh:g}"),
+        "lai2": box_plot(summaries, lai2, "LAIcalc", bands, overthresh, (summaries["minlai"], summaries["maxlai1"]),
+                         f"% Years over\nManagement Target, LAI={laithresh:g}", "Annual Maximum Leaf Area Index (LAI)",
+                         hline=laithresh),
+    }
+
+
+# (build_plots, build_lai_plots) per renderer name
+RENDERERS = {
+    "native": (build_native_plots, build_native_lai_plots),
+    "plotnine": (build_plots, build_lai_plots),
+}
@@ -0,0 +1,99 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("WATERSMART_CACHE_DIR", tempfile.gettempdir()), "watersmart_point_cache.sqlite"
+)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50000
+
+
+class PointCache:
+    """
+    Persistent key/value store for point lookups, shared by every session and process.
+
+    Entries are JSON payloads in a SQLite file. Reads refresh an entry's access
+    time; entries older than `ttl_seconds` are treated as missing, and once the
+    table grows past `max_entries` the least recently used rows are evicted.
+
+    Args:
+        path (str): SQLite file location (defaults to $WATERSMART_CACHE_DIR or the temp dir)
+        ttl_seconds (float): Maximum age of an entry before it is refetched
+        max_entries (int): Upper bound on the number of stored entries
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the stored value for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT payload, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(payload)
+
+    def put(self, key, value):
+        """Store a JSON-serializable value and evict the least recently used entries if over capacity."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, payload, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def purge_expired(self):
+        """Drop every entry older than the TTL."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
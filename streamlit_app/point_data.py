@@ -0,0 +1,259 @@
+import ee
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+
+from grids import GRIDMET, SOIL_GRID
+
+# Earth Engine assets used for the point lookup
+ETO_ASSET = "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_ETo_1991_2020"
+PRECIP_ASSET = "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Precip_1991_2020"
+PWD_ASSET = "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Water_Deficit_1991_2020"
+ADMIN_GW_ASSET = "projects/dri-apps/assets/NVAdminGWBoundaries"
+SOIL_TEXTURE_ASSET = "projects/sat-io/open-datasets/CSRL_soil_properties/physical/soil_texture_profile/texture_2550"
+GRIDMET_COLLECTION = "IDAHO_EPSCOR/GRIDMET"
+
+YEAR_START = 1991
+YEAR_END = 2020
+
+# Pieces of the point request; climate parts are shared by a whole GRIDMET cell,
+# site parts (basin and soil) by a 30 m soil cell
+CLIMATE_PARTS = ('normals', 'gm_point')
+SITE_PARTS = ('basin', 'soil')
+
+# CSRL texture class code -> soil type name used by the coefficient tables
+SOIL_TEXTURES = {
+    1: "sand",
+    2: "loamysand",
+    3: "sandyloam",
+    4: "loam",
+    5: "siltloam",
+    6: "silt",
+    7: "sandyclayloam",
+    8: "clayloam",
+    9: "siltyclayloam",
+    10: "sandyclay",
+    11: "siltyclay",
+    12: "clay"
+}
+
+
+@dataclass(frozen=True)
+class PointData:
+    """Everything the explorer needs for one location, fetched in a single request."""
+    lat: float
+    lon: float
+    eto_value: float
+    precip_value: float
+    pwd_value: float
+    basin_id: object
+    basin_name: str
+    soil_code: int
+    gm_point: dict = field(repr=False)
+
+    @property
+    def soil_string(self):
+        return SOIL_TEXTURES.get(self.soil_code)
+
+    def climate_frame(self):
+        """Return the water-year series as a DataFrame with wy, eto, pr and wb columns."""
+        return parse_gm_point(self.gm_point)
+
+
+def parse_gm_point(gm_point):
+    """Parse the flattened '<year>_<band>' dictionary returned by toBands() into a DataFrame."""
+    parsed_data = []
+    for key, value in gm_point.items():
+        year, suffix = key.split('_')
+        parsed_data.append({'wy': int(year), suffix: value})
+
+    dfee = pd.DataFrame(parsed_data)
+    return dfee.groupby('wy').first().reset_index()
+
+
+def calculate_wy_stats(gm, year):
+    """Sum daily GRIDMET bands over the water year ending 30 September of `year`."""
+    date_start = ee.Date.fromYMD(ee.Number(year).subtract(1), 10, 1)
+    date_end = ee.Date.fromYMD(ee.Number(year), 10, 1)
+    return ee.Image(gm.filterDate(date_start, date_end).sum()).set({
+        'system:time_start': date_start.millis(),
+        'year': ee.Number(year),
+        'system:index': ee.Number(year).format('%.0f')
+    })
+
+
+def calculate_wb(image):
+    """Add the potential water deficit band (pr - eto)."""
+    image_ws = image.select('pr').subtract(image.select('eto')).rename('wb')
+    return image.addBands(image_ws)
+
+
+def water_year_collection(year_start=YEAR_START, year_end=YEAR_END):
+    """Annual water-year pr/eto/wb images for the model period."""
+    gm = ee.ImageCollection(GRIDMET_COLLECTION).select(['pr', 'eto'])
+    year_list = ee.List.sequence(year_start, year_end)
+    gm_wy = ee.ImageCollection(year_list.map(lambda year: calculate_wy_stats(gm, year)))
+    return gm_wy.map(calculate_wb)
+
+
+def build_point_request(coords_ee, parts=CLIMATE_PARTS + SITE_PARTS):
+    """
+    Build one server-side dictionary holding every value needed for a location.
+
+    Nothing is evaluated here; the returned ee.Dictionary is resolved with a
+    single getInfo() call by fetch_point_data. `parts` limits the request to
+    the pieces that are not already cached.
+    """
+    request = {}
+
+    if 'normals' in parts:
+        normals = ee.Image(ETO_ASSET).addBands(ee.Image(PRECIP_ASSET)).addBands(ee.Image(PWD_ASSET))
+        request['normals'] = normals.reduceRegion(ee.Reducer.mean(), coords_ee, 4000)
+
+    if 'basin' in parts:
+        basin = ee.Feature(ee.FeatureCollection(ADMIN_GW_ASSET).filterBounds(coords_ee).first())
+        request['basin'] = basin.toDictionary(['BasinID', 'BasinName'])
+
+    if 'soil' in parts:
+        # Texture is a class code, so take the most common class rather than a mean
+        soil = ee.Image(SOIL_TEXTURE_ASSET).rename('texture')
+        request['soil'] = soil.reduceRegion(reducer=ee.Reducer.mode(), geometry=coords_ee, scale=30)
+
+    if 'gm_point' in parts:
+        gm_point = water_year_collection().toBands()
+        request['gm_point'] = gm_point.reduceRegion(reducer=ee.Reducer.mean(), geometry=coords_ee, scale=4000)
+
+    return ee.Dictionary(request)
+
+
+def point_data_from_info(lat, lon, info):
+    """Convert the resolved request dictionary into a PointData."""
+    normals = info['normals']
+    basin = info['basin']
+    soil_value = info['soil'].get('texture')
+    return PointData(
+        lat=lat,
+        lon=lon,
+        eto_value=normals.get('mean_annual_eto'),
+        precip_value=normals.get('mean_annual_pr'),
+        pwd_value=normals.get('mean_annual_deficit'),
+        basin_id=basin.get('BasinID'),
+        basin_name=basin.get('BasinName'),
+        soil_code=int(round(soil_value)) if soil_value is not None else None,
+        gm_point=info['gm_point']
+    )
+
+
+def fetch_point_data(lat, lon, cache=None, cube=None, basins=None, soil=None):
+    """
+    Fetch climate normals, basin, soil class and the water-year series for a point.
+
+    With a ClimateCube, the climate parts are read from the local cube and
+    Earth Engine is only used for cells the cube does not cover. A BasinIndex
+    and a SoilRaster answer the basin and soil class in-process the same way.
+    With a PointCache, climate values are looked up by GRIDMET cell and
+    basin/soil values by 30 m soil cell, so repeat and nearby clicks are
+    answered without touching Earth Engine. Whatever is missing is fetched
+    together and written back.
+
+    Args:
+        lat (float): Latitude in decimal degrees
+        lon (float): Longitude in decimal degrees
+        cache (PointCache): Optional persistent cache
+        cube (ClimateCube): Optional offline water-year climate
+        basins (BasinIndex): Optional local basin polygons
+        soil (SoilRaster): Optional local soil texture raster
+
+    Returns:
+        PointData resolved with at most one Earth Engine round trip.
+    """
+    climate_key = GRIDMET.key(lat, lon)
+    site_key = SOIL_GRID.key(lat, lon)
+    info = {}
+    if cube is not None:
+        gm_point = cube.gm_point(lat, lon)
+        if gm_point is not None:
+            info['gm_point'] = gm_point
+            info['normals'] = cube.normals(lat, lon)
+    if basins is not None:
+        basin = basins.lookup(lat, lon)
+        if basin is not None:
+            info['basin'] = basin
+    if soil is not None:
+        sample = soil.sample(lat, lon)
+        if sample is not None:
+            info['soil'] = {'texture': sample.code}
+    if cache is not None:
+        for key in (climate_key, site_key):
+            for part, value in (cache.get(key) or {}).items():
+                info.setdefault(part, value)
+
+    missing = tuple(part for part in CLIMATE_PARTS + SITE_PARTS if part not in info)
+    if missing:
+        coords_ee = ee.Geometry.Point([lon, lat])
+        fetched = build_point_request(coords_ee, missing).getInfo()
+        info.update(fetched)
+        if cache is not None:
+            if any(part in fetched for part in CLIMATE_PARTS):
+                cache.put(climate_key, {part: info[part] for part in CLIMATE_PARTS})
+            if any(part in fetched for part in SITE_PARTS):
+                cache.put(site_key, {part: info[part] for part in SITE_PARTS})
+
+    return point_data_from_info(lat, lon, info)
+
+
+def points_collection(lats, lons):
+    """FeatureCollection of points carrying their position in the batch as property 'i'."""
+    return ee.FeatureCollection([
+        ee.Feature(ee.Geometry.Point([float(lon), float(lat)]), {'i': i})
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    ])
+
+
+def fetch_climate_many(lats, lons, years=None, chunk_size=500):
+    """
+    Water-year pr/eto for many points with one sampleRegions call per chunk.
+
+    Callers should pass one point per GRIDMET cell (e.g. cell centers), as
+    every point in a cell gets the same series.
+
+    Args:
+        lats (array-like): Latitudes in decimal degrees
+        lons (array-like): Longitudes in decimal degrees
+        years (list): Water years to fetch, defaults to YEAR_START-YEAR_END
+        chunk_size (int): Points per Earth Engine request
+
+    Returns:
+        (n, 2, n_years) array of [pr, eto], NaN where GRIDMET has no data.
+    """
+    years = list(years or range(YEAR_START, YEAR_END + 1))
+    image = water_year_collection(years[0], years[-1]).select(['pr', 'eto']).toBands()
+    values = np.full((len(lats), 2, len(years)), np.nan)
+    for start in range(0, len(lats), chunk_size):
+        points = points_collection(lats[start:start + chunk_size], lons[start:start + chunk_size])
+        samples = image.sampleRegions(collection=points, properties=['i'], scale=4000, geometries=False)
+        for feature in samples.getInfo()['features']:
+            properties = feature['properties']
+            i = start + int(properties['i'])
+            for j, band in enumerate(('pr', 'eto')):
+                values[i, j] = [properties.get(f"{year}_{band}", np.nan) for year in years]
+    return values
+
+
+def fetch_soil_many(lats, lons, chunk_size=500):
+    """
+    Modal CSRL texture code for many points with one reduceRegions call per chunk.
+
+    Returns:
+        Integer array of class codes, 0 where the raster has no data.
+    """
+    soil = ee.Image(SOIL_TEXTURE_ASSET).rename('texture')
+    codes = np.zeros(len(lats), dtype=np.int64)
+    for start in range(0, len(lats), chunk_size):
+        points = points_collection(lats[start:start + chunk_size], lons[start:start + chunk_size])
+        reduced = soil.reduceRegions(collection=points, reducer=ee.Reducer.mode(), scale=30)
+        for feature in reduced.getInfo()['features']:
+            properties = feature['properties']
+            if properties.get('mode') is not None:
+                codes[start + int(properties['i'])] = int(round(properties['mode']))
+    return codes
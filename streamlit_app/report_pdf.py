@@ -0,0 +1,145 @@
+"""
+The PDF report: cover page, result charts and definitions.
+
+build_report lays the whole report out in one ReportLab pass, with the
+charts embedded as vector drawings converted from their SVGs.
+"""
+import io
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import BaseDocTemplate, Frame
+from reportlab.platypus import Image as reportImage
+from reportlab.platypus import NextPageTemplate, PageBreak, PageTemplate, Paragraph, Spacer
+from svglib.svglib import svg2rlg
+
+DPI = 300
+# Margins of the text pages (SimpleDocTemplate's default) and of the chart pages
+TEXT_MARGIN = inch
+CHART_MARGIN = 0.25 * inch
+
+# Plot pairs stacked on pages 2+ of the report
+PAIRED_PLOTS = [
+    ("lai1", "Annual Maximum Leaf Area Index (LAI)", "lai2", "Boxplot of Leaf Area Index (LAI)"),
+    ("aet1", "Annual Actual Evapotranspiration-Total (AET)", "aet2", "Boxplot of Annual AET-Total"),
+    ("gwsubs1", "Groundwater Subsidy Time Series", "gwsubs2", "Boxplot of Groundwater Subsidy"),
+    ("aetgw1", "Annual AET-Groundwater", "aetgw2", "Boxplot of AET-Groundwater")
+]
+# Size (inches) each plot is rendered at for the report
+REPORT_FIGURE_SIZES = {
+    "pwd1": (8, 6),
+    **{name: (6, 4) for name1, _, name2, _ in PAIRED_PLOTS for name in (name1, name2)}
+}
+
+
+#<b>Nevada GDE Water Needs Explorer Tool Output</b><br/><br/>
+# <div style="font-size:32pt; text-align:center;"><b>Nevada GDE Water Needs Explorer Tool Output</b></div><br/><br/>
+def cover_story(date_str, lat, lon, soilt, precip_value, eto_value, rd, basin_id, basin_name, map_img_buffer=None):
+    """Flowables of the cover page: tool caveats, point inputs and the map snapshot."""
+    styles = getSampleStyleSheet()
+    story = []
+
+    text = f"""
+    <font size=18><b>Nevada GDE Water Needs Explorer Tool Output</b></font><br/><br/>
+
+
+    Estimates are based on model estimates but have uncertainty due to the following simplifications:<br/>
+    1) uniform soil texture in soil column is assumed;<br/>
+    2) variation in root distribution is not considered;<br/>
+    3) species-level differences are not accounted for;<br/>
+    4) groundwater depths are assumed constant over time.<br/><br/>
+
+    <b>Date:</b> {date_str}<br/>
+    <b>Location:</b> {lat:.2f} N, {lon:.2f} W <br/>
+    <b>Soil type:</b> {soilt}<br/>
+    <b>Annual precipitation:</b> {precip_value:.2f} mm<br/>
+    <b>Annual evaporative demand:</b> {eto_value:.2f} mm<br/>
+    <b>Root depth:</b> {rd} m<br/>
+    <b>Admin Basin ID:</b> {basin_id}<br/>
+    <b>Admin Basin Name:</b> {basin_name}
+    """
+
+    story.append(Paragraph(text, styles["Normal"]))
+    story.append(Spacer(1, 0.25 * inch))
+
+    # Add map image
+    if map_img_buffer:
+        story.append(Paragraph("<b>Map Location:</b>", styles["Normal"]))
+        story.append(reportImage(map_img_buffer, width=6 * inch, height=4 * inch))
+    return story
+
+
+def definitions_story(definition_text, logo_png=None):
+    """Flowables of the HTML-formatted definitions text (with hyperlinks) and the optional logo."""
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph(definition_text, styles["Normal"]))
+    story.append(Spacer(1, 0.25 * inch))
+
+    # Add logo image (optional)
+    if logo_png:
+        rl_img = reportImage(io.BytesIO(logo_png), width=7*inch, height=2*inch)
+        story.append(rl_img)
+    return story
+
+
+def chart_drawing(svg, max_width, max_height):
+    """SVG bytes as a centred ReportLab drawing, scaled down to fit max_width x max_height points."""
+    drawing = svg2rlg(io.BytesIO(svg))
+    scale = min(1.0, max_width / drawing.width, max_height / drawing.height)
+    drawing.scale(scale, scale)
+    drawing.width *= scale
+    drawing.height *= scale
+    drawing.hAlign = "CENTER"
+    return drawing
+
+
+def chart_pages(figures, width, height):
+    """
+    Flowables of the chart pages: pwd1 alone, then each of PAIRED_PLOTS stacked, centred on the page.
+
+    Args:
+        figures (dict): SVG bytes by plot name, drawn at REPORT_FIGURE_SIZES
+        width (float): Frame width in points
+        height (float): Frame height in points
+    """
+    story = []
+    for names in [("pwd1",)] + [(name1, name2) for name1, _, name2, _ in PAIRED_PLOTS]:
+        drawings = [chart_drawing(figures[name], width, height / len(names)) for name in names]
+        if story:
+            story.append(PageBreak())
+        story.append(Spacer(1, (height - sum(drawing.height for drawing in drawings)) / 2))
+        story.extend(drawings)
+    return story
+
+
+def build_report(date_str, lat, lon, soilt, precip_value, eto_value, rd, basin_id, basin_name, figures,
+                 definition_text, map_img_buffer=None, logo_png=None):
+    """
+    The whole report in one pass: cover page, vector chart pages and definitions.
+
+    Args:
+        figures (dict): SVG bytes by plot name, drawn at REPORT_FIGURE_SIZES
+        definition_text (str): HTML-formatted definitions and references
+        map_img_buffer (BytesIO): Map snapshot PNG for the cover page
+        logo_png (bytes): Project logos below the definitions
+
+    Returns:
+        PDF bytes.
+    """
+    width, height = LETTER
+    chart_width, chart_height = width - 2 * CHART_MARGIN, height - 2 * CHART_MARGIN
+    buffer = io.BytesIO()
+    doc = BaseDocTemplate(buffer, pagesize=LETTER, pageTemplates=[
+        PageTemplate("text", [Frame(TEXT_MARGIN, TEXT_MARGIN, width - 2 * TEXT_MARGIN, height - 2 * TEXT_MARGIN)]),
+        PageTemplate("charts", [Frame(CHART_MARGIN, CHART_MARGIN, chart_width, chart_height, 0, 0, 0, 0)]),
+    ])
+    doc.build(
+        cover_story(date_str, lat, lon, soilt, precip_value, eto_value, rd, basin_id, basin_name, map_img_buffer)
+        + [NextPageTemplate("charts"), PageBreak()] + chart_pages(figures, chart_width, chart_height)
+        + [NextPageTemplate("text"), PageBreak()] + definitions_story(definition_text, logo_png)
+    )
+    return buffer.getvalue()
+
@@ -0,0 +1,227 @@
+import matplotlib.pyplot as plt
+from plotnine import (aes, annotate, coord_cartesian, geom_bar, geom_boxplot, geom_errorbar, geom_hline, geom_line,
+                      geom_point, geom_ribbon, geom_text, ggplot, ggtitle, labs, scale_color_distiller,
+                      scale_linetype_manual, theme, theme_bw)
+
+from result_summaries import percent_over
+
+# Display order of the results plots
+PLOT_NAMES = ("pwd1", "lai1", "lai2", "aet1", "aet2", "gwsubs1", "gwsubs2", "aetgw1", "aetgw2")
+# Plots that show the management target, built by build_lai_plots
+LAI_PLOT_NAMES = ("lai1", "lai2")
+# Line type per WTD: plotnine's default four, plus one for an added water table depth
+LINETYPES = ("solid", "dashed", "dashdot", "dotted", (0, (5, 1, 1, 1, 1, 1)))
+
+
+def band_layers(bands, column, exclude_free_drain=False):
+    """Grey prediction band behind a time series, empty without uncertainty bands."""
+    if bands is None:
+        return []
+    frame = bands["series"]
+    if exclude_free_drain:
+        frame = frame[frame["wtd2"] != "Free Drain"]
+    return [geom_ribbon(aes('wy', ymin=f'{column}_lo', ymax=f'{column}_hi', group='wtd2'), data=frame,
+                        fill="grey", alpha=0.3, inherit_aes=False)]
+
+
+def median_band_layers(bands, column, exclude_free_drain=False):
+    """Red interval of the median over the years on a boxplot, empty without uncertainty bands."""
+    if bands is None:
+        return []
+    frame = bands["medians"]
+    if exclude_free_drain:
+        frame = frame[frame["wtd2"] != "Free Drain"]
+    return [geom_errorbar(aes(x='wtd2', ymin=f'{column}_lo', ymax=f'{column}_hi'), data=frame,
+                          color="red", width=0.3, inherit_aes=False)]
+
+
+def uncertainty_frames(summaries, uncertainty):
+    """Band and median-interval frames of UncertaintyBands for the plot layers, or None."""
+    if uncertainty is None:
+        return None
+    return {"series": uncertainty.to_frame(summaries["pwdsum"]["wy"].to_numpy()),
+            "medians": uncertainty.median_frame()}
+
+
+def build_plots(summaries, uncertainty=None):
+    """
+    The plotnine figures of the results page.
+
+    Args:
+        summaries (dict): Output of result_summaries.summarize_results
+        uncertainty (UncertaintyBands): Coefficient uncertainty drawn as bands
+            on the time series and intervals on the boxplots, or None
+
+    Returns:
+        dict of ggplot objects keyed by the names in PLOT_NAMES, except the
+        LAI plots, which depend on the management target (see build_lai_plots).
+    """
+    bands = uncertainty_frames(summaries, uncertainty)
+    aet2 = summaries["aet2"]
+    gwsubs2 = summaries["gwsubs2"]
+    aetgw2 = summaries["aetgw2"]
+
+    p_pwd1 = (
+     ggplot(data=summaries["pwdsum"])+
+          geom_bar(aes('wy','pr'), fill="Blue", stat="identity", alpha=0.5)+
+          geom_bar(aes('wy','eto*-1'), fill="Brown", stat="identity", alpha=0.5)+
+          geom_line(aes('wy','wb'), color="white")+
+          geom_point(aes('wy','wb', color='wb'))+
+          theme_bw()+
+          geom_text(aes(1990, summaries["mineto"]),label="Potential ET", color="Brown", ha="left", va="top")+
+          geom_text(aes(1990, summaries["maxp"]),label="Precipitation",color="Blue", ha="left")+
+          scale_color_distiller(palette="YlGnBu", direction=1)+
+          ggtitle("Annual Precipitation, Potential ET, and Potential Water Deficit")+
+          labs(x="Water Year", y="Annual Water Balance (mm)", color="Potential\nWater\nDeficit (mm)")
+    )
+
+    p_aet1 = (
+        ggplot(aet2) +
+        band_layers(bands, 'aetcalc') +
+        geom_line(aes('wy', 'aetcalc', linetype='wtd2')) +
+        geom_point(aes('wy', 'aetcalc', color='wb')) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        scale_linetype_manual(values=LINETYPES) +
+        ggtitle("Timeseries of Annual Actual\nEvapotranspiration (mm)") +
+        labs(x="Water Year", y="Annual Actual Evapotranspiration (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
+    )
+
+    # Plot AET boxplot
+    p_aet2 = (
+        ggplot(aet2) +
+        geom_boxplot(aes('wtd2', 'aetcalc')) +
+        geom_point(aes('wtd2', 'aetcalc', color='wb')) +
+        median_band_layers(bands, 'aetcalc') +
+        annotate('text', y = summaries["maxaet1"], x=aet2["wtd2"], label = aet2["rangelab"]) +
+        coord_cartesian(ylim = [summaries["minaet"], summaries["maxaet1"]], expand = True) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        ggtitle("Range of Annual\nActual ET (mm)") +
+        theme(legend_position="none")+
+        labs(x="Water Table Depth", y="Annual Actual Evapotranspiration (mm)",  color="Annual\nPotential\nWater\nDeficit (mm)", subtitle="")
+    )
+
+    # Plot GWsubs time series
+    p_gwsubs1 = (
+        ggplot(gwsubs2) +
+        band_layers(bands, 'gwsubscalc', exclude_free_drain=True) +
+        geom_line(aes('wy', 'gwsubscalc', linetype='wtd2')) +
+        geom_point(aes('wy', 'gwsubscalc', color='wb')) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        scale_linetype_manual(values=LINETYPES) +
+        ggtitle("Timeseries of Annual Groundwater\nSubsidy (% of Actual ET)") +
+        labs(x="Water Year", y="Annual Groundwater Subsidy (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
+    )
+
+    # Plot GWsubs boxplot
+    p_gwsubs2 = (
+        ggplot(gwsubs2) +
+        geom_boxplot(aes('wtd2', 'gwsubscalc')) +
+        geom_point(aes('wtd2', 'gwsubscalc', color='wb')) +
+        median_band_layers(bands, 'gwsubscalc', exclude_free_drain=True) +
+        annotate('text', y = summaries["maxgwsubs1"], x=gwsubs2["wtd2"], label = gwsubs2["rangelabperc"]) +
+        coord_cartesian(ylim = [summaries["mingwsubs"], summaries["maxgwsubs1"]], expand = True) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        ggtitle("Range of Annual Groundwater\nSubsidy (% of Actual ET)") +
+        theme(legend_position="none")+
+        labs(x="Water Table Depth", y="Annual Groundwater Subsidy (mm)",  color="Annual Potential\nWater Deficit (mm)")
+    )
+
+    # Plot AETAETGW time series
+    p_aetgw1 = (
+        ggplot(aetgw2) +
+        band_layers(bands, 'aetgwcalc') +
+        geom_line(aes('wy', 'aetgwcalc', linetype='wtd2')) +
+        geom_point(aes('wy', 'aetgwcalc', color='wb')) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        scale_linetype_manual(values=LINETYPES) +
+        ggtitle("Timeseries of Annual Groundwater ET\n(% of Actual ET)") +
+        labs(x="Water Year", y="Annual Actual Evapotranspiration-Groundwater (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
+    )
+
+    # Plot AETAETGW boxplot
+    p_aetgw2 = (
+        ggplot(aetgw2) +
+        geom_boxplot(aes('wtd2', 'aetgwcalc')) +
+        geom_point(aes('wtd2', 'aetgwcalc', color='wb')) +
+        median_band_layers(bands, 'aetgwcalc') +
+        annotate('text', y = summaries["maxaetgw1"], x=aetgw2["wtd2"], label = aetgw2["rangelabperc"]) +
+        coord_cartesian(ylim = [summaries["minaetgw"], summaries["maxaetgw1"]], expand = True) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        ggtitle("Range of Annual Groundwater\nET (% of Actual ET)") +
+        theme(legend_position="none")+
+        labs(x="Water Table Depth", y="Annual Actual Evapotranspiration-Groundwater (mm)",  color="Annual Potential\nWater Deficit (mm)")
+    )
+
+    return {
+        "pwd1": p_pwd1,
+        "aet1": p_aet1,
+        "aet2": p_aet2,
+        "gwsubs1": p_gwsubs1,
+        "gwsubs2": p_gwsubs2,
+        "aetgw1": p_aetgw1,
+        "aetgw2": p_aetgw2,
+    }
+
+
+def build_lai_plots(summaries, laithresh, uncertainty=None):
+    """
+    The LAI time series and boxplot for one management-target LAI.
+
+    Only these two plots show the target, so moving it rebuilds nothing else.
+    """
+    bands = uncertainty_frames(summaries, uncertainty)
+    lai2 = summaries["lai2"]
+    overthresh = percent_over(summaries, laithresh)
+
+    # Plot LAI time series
+    p_lai1 = (
+        ggplot(lai2) +
+        band_layers(bands, 'LAIcalc') +
+        geom_line(aes('wy', 'LAIcalc', linetype='wtd2')) +
+        geom_point(aes('wy', 'LAIcalc', color='wb')) +
+        geom_hline(yintercept=laithresh, alpha=0.5) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        scale_linetype_manual(values=LINETYPES) +
+        ggtitle("Timeseries of Annual Maximum\nLeaf Area Index (LAI)")+
+        labs(x="Water Year", y="Annual Maximum Leaf Area Index (LAI)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth",
+             subtitle=f"Ex. Management Target, LAI={laithresh:g}")
+    )
+
+    # Plot LAI boxplot
+    p_lai2 = (
+        ggplot(lai2) +
+        geom_boxplot(aes('wtd2', 'LAIcalc')) +
+        geom_point(aes('wtd2', 'LAIcalc', color='wb')) +
+        median_band_layers(bands, 'LAIcalc') +
+        geom_hline(yintercept=laithresh, alpha=0.5) +
+        annotate('text', y = summaries["maxlai1"], x=overthresh["wtd2"], label = overthresh["percoverthresh"]) +
+        coord_cartesian(ylim = [summaries["minlai"], summaries["maxlai1"]], expand = True) +
+        theme_bw() +
+        scale_color_distiller(palette="YlGnBu", direction=1) +
+        ggtitle(f"% Years over\nManagement Target, LAI={laithresh:g}")+
+        theme(legend_position="none")+
+        labs(x="Water Table Depth", y="Annual Maximum Leaf Area Index (LAI)", subtitle="")
+    )
+
+    return {"lai1": p_lai1, "lai2": p_lai2}
+
+
+def draw_figures(plots):
+    """
+    Draw each plot once into a matplotlib figure for st.pyplot.
+
+    The figures are released from pyplot's figure manager so that keeping
+    them for later reruns does not accumulate open pyplot figures.
+    """
+    figures = {}
+    for name, plot in plots.items():
+        figures[name] = plot.draw()
+        plt.close(figures[name])
+    return figures
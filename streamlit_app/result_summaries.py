@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from model_engine import exceedance_percent
+
+
+def summarize_results(dfsum):
+    """
+    Per-WTD summaries behind the results plots.
+
+    Nothing here depends on the management-target LAI: the LAI of every WTD
+    is kept sorted so that percent_over answers any threshold with a binary
+    search.
+
+    Args:
+        dfsum (pd.DataFrame): ModelResult.to_frame output for one soil and rooting depth
+
+    Returns:
+        dict with the joined plot frames (lai2, pwdsum, aet2, gwsubs2, aetgw2),
+        the sorted LAI per WTD and the axis limits used by the plots.
+    """
+    wtd_labels = list(dict.fromkeys(dfsum["wtd2"]))
+    lai_sorted = np.sort(dfsum["LAIcalc"].to_numpy().reshape(len(wtd_labels), -1), axis=-1)
+
+    # Free drain rows carry the climate series
+    pwdsum = dfsum[
+        (dfsum["wtd2"] == "Free Drain")
+    ]
+
+    # Group by wtd2 and calculate min, max of aetcalc
+    aetsum = (
+        dfsum.groupby("wtd2")
+        .agg(min=("aetcalc", "min"), max=("aetcalc", "max"))
+        .reset_index()
+    )
+
+    # Left-join aet with aetsum
+    aet2 = pd.merge(dfsum, aetsum, on="wtd2", how="left")
+
+    # Round min and max to 0 digits
+    aet2["min"] = aet2["min"].astype(int)
+    aet2["max"] = aet2["max"].astype(int)
+
+    # Create a rangelab column (e.g., "10-25")
+    aet2["rangelab"] = aet2["min"].astype(str) + "-" + aet2["max"].astype(str)
+
+    # Filter the DataFrame
+    gwsubs = dfsum[
+        (dfsum["wtd2"] != "Free Drain")
+    ]
+
+    # Create 'ratio' column for gwsubscalc/aetcalc
+    gwsubs = gwsubs.assign(ratio = gwsubs["gwsubscalc"] / gwsubs["aetcalc"])
+
+    # Create 'ratio' column for gwetcalc/aetcalc
+    dfratio = dfsum.assign(ratio = dfsum["aetgwcalc"] / dfsum["aetcalc"])
+
+    return {
+        "lai2": dfsum,
+        "wtd_labels": wtd_labels,
+        "lai_sorted": lai_sorted,
+        # identify min and max lai values
+        "minlai": dfsum["LAIcalc"].min(),
+        "maxlai1": dfsum["LAIcalc"].max() * 1.1,
+        "pwdsum": pwdsum,
+        "mineto": pwdsum["eto"].min() * -1.2,
+        "maxp": pwdsum["pr"].max() * 1.1,
+        "aet2": aet2,
+        # identify min and max aet values
+        "minaet": aet2["aetcalc"].min(),
+        "maxaet1": aet2["aetcalc"].max() * 1.1,
+        "gwsubs2": range_labels(gwsubs, "gwsubscalc"),
+        "mingwsubs": gwsubs["gwsubscalc"].min(),
+        "maxgwsubs1": gwsubs["gwsubscalc"].max() * 1.1,
+        "aetgw2": range_labels(dfratio, "aetgwcalc"),
+        "minaetgw": dfratio["aetgwcalc"].min(),
+        "maxaetgw1": dfratio["aetgwcalc"].max() * 1.1,
+    }
+
+
+def range_labels(df, column):
+    """Join per-WTD ranges of `column` and of its share of AET ('ratio') as text labels."""
+    # Group by wtd2 and compute min, max, minperc, maxperc
+    rangesum = (
+        df.groupby("wtd2")
+        .agg(
+            min=(column, "min"),
+            max=(column, "max"),
+            minperc=("ratio", "min"),   # min of (column / aetcalc)
+            maxperc=("ratio", "max"),   # max of (column / aetcalc)
+        )
+        .reset_index()
+    )
+
+    # Left-join the summarized data back to the filtered data
+    df2 = pd.merge(df, rangesum, on="wtd2", how="left")
+
+    # Round min and max to 0 decimals
+    df2["min"] = df2["min"].astype(int)
+    df2["max"] = df2["max"].astype(int)
+
+    # Create a range label (e.g., "10-25")
+    df2["rangelab"] = df2["min"].astype(str) + "-" + df2["max"].astype(str)
+
+    # Multiply minperc, maxperc by 100 and round
+    df2["minperc"] = (df2["minperc"] * 100).astype(int)
+    df2["maxperc"] = (df2["maxperc"] * 100).astype(int)
+
+    # Create a percentage range label (e.g., "10-30% of Actual ET")
+    df2["rangelabperc"] = (
+        df2["minperc"].astype(str)
+        + "-"
+        + df2["maxperc"].astype(str)
+        + "%"
+    )
+    return df2
+
+
+def percent_over(summaries, laithresh):
+    """% of years with LAI at or above `laithresh` per WTD, one row per WTD."""
+    percent = exceedance_percent(summaries["lai_sorted"], [laithresh])[:, 0]
+    return pd.DataFrame({
+        "wtd2": summaries["wtd_labels"],
+        "percoverthresh": np.round(percent / 100, 2) * 100
+    })
+
+
+def group_labels(summaries, frame):
+    """WTD labels present in `frame`, in the order of the summaries."""
+    present = set(frame["wtd2"])
+    return [label for label in summaries["wtd_labels"] if label in present]
+
+
+def first_by_group(frame, column):
+    """First value of `column` per WTD label, e.g. the range label repeated on every year's row."""
+    return frame.drop_duplicates("wtd2").set_index("wtd2")[column]
@@ -0,0 +1,133 @@
+"""
+Climate scenarios: the model re-run on perturbed water-year climate.
+
+Every precipitation multiplier is crossed with every ETo delta and the
+whole grid is evaluated against all WTDs in one broadcast pass of the
+model engine, giving response surfaces over (precipitation, ETo, WTD).
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+from plotnine import (aes, element_text, facet_wrap, geom_text, geom_tile, ggplot, ggtitle, labs, scale_fill_distiller,
+                      theme, theme_bw)
+
+from model_engine import exceedance_percent, lai_threshold, wtd_label
+
+PRECIP_MULTIPLIERS = (0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3)
+ETO_DELTAS = (-100, -50, 0, 50, 100, 150, 200)
+
+# Surface name -> display label
+SCENARIO_SURFACES = {
+    "lai_median": "Median Annual Maximum LAI",
+    "percoverthresh": "% Years over Management Target LAI",
+    "gwsubs_mean": "Mean Annual Groundwater Subsidy (mm)",
+}
+
+
+@dataclass(frozen=True)
+class ScenarioSurfaces:
+    """
+    Model summaries over a grid of climate perturbations.
+
+    Each surface is shaped (precipitation multiplier, ETo delta, WTD);
+    `lai_sorted` keeps each scenario's LAI sorted over the years so the
+    exceedance surface can be redrawn for any target LAI.
+    """
+    precip_multipliers: tuple
+    eto_deltas: tuple
+    wtds: tuple
+    laithresh: float
+    surfaces: dict
+    lai_sorted: np.ndarray
+
+    def with_threshold(self, laithresh):
+        """The same scenarios with % of years over a different target LAI."""
+        percoverthresh = exceedance_percent(self.lai_sorted, [laithresh])[..., 0]
+        return replace(self, laithresh=laithresh, surfaces={**self.surfaces, "percoverthresh": percoverthresh})
+
+    def to_frame(self):
+        """Long DataFrame with one row per scenario and WTD."""
+        p, e, w = np.meshgrid(np.arange(len(self.precip_multipliers)), np.arange(len(self.eto_deltas)),
+                              np.arange(len(self.wtds)), indexing="ij")
+        frame = pd.DataFrame({
+            "precip_multiplier": np.asarray(self.precip_multipliers)[p.ravel()],
+            "eto_delta": np.asarray(self.eto_deltas)[e.ravel()],
+            "WTD": np.asarray(self.wtds)[w.ravel()],
+        })
+        frame["wtd2"] = pd.Categorical([wtd_label(wtd) for wtd in frame["WTD"]],
+                                       categories=[wtd_label(wtd) for wtd in self.wtds])
+        for name, surface in self.surfaces.items():
+            frame[name] = surface.ravel()
+        return frame
+
+
+def perturb_climate(pr, eto, precip_multipliers=PRECIP_MULTIPLIERS, eto_deltas=ETO_DELTAS):
+    """
+    Scaled precipitation and shifted ETo for every scenario.
+
+    Args:
+        pr (array-like): Annual precipitation (mm), shaped (year,)
+        eto (array-like): Annual reference ET (mm), shaped (year,)
+        precip_multipliers (tuple): Factors applied to every year's precipitation
+        eto_deltas (tuple): Millimetres added to every year's ETo
+
+    Returns:
+        (pr, eto) each shaped (precipitation multiplier, ETo delta, year).
+    """
+    pr = np.asarray(precip_multipliers, dtype=np.float64)[:, None, None] * np.asarray(pr, dtype=np.float64)
+    eto = np.asarray(eto_deltas, dtype=np.float64)[None, :, None] + np.asarray(eto, dtype=np.float64)
+    return np.broadcast_arrays(pr, eto)
+
+
+def scenario_surfaces(engine, pr, eto, soil, rootdepth, precip_multipliers=PRECIP_MULTIPLIERS,
+                      eto_deltas=ETO_DELTAS, laithresh=None):
+    """
+    Evaluate the model for every climate scenario of one location.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        pr (array-like): Observed annual precipitation (mm), shaped (year,)
+        eto (array-like): Observed annual reference ET (mm), shaped (year,)
+        soil (str): Soil type
+        rootdepth (float): Rooting depth (m)
+        precip_multipliers (tuple): Precipitation factors
+        eto_deltas (tuple): ETo shifts (mm)
+        laithresh (float): Target LAI, defaults to the rooting depth's threshold
+
+    Returns:
+        ScenarioSurfaces with the median LAI, % of years over laithresh and mean GW subsidy.
+    """
+    laithresh = laithresh if laithresh is not None else lai_threshold(rootdepth)
+    pr, eto = perturb_climate(pr, eto, precip_multipliers, eto_deltas)
+    result = engine.evaluate(pr, eto, soil, rootdepth)
+    summary = result.summary(laithresh)
+    return ScenarioSurfaces(
+        precip_multipliers=tuple(precip_multipliers),
+        eto_deltas=tuple(eto_deltas),
+        wtds=engine.wtds,
+        laithresh=laithresh,
+        surfaces={name: summary[name] for name in SCENARIO_SURFACES},
+        lai_sorted=np.sort(result.lai, axis=-1)
+    )
+
+
+def scenario_heatmap(scenarios, surface="lai_median"):
+    """Heatmap of one response surface, one panel per WTD."""
+    frame = scenarios.to_frame()
+    frame["precip"] = pd.Categorical([f"{m * 100:.0f}%" for m in frame["precip_multiplier"]],
+                                     categories=[f"{m * 100:.0f}%" for m in scenarios.precip_multipliers])
+    frame["eto"] = pd.Categorical([f"{d:+g}" for d in frame["eto_delta"]],
+                                  categories=[f"{d:+g}" for d in scenarios.eto_deltas])
+    frame["label"] = frame[surface].round(0 if surface != "lai_median" else 1).map("{:g}".format)
+    return (
+        ggplot(frame, aes("eto", "precip", fill=surface)) +
+        geom_tile(color="white") +
+        geom_text(aes(label="label"), size=7) +
+        facet_wrap("~wtd2", nrow=1) +
+        scale_fill_distiller(palette="YlGnBu", direction=1) +
+        theme_bw() +
+        theme(figure_size=(12, 4), axis_text_x=element_text(rotation=45)) +
+        ggtitle(f"{SCENARIO_SURFACES[surface]} under Climate Scenarios") +
+        labs(x="Change in Annual Reference ET (mm)", y="Annual Precipitation (% of observed)", fill="")
+    )
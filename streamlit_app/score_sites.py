@@ -0,0 +1,330 @@
+"""
+Score a list of candidate sites with the model from the command line.
+
+Reads a CSV or Parquet file with lat and lon columns (optionally site_id,
+soil and rootdepth overrides and a measured water table depth, wtd, in
+metres), fetches climate once per GRIDMET cell and
+evaluates the model in a process pool. Sites without a rooting depth are
+scored at every depth. Results are written chunk by chunk as Parquet parts:
+
+    <output>/annual/part-00000.parquet    one row per site, WTD and water year
+                                          (measured depths are an extra WTD)
+    <output>/summary/part-00000.parquet   one row per site and WTD, with the
+                                          % of years over every LAI target in
+                                          LAI_THRESHOLD_GRID (percover_lai<t>)
+                                          and the site's critical WTD
+
+Both directories can be read with pandas.read_parquet. Rerunning the same
+command resumes after the last completed chunk.
+
+    python score_sites.py sites.csv results/ --workers 4 --chunk-size 500
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from climate_cube import ClimateCube
+from coefficients import load_engine
+from critical_wtd import critical_wtd
+from grids import GRIDMET
+from model_engine import (DEFAULT_FORMULATION, FORMULATIONS, LAI_THRESHOLD_GRID, exceedance_column, lai_threshold,
+                          wtd_label)
+from point_data import SOIL_TEXTURES, YEAR_END, YEAR_START, fetch_climate_many, fetch_soil_many
+from soil_raster import SoilRaster
+
+MANIFEST_FILE = "_manifest.json"
+
+
+def read_sites(path):
+    """Load the site table and normalise its columns to site_id, lat, lon, soil, rootdepth, wtd."""
+    if path.endswith(".parquet"):
+        sites = pd.read_parquet(path)
+    else:
+        sites = pd.read_csv(path)
+    sites.columns = [column.strip().lower() for column in sites.columns]
+    missing = {"lat", "lon"} - set(sites.columns)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+
+    if "site_id" not in sites.columns:
+        sites["site_id"] = np.arange(len(sites))
+    if "soil" not in sites.columns:
+        sites["soil"] = None
+    if "rootdepth" not in sites.columns:
+        sites["rootdepth"] = np.nan
+    if "wtd" not in sites.columns:
+        sites["wtd"] = np.nan
+    sites["soil"] = sites["soil"].where(sites["soil"].notna(), None)
+    sites["rootdepth"] = sites["rootdepth"].astype(float)
+    sites["wtd"] = sites["wtd"].astype(float)
+    return sites[["site_id", "lat", "lon", "soil", "rootdepth", "wtd"]]
+
+
+def plan_sites(sites, root_depths):
+    """
+    Expand sites without a rooting depth to one row per depth and order rows by GRIDMET cell.
+
+    Sorting by cell keeps sites that share climate in the same chunk, so each
+    cell is fetched once. The order is deterministic, which keeps chunk
+    numbers stable across resumed runs.
+    """
+    missing = sites["rootdepth"].isna()
+    expanded = pd.concat(
+        [sites[~missing]] + [sites[missing].assign(rootdepth=rd) for rd in root_depths],
+        ignore_index=False
+    )
+    rows, cols = GRIDMET.cells(expanded["lat"], expanded["lon"])
+    expanded["cell_row"], expanded["cell_col"] = rows, cols
+    expanded["order"] = expanded.index
+    expanded = expanded.sort_values(["cell_row", "cell_col", "order", "rootdepth"], kind="stable")
+    return expanded.drop(columns="order").reset_index(drop=True)
+
+
+def resolve_soils(chunk, soil_raster=None, use_ee=True):
+    """Fill missing soil names from the local soil raster, then from Earth Engine."""
+    missing = chunk["soil"].isna().to_numpy()
+    if soil_raster is not None and missing.any():
+        codes, _ = soil_raster.sample_many(chunk.loc[missing, "lat"].to_numpy(), chunk.loc[missing, "lon"].to_numpy())
+        chunk.loc[missing, "soil"] = [SOIL_TEXTURES.get(int(code)) for code in codes]
+        missing = chunk["soil"].isna().to_numpy()
+    if use_ee and missing.any():
+        codes = fetch_soil_many(chunk.loc[missing, "lat"].to_numpy(), chunk.loc[missing, "lon"].to_numpy())
+        chunk.loc[missing, "soil"] = [SOIL_TEXTURES.get(int(code)) for code in codes]
+    return chunk
+
+
+def fetch_climate(chunk, years, cube=None, use_ee=True):
+    """
+    Water-year climate for every row of a chunk, fetched once per GRIDMET cell.
+
+    Returns:
+        (pr, eto) arrays shaped (site, year).
+    """
+    cells, inverse = np.unique(chunk[["cell_row", "cell_col"]].to_numpy(), axis=0, return_inverse=True)
+    lats, lons = zip(*[GRIDMET.center(row, col) for row, col in cells]) if len(cells) else ((), ())
+    lats, lons = np.array(lats), np.array(lons)
+
+    values = np.full((len(cells), 2, len(years)), np.nan)
+    if cube is not None:
+        values = cube.series_many(lats, lons)
+    missing = np.isnan(values).any(axis=(1, 2))
+    if use_ee and missing.any():
+        values[missing] = fetch_climate_many(lats[missing], lons[missing], years)
+
+    values = values[inverse.reshape(-1)]
+    return values[:, 0], values[:, 1]
+
+
+def result_frames(ids, result, wtds, pr, eto, years, laithresh):
+    """
+    Annual and summary rows of a result shaped (site, WTD, year).
+
+    Args:
+        ids (pd.DataFrame): Site identifier columns, one row per site
+        result (ModelResult): Modeled responses
+        wtds (np.ndarray): Water table depth of every (site, WTD)
+        pr, eto (np.ndarray): Climate shaped (site, year)
+        years (list): Water years
+        laithresh (np.ndarray): Target LAI per site
+
+    Returns:
+        (annual, summary) DataFrames.
+    """
+    n_sites, n_wtd, n_years = result.lai.shape
+    labels = np.array([wtd_label(wtd) for wtd in wtds.ravel()])
+
+    annual = ids.iloc[np.repeat(np.arange(n_sites), n_wtd * n_years)].reset_index(drop=True)
+    annual["WTD"] = np.repeat(wtds.ravel(), n_years)
+    annual["wtd2"] = np.repeat(labels, n_years)
+    annual["wy"] = np.tile(years, n_sites * n_wtd)
+    annual["pr"] = np.repeat(pr, n_wtd, axis=0).reshape(-1)
+    annual["eto"] = np.repeat(eto, n_wtd, axis=0).reshape(-1)
+    annual["LAIcalc"] = result.lai.reshape(-1)
+    annual["aetcalc"] = result.aet.reshape(-1)
+    annual["aetgwcalc"] = result.aetgw.reshape(-1)
+    annual["gwsubscalc"] = result.gwsubs.reshape(-1)
+    annual["gwsubscalcratio"] = result.gwsubs_ratio.reshape(-1)
+
+    summary = ids.iloc[np.repeat(np.arange(n_sites), n_wtd)].reset_index(drop=True)
+    summary["WTD"] = wtds.ravel()
+    summary["wtd2"] = labels
+    summary["laithresh"] = np.repeat(laithresh, n_wtd)
+    for name, values in result.summary(laithresh).items():
+        summary[name] = values.reshape(-1)
+    # Exceedance curve over the LAI target grid, so other management targets need no rescoring
+    exceedance = result.exceedance()
+    for i, threshold in enumerate(LAI_THRESHOLD_GRID):
+        summary[exceedance_column(threshold)] = exceedance[..., i].reshape(-1)
+    return annual, summary
+
+
+def score_chunk(formulation, chunk, pr, eto, years):
+    """
+    Evaluate one chunk of sites.
+
+    Every site is scored at the modeled WTDs; sites with a measured water
+    table depth get one more row at that depth (wtd_source "measured").
+
+    Returns:
+        (annual, summary) DataFrames.
+    """
+    engine = load_engine(formulation)
+    n_sites = len(pr)
+    n_wtd = len(engine.wtds)
+    soils = chunk["soil"].to_numpy()
+    rootdepths = chunk["rootdepth"].to_numpy()
+    laithresh = lai_threshold(rootdepths)
+    ids = chunk[["site_id", "lat", "lon", "soil", "rootdepth"]].reset_index(drop=True)
+
+    result = engine.evaluate_sites(pr, eto, soils, rootdepths)
+    annual, summary = result_frames(ids, result, np.tile(engine.wtds, (n_sites, 1)), pr, eto, years, laithresh)
+    # Deepest water table keeping LAI on target in DEFAULT_PERCENT % of years (inf: no groundwater needed)
+    critical = critical_wtd(engine, pr, eto, soils, rootdepths, laithresh)
+    summary["critical_wtd"] = np.repeat(critical, n_wtd)
+    summary["wtd_source"] = "modeled"
+
+    measured = np.flatnonzero(chunk["wtd"].notna().to_numpy())
+    if len(measured):
+        # Gathered from the interpolation table; the free-drain column is already in the modeled rows
+        depths = chunk["wtd"].to_numpy(dtype=np.float64)[measured]
+        site_result = engine.evaluate_sites_at(pr[measured], eto[measured], soils[measured], rootdepths[measured],
+                                               depths).take((slice(None), slice(0, 1)))
+        site_wtds = engine.table_depths[engine.table_index(depths)][:, None]
+        site_annual, site_summary = result_frames(ids.iloc[measured].reset_index(drop=True), site_result, site_wtds,
+                                                  pr[measured], eto[measured], years, laithresh[measured])
+        site_summary["critical_wtd"] = critical[measured]
+        site_summary["wtd_source"] = "measured"
+        annual = pd.concat([annual, site_annual], ignore_index=True)
+        summary = pd.concat([summary, site_summary], ignore_index=True)
+    return annual, summary
+
+
+def write_part(output_dir, chunk_index, annual, summary):
+    """Write one chunk's results; the annual part is renamed into place last and marks the chunk done."""
+    for name, frame in (("summary", summary), ("annual", annual)):
+        directory = os.path.join(output_dir, name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{chunk_index:05d}.parquet")
+        # Dot-prefixed so readers of the directory skip half-written files
+        tmp_path = os.path.join(directory, f".part-{chunk_index:05d}.parquet.tmp")
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def chunk_done(output_dir, chunk_index):
+    return all(
+        os.path.exists(os.path.join(output_dir, name, f"part-{chunk_index:05d}.parquet"))
+        for name in ("summary", "annual")
+    )
+
+
+def score_and_write(output_dir, chunk_index, formulation, chunk, pr, eto, years):
+    """Worker entry point: score a chunk and write its parts. Returns the number of rows scored."""
+    annual, summary = score_chunk(formulation, chunk, pr, eto, years)
+    write_part(output_dir, chunk_index, annual, summary)
+    return len(chunk)
+
+
+def check_manifest(output_dir, manifest):
+    """Record the run settings, or refuse to resume into a directory written with different ones."""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        if previous != manifest:
+            changed = sorted(key for key in manifest if previous.get(key) != manifest[key])
+            raise SystemExit(f"{output_dir} holds results from a different run ({', '.join(changed)} changed); "
+                             f"use a new output directory")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run(input_path, output_dir, formulation=DEFAULT_FORMULATION, chunk_size=500, workers=None, use_ee=True):
+    engine = load_engine(formulation)
+    cube = ClimateCube.open_default()
+    years = [int(year) for year in cube.years] if cube is not None else list(range(YEAR_START, YEAR_END + 1))
+    soil_raster = SoilRaster.open_default()
+
+    sites = plan_sites(read_sites(input_path), engine.root_depths)
+    n_chunks = (len(sites) + chunk_size - 1) // chunk_size
+    check_manifest(output_dir, {
+        "input_sha256": file_sha256(input_path),
+        "chunk_size": chunk_size,
+        "formulation": formulation,
+        "coefficients": engine.version,
+        "years": years
+    })
+    pending = [i for i in range(n_chunks) if not chunk_done(output_dir, i)]
+    print(f"{len(sites)} site rows in {n_chunks} chunks, {n_chunks - len(pending)} already done", file=sys.stderr)
+
+    start = time.perf_counter()
+    scored = 0
+    skipped = 0
+    workers = workers if workers is not None else os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+        in_flight = set()
+        for chunk_index in pending:
+            chunk = sites.iloc[chunk_index * chunk_size:(chunk_index + 1) * chunk_size].copy()
+            chunk = resolve_soils(chunk, soil_raster, use_ee)
+            pr, eto = fetch_climate(chunk, years, cube, use_ee)
+
+            valid = (chunk["soil"].isin(engine.soils).to_numpy() & chunk["rootdepth"].isin(engine.root_depths).to_numpy()
+                     & np.isfinite(pr).all(axis=1) & np.isfinite(eto).all(axis=1))
+            skipped += int((~valid).sum())
+            in_flight.add(pool.submit(score_and_write, output_dir, chunk_index, formulation,
+                                      chunk[valid], pr[valid], eto[valid], years))
+
+            # Keep at most two chunks per worker queued so memory stays bounded
+            while len(in_flight) >= 2 * max(workers, 1):
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                scored += sum(future.result() for future in done)
+                elapsed = time.perf_counter() - start
+                print(f"{scored} rows scored, {scored / elapsed:.0f} points/s", file=sys.stderr)
+
+        for future in in_flight:
+            scored += future.result()
+
+    elapsed = time.perf_counter() - start
+    rate = scored / elapsed if elapsed else float("inf")
+    print(f"done: {scored} rows scored in {elapsed:.1f} s ({rate:.0f} points/s), "
+          f"{skipped} skipped without a modeled soil, rooting depth or climate", file=sys.stderr)
+    return scored, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or Parquet with lat, lon and optional site_id, soil, rootdepth")
+    parser.add_argument("output", help="Output directory for the Parquet parts")
+    parser.add_argument("--model", default=DEFAULT_FORMULATION, choices=sorted(FORMULATIONS))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use only the bundled climate cube and soil raster; uncovered sites are skipped")
+    parser.add_argument("--service-account-key", help="Earth Engine service account key (JSON)")
+    args = parser.parse_args()
+
+    if not args.offline:
+        from build_climate_cube import initialize
+        initialize(args.service_account_key)
+    run(args.input, args.output, args.model, args.chunk_size, args.workers, use_ee=not args.offline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from point_data import SOIL_TEXTURES
+
+DEFAULT_SOIL_PATH = os.environ.get(
+    "WATERSMART_SOIL_RASTER",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "soil", "texture_2550_nv_cog.tif")
+)
+N_CLASSES = 13  # class codes 1-12, 0 is unused
+METERS_PER_DEGREE = 111320.0
+
+
+@dataclass(frozen=True)
+class SoilSample:
+    """Texture classes found around a point."""
+    code: int
+    histogram: dict
+
+    @property
+    def soil_string(self):
+        return SOIL_TEXTURES.get(self.code)
+
+
+class SoilRaster:
+    """
+    Windowed reader for the Nevada clip of the CSRL texture_2550 raster.
+
+    The raster is a tiled Cloud-Optimized GeoTIFF in EPSG:4326. Tiles are read
+    on demand and kept in a small in-memory LRU cache, so lookups only touch
+    the blocks around the requested points. Texture is a categorical code, so
+    the reader reports the modal class and the class histogram in a buffer
+    around each point instead of a mean.
+
+    Args:
+        path (str): Path to the GeoTIFF
+        max_blocks (int): Number of decoded tiles kept in memory
+    """
+
+    def __init__(self, path=DEFAULT_SOIL_PATH, max_blocks=256):
+        self.path = path
+        self.max_blocks = max_blocks
+        self.dataset = rasterio.open(path)
+        self.block_rows, self.block_cols = self.dataset.block_shapes[0]
+        self.nodata = self.dataset.nodata
+        self.transform = self.dataset.transform
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self.block_reads = 0
+
+    @classmethod
+    def open_default(cls):
+        """Open the bundled soil raster, or return None if it has not been exported."""
+        if not os.path.exists(DEFAULT_SOIL_PATH):
+            return None
+        return cls(DEFAULT_SOIL_PATH)
+
+    def close(self):
+        self.dataset.close()
+
+    def _block(self, block_row, block_col):
+        """Return one decoded tile, reading it from disk on a cache miss."""
+        key = (block_row, block_col)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+            window = Window(block_col * self.block_cols, block_row * self.block_rows,
+                            self.block_cols, self.block_rows)
+            block = self.dataset.read(1, window=window, boundless=True, fill_value=self.nodata or 0)
+            self.block_reads += 1
+            self._blocks[key] = block
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+            return block
+
+    def _pixel_offsets(self, buffer_m, lat):
+        """Row/col offsets of the pixels whose centers lie within `buffer_m` of the center pixel."""
+        res_x, res_y = self.transform.a, -self.transform.e
+        dy = res_y * METERS_PER_DEGREE
+        dx = res_x * METERS_PER_DEGREE * math.cos(math.radians(lat))
+        reach_r = int(math.ceil(buffer_m / dy))
+        reach_c = int(math.ceil(buffer_m / dx))
+        rr, cc = np.mgrid[-reach_r:reach_r + 1, -reach_c:reach_c + 1]
+        inside = (rr * dy) ** 2 + (cc * dx) ** 2 <= buffer_m ** 2
+        return rr[inside], cc[inside]
+
+    def _gather(self, rows, cols):
+        """Read the raster values at arbitrary pixel coordinates, one tile at a time."""
+        values = np.zeros(rows.shape, dtype=np.int64)
+        block_r = rows // self.block_rows
+        block_c = cols // self.block_cols
+        block_id = block_r * (self.dataset.width // self.block_cols + 1) + block_c
+        for bid in np.unique(block_id):
+            mask = block_id == bid
+            br, bc = block_r[mask][0], block_c[mask][0]
+            block = self._block(int(br), int(bc))
+            values[mask] = block[rows[mask] - br * self.block_rows, cols[mask] - bc * self.block_cols]
+        values[(values < 0) | (values >= N_CLASSES)] = 0
+        if self.nodata is not None:
+            values[values == self.nodata] = 0
+        return values
+
+    def sample_many(self, lats, lons, buffer_m=30.0):
+        """
+        Vectorized texture lookup for many points.
+
+        Args:
+            lats (array-like): Latitudes in decimal degrees
+            lons (array-like): Longitudes in decimal degrees
+            buffer_m (float): Radius of the neighbourhood around each point
+
+        Returns:
+            (codes, histograms): modal class per point (0 where there is no data)
+            and an (n, 13) array of pixel counts per class code.
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        rows, cols = rasterio.transform.rowcol(self.transform, lons, lats)
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+        dr, dc = self._pixel_offsets(buffer_m, float(np.mean(lats)) if len(lats) else 0.0)
+        all_rows = rows[:, None] + dr[None, :]
+        all_cols = cols[:, None] + dc[None, :]
+        inside = ((all_rows >= 0) & (all_rows < self.dataset.height)
+                  & (all_cols >= 0) & (all_cols < self.dataset.width))
+
+        values = np.zeros(all_rows.shape, dtype=np.int64)
+        values[inside] = self._gather(all_rows[inside], all_cols[inside])
+
+        point_idx = np.repeat(np.arange(len(lats)), values.shape[1])
+        histograms = np.bincount(point_idx * N_CLASSES + values.ravel(), minlength=len(lats) * N_CLASSES)
+        histograms = histograms.reshape(len(lats), N_CLASSES)
+        histograms[:, 0] = 0
+        codes = histograms.argmax(axis=1)
+        codes[histograms.sum(axis=1) == 0] = 0
+        return codes, histograms
+
+    def sample(self, lat, lon, buffer_m=30.0):
+        """Return the SoilSample around one point, or None where the raster has no data."""
+        codes, histograms = self.sample_many([lat], [lon], buffer_m)
+        if codes[0] == 0:
+            return None
+        histogram = {SOIL_TEXTURES[code]: int(count)
+                     for code, count in enumerate(histograms[0]) if code and count}
+        return SoilSample(code=int(codes[0]), histogram=histogram)
@@ -0,0 +1,88 @@
+import time
+from collections import Counter, OrderedDict
+
+DEFAULT_MAX_ENTRIES = 4
+
+
+class StageGraph:
+    """
+    Memoized pipeline of named stages.
+
+    A stage is a function of some named inputs and of the outputs of its
+    upstream stages. Its result is stored under a key made of those input
+    values and the keys of the upstream stages, so changing an input only
+    reruns the stages downstream of it. Hits, misses and compute time are
+    counted per stage.
+
+    Args:
+        max_entries (int): Results kept per stage, least recently used dropped first
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._stages = {}
+        self._results = {}
+        self.hits = Counter()
+        self.misses = Counter()
+        self.seconds = Counter()
+
+    def add(self, name, func, inputs=(), upstream=()):
+        """
+        Register a stage.
+
+        Args:
+            name (str): Stage name, also the keyword its output is passed under downstream
+            func (callable): Called with the stage's inputs and upstream outputs as keywords
+            inputs (tuple): Names of the input values the stage depends on
+            upstream (tuple): Names of the stages whose outputs it consumes
+        """
+        for dependency in upstream:
+            if dependency not in self._stages:
+                raise ValueError(f"stage {name!r} depends on unknown stage {dependency!r}")
+        self._stages[name] = (func, tuple(inputs), tuple(upstream))
+        self._results[name] = OrderedDict()
+
+    def key(self, name, values):
+        """Memo key of a stage for the given input values."""
+        _, inputs, upstream = self._stages[name]
+        missing = [input_name for input_name in inputs if input_name not in values]
+        if missing:
+            raise KeyError(f"stage {name!r} needs input(s) {', '.join(missing)}")
+        return (tuple(values[input_name] for input_name in inputs),
+                tuple(self.key(dependency, values) for dependency in upstream))
+
+    def get(self, name, **values):
+        """Output of a stage, computing it and any stale upstream stages as needed."""
+        key = self.key(name, values)
+        results = self._results[name]
+        if key in results:
+            results.move_to_end(key)
+            self.hits[name] += 1
+            return results[key]
+
+        func, inputs, upstream = self._stages[name]
+        arguments = {input_name: values[input_name] for input_name in inputs}
+        for dependency in upstream:
+            arguments[dependency] = self.get(dependency, **values)
+
+        start = time.perf_counter()
+        output = func(**arguments)
+        self.seconds[name] += time.perf_counter() - start
+        self.misses[name] += 1
+
+        results[key] = output
+        while len(results) > self.max_entries:
+            results.popitem(last=False)
+        return output
+
+    def clear(self, name=None):
+        """Drop the stored results of one stage, or of every stage."""
+        for stage in ([name] if name else self._stages):
+            self._results[stage].clear()
+
+    def stats(self):
+        """Hit and miss counts and total compute seconds per stage, in registration order."""
+        return {
+            name: {"hits": self.hits[name], "misses": self.misses[name], "seconds": round(self.seconds[name], 3)}
+            for name in self._stages
+        }
@@ -0,0 +1,202 @@
+"""
+Monte Carlo propagation of coefficient uncertainty.
+
+The sampling distribution of a formulation's coefficients is read from a
+file next to its coefficient CSV, first match wins:
+
+    <stem>_bootstrap.csv  coefficient CSV layout plus a `replicate` column;
+                          samples are drawn from the replicates
+    <stem>_cov.npy        covariance shaped (soil, rootdepth, WTD, response,
+                          term, term) in the compiled tensor's axis order
+    <stem>_se.csv         coefficient CSV layout holding standard errors;
+                          terms are sampled independently
+
+All samples for one soil and rooting depth are evaluated as one batched
+matrix product, or in chunks of at most `max_bytes` of float64
+intermediates. The float32 responses of every sample are kept for the
+quantiles either way, so memory still grows with the number of samples.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from coefficients import coefficients_path
+from model_engine import RESPONSES, coefficient_tensor, wtd_label
+
+DEFAULT_SAMPLES = 2000
+BAND_QUANTILES = (0.05, 0.5, 0.95)
+# ModelResult field -> column of the results frame
+RESULT_COLUMNS = {"lai": "LAIcalc", "aet": "aetcalc", "aetgw": "aetgwcalc", "gwsubs": "gwsubscalc"}
+
+
+def _engine_tensor(engine, dfcoeffs):
+    """Pivot a table in the coefficient CSV layout and check it lines up with the engine's axes."""
+    tensor, soils, root_depths, wtds = coefficient_tensor(dfcoeffs, terms=engine.formulation.terms)
+    if (soils, root_depths, tuple(wtds)) != (engine.soils, engine.root_depths, engine.wtds):
+        raise ValueError("uncertainty table does not cover the same soils, rooting depths and WTDs as the model")
+    return tensor
+
+
+class CoefficientUncertainty:
+    """
+    Sampling distribution of a model's coefficients.
+
+    Either `factor` or `replicates` is given.
+
+    Args:
+        engine (ModelEngine): Model whose coefficients are perturbed
+        factor (np.ndarray): Matrix square roots of the coefficient covariance,
+            shaped (soil, rootdepth, WTD, response, term, term)
+        replicates (np.ndarray): Bootstrap coefficient sets shaped
+            (replicate, soil, rootdepth, WTD, response, term)
+        source (str): Description of where the distribution came from
+    """
+
+    def __init__(self, engine, factor=None, replicates=None, source=""):
+        if (factor is None) == (replicates is None):
+            raise ValueError("give exactly one of factor or replicates")
+        self.engine = engine
+        self.factor = factor
+        self.replicates = replicates
+        self.source = source
+
+    @classmethod
+    def from_standard_errors(cls, engine, dfse, source="standard errors"):
+        """Independent normal terms from a table of standard errors."""
+        se = np.nan_to_num(_engine_tensor(engine, dfse))
+        factor = se[..., :, None] * np.eye(se.shape[-1])
+        return cls(engine, factor=factor, source=source)
+
+    @classmethod
+    def from_covariance(cls, engine, covariance, source="covariance"):
+        """Correlated normal terms from covariance matrices (NaN rows are treated as exact)."""
+        covariance = np.nan_to_num(np.asarray(covariance, dtype=np.float64))
+        if covariance.shape != engine.coefficients.shape + engine.coefficients.shape[-1:]:
+            raise ValueError(f"covariance shaped {covariance.shape}, expected "
+                             f"{engine.coefficients.shape + engine.coefficients.shape[-1:]}")
+        # Symmetric square root: valid for positive semi-definite and all-zero matrices alike
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))[..., None, :]
+        return cls(engine, factor=factor, source=source)
+
+    @classmethod
+    def from_bootstrap(cls, engine, dfboot, source="bootstrap replicates"):
+        """Resample whole coefficient sets from bootstrap replicates."""
+        replicates = np.stack([_engine_tensor(engine, group) for _, group in dfboot.groupby("replicate")])
+        return cls(engine, replicates=replicates, source=source)
+
+    @classmethod
+    def open_default(cls, engine):
+        """Load the uncertainty file shipped next to the engine's coefficients, or return None if there is none."""
+        stem = os.path.splitext(coefficients_path(engine.name))[0]
+        if os.path.exists(f"{stem}_bootstrap.csv"):
+            return cls.from_bootstrap(engine, pd.read_csv(f"{stem}_bootstrap.csv"),
+                                      source=os.path.basename(f"{stem}_bootstrap.csv"))
+        if os.path.exists(f"{stem}_cov.npy"):
+            return cls.from_covariance(engine, np.load(f"{stem}_cov.npy"), source=os.path.basename(f"{stem}_cov.npy"))
+        if os.path.exists(f"{stem}_se.csv"):
+            return cls.from_standard_errors(engine, pd.read_csv(f"{stem}_se.csv"),
+                                            source=os.path.basename(f"{stem}_se.csv"))
+        return None
+
+    def sample(self, n, soil, rootdepth, rng):
+        """
+        Draw coefficient sets for one soil and rooting depth.
+
+        Returns:
+            Array shaped (n, WTD, response, term).
+        """
+        s = self.engine.soils.index(soil)
+        r = self.engine.root_depths.index(float(rootdepth))
+        if self.replicates is not None:
+            return self.replicates[rng.integers(0, len(self.replicates), n), s, r]
+        mean = self.engine.coefficients[s, r]
+        z = rng.standard_normal((n,) + mean.shape)
+        return mean + np.einsum("wkij,nwkj->nwki", self.factor[s, r], z)
+
+
+@dataclass(frozen=True)
+class UncertaintyBands:
+    """
+    Quantiles of the sampled responses.
+
+    `bands` holds, per ModelResult field, the quantiles of every WTD and year
+    shaped (quantile, WTD, year); `median_bands` the quantiles of each
+    sample's median over the years, shaped (quantile, WTD).
+    """
+    quantiles: tuple
+    wtds: tuple
+    n_samples: int
+    bands: dict
+    median_bands: dict
+
+    def to_frame(self, years):
+        """Time-series bands with wy, WTD, wtd2 and <column>_lo/_mid/_hi columns."""
+        n_wtd, n_years = len(self.wtds), len(years)
+        frame = pd.DataFrame({
+            "wy": np.tile(np.asarray(years), n_wtd),
+            "WTD": np.repeat(self.wtds, n_years),
+            "wtd2": np.repeat([wtd_label(wtd) for wtd in self.wtds], n_years),
+        })
+        for field, column in RESULT_COLUMNS.items():
+            for suffix, band in zip(("lo", "mid", "hi"), self.bands[field]):
+                frame[f"{column}_{suffix}"] = band.reshape(-1)
+        return frame
+
+    def median_frame(self):
+        """Bands of the median over the water years, one row per WTD."""
+        frame = pd.DataFrame({"WTD": self.wtds, "wtd2": [wtd_label(wtd) for wtd in self.wtds]})
+        for field, column in RESULT_COLUMNS.items():
+            for suffix, band in zip(("lo", "mid", "hi"), self.median_bands[field]):
+                frame[f"{column}_{suffix}"] = band
+        return frame
+
+
+def propagate(engine, uncertainty, pr, eto, soil, rootdepth, n_samples=DEFAULT_SAMPLES, quantiles=BAND_QUANTILES,
+              seed=0, max_bytes=None):
+    """
+    Evaluate the model for sampled coefficients and summarize the spread.
+
+    Args:
+        engine (ModelEngine): Model to evaluate
+        uncertainty (CoefficientUncertainty): Coefficient distribution
+        pr (array-like): Annual precipitation (mm), shaped (year,)
+        eto (array-like): Annual reference ET (mm), shaped (year,)
+        soil (str): Soil type
+        rootdepth (float): Rooting depth (m)
+        n_samples (int): Number of coefficient sets
+        quantiles (tuple): Lower, middle and upper quantile of the bands
+        seed (int): Random seed; the draws do not depend on the chunk size
+        max_bytes (int): Upper bound on the float64 matrix product and
+            postprocess results of one chunk, or None to evaluate every
+            sample in one batch. The float32 samples of every field
+            (4 x n_samples x WTD x year) are kept regardless.
+
+    Returns:
+        UncertaintyBands
+    """
+    features = engine.formulation.features(pr, eto)
+    n_years = features.shape[0]
+    n_wtd = len(engine.wtds)
+    chunk = n_samples
+    if max_bytes is not None:
+        chunk = max(1, min(n_samples, max_bytes // (n_wtd * len(RESPONSES) * n_years * 8)))
+
+    rng = np.random.default_rng(seed)
+    samples = {field: np.empty((n_samples, n_wtd, n_years), dtype=np.float32) for field in RESULT_COLUMNS}
+    for start in range(0, n_samples, chunk):
+        stop = min(start + chunk, n_samples)
+        coefficients = uncertainty.sample(stop - start, soil, rootdepth, rng)
+        # (sample, WTD, response, term) @ (term, year) -> (sample, WTD, response, year)
+        result = engine.postprocess(coefficients @ features.T)
+        for field in RESULT_COLUMNS:
+            samples[field][start:stop] = getattr(result, field)
+
+    bands, median_bands = {}, {}
+    for field, values in samples.items():
+        bands[field] = np.quantile(values, quantiles, axis=0)
+        median_bands[field] = np.quantile(np.median(values, axis=-1), quantiles, axis=0)
+    return UncertaintyBands(quantiles=tuple(quantiles), wtds=engine.wtds, n_samples=n_samples, bands=bands,
+                            median_bands=median_bands)
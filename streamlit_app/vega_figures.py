@@ -0,0 +1,252 @@
+"""
+Vega-Lite specs of the results charts, drawn in the browser.
+
+The same charts as result_figures, as JSON specs for st.vega_lite_chart:
+the browser lays out, draws and adds hover tooltips, and the server only
+ships the data. Every data set travels once, as columns (one row of
+equal-length arrays under the spec's "datasets"), and each layer that uses
+it turns it back into rows with a flatten transform.
+
+The PDF report keeps its server-rendered SVGs; CHART_BACKENDS names the
+on-screen choices, selected per deployment by the app.
+"""
+import numpy as np
+
+from result_figures import uncertainty_frames
+from result_summaries import first_by_group, group_labels, percent_over
+
+SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+# On-screen chart backends: Vega-Lite specs drawn by the browser, or PNGs rendered on the server
+CHART_BACKENDS = ("vega-lite", "png")
+DEFAULT_CHART_BACKEND = "vega-lite"
+CHART_HEIGHT = 320
+# Decimals kept in the shipped data
+DATA_DECIMALS = 3
+# Vega's counterpart of the YlGnBu distiller scale, and the plotnine line types as stroke dashes
+COLOR_SCHEME = "yellowgreenblue"
+STROKE_DASHES = ([1, 0], [6, 4], [6, 3, 1, 3], [1, 3], [5, 1, 1, 1, 1, 1])
+BAR_WIDTH = 0.9
+EXPAND = 0.05
+
+YEAR = {"field": "wy", "type": "quantitative", "title": "Water Year", "axis": {"format": "d"},
+        "scale": {"zero": False}}
+
+
+def column_values(values):
+    """A column as a JSON list: floats rounded to DATA_DECIMALS, missing values as null."""
+    values = np.asarray(values)
+    if values.dtype.kind not in "fiu":
+        return [str(value) for value in values]
+    values = np.round(values.astype(np.float64), DATA_DECIMALS)
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+def columns(**arrays):
+    """A data set as one row of equal-length columns."""
+    return [{name: column_values(values) for name, values in arrays.items()}]
+
+
+def layer(dataset, fields, mark, encoding, transform=()):
+    """A layer reading a columnar data set by name and flattening it back into rows."""
+    return {"data": {"name": dataset}, "transform": [{"flatten": list(fields)}, *transform], "mark": mark,
+            "encoding": encoding}
+
+
+def datum_layer(mark, encoding):
+    """A layer drawn once from constant positions, e.g. a label or a target line."""
+    return {"data": {"values": [{}]}, "mark": mark, "encoding": encoding}
+
+
+def title_lines(title):
+    return title.split("\n")
+
+
+def chart(title, datasets, layers, subtitle=""):
+    """A layered spec; `datasets` maps names to columnar data."""
+    spec = {
+        "$schema": SCHEMA,
+        "title": {"text": title_lines(title), "anchor": "start"},
+        "datasets": datasets,
+        "height": CHART_HEIGHT,
+        "layer": layers,
+    }
+    if subtitle:
+        spec["title"]["subtitle"] = subtitle
+    return spec
+
+
+def wb_color(legend_title):
+    """Potential water deficit colour scale; no legend when `legend_title` is None."""
+    color = {"field": "wb", "type": "quantitative", "scale": {"scheme": COLOR_SCHEME}}
+    if legend_title is None:
+        color["legend"] = None
+    else:
+        color["title"] = title_lines(legend_title)
+    return color
+
+
+def tooltip_field(field, title, field_type="quantitative"):
+    return {"field": field, "type": field_type, "title": title}
+
+
+def target_line(laithresh):
+    return datum_layer({"type": "rule", "opacity": 0.5}, {"y": {"datum": laithresh}})
+
+
+def balance_spec(summaries):
+    """Precipitation and negative ETo bars with the water balance line and points."""
+    pwdsum = summaries["pwdsum"]
+    fields = ("wy", "pr", "eto", "wb")
+    data = columns(wy=pwdsum["wy"], pr=pwdsum["pr"], eto=pwdsum["eto"], wb=pwdsum["wb"])
+    bar_x = [{"calculate": f"datum.wy - {BAR_WIDTH / 2}", "as": "x0"},
+             {"calculate": f"datum.wy + {BAR_WIDTH / 2}", "as": "x1"},
+             {"calculate": "-datum.eto", "as": "negative_eto"}]
+    y_title = "Annual Water Balance (mm)"
+
+    def bars(column, color):
+        return layer("balance", fields, {"type": "bar", "color": color, "opacity": 0.5}, {
+            "x": {**YEAR, "field": "x0"}, "x2": {"field": "x1"},
+            "y": {"field": column, "type": "quantitative", "title": y_title},
+        }, bar_x)
+
+    tooltip = [tooltip_field("wy", "Water Year"), tooltip_field("pr", "Precipitation (mm)"),
+               tooltip_field("eto", "Potential ET (mm)"), tooltip_field("wb", "Water Balance (mm)")]
+    return chart("Annual Precipitation, Potential ET, and Potential Water Deficit", {"balance": data}, [
+        bars("pr", "blue"),
+        bars("negative_eto", "brown"),
+        layer("balance", fields, {"type": "line", "color": "white"},
+              {"x": YEAR, "y": {"field": "wb", "type": "quantitative"}}),
+        layer("balance", fields, {"type": "circle", "opacity": 1}, {
+            "x": YEAR, "y": {"field": "wb", "type": "quantitative"},
+            "color": wb_color("Potential\nWater\nDeficit (mm)"), "tooltip": tooltip,
+        }),
+        datum_layer({"type": "text", "align": "left", "baseline": "top", "color": "brown", "fontSize": 12},
+                    {"x": {"datum": 1990}, "y": {"datum": summaries["mineto"]}, "text": {"value": "Potential ET"}}),
+        datum_layer({"type": "text", "align": "left", "baseline": "middle", "color": "blue", "fontSize": 12},
+                    {"x": {"datum": 1990}, "y": {"datum": summaries["maxp"]}, "text": {"value": "Precipitation"}}),
+    ])
+
+
+def series_spec(summaries, frame, column, bands, title, ylabel, hline=None, subtitle=""):
+    """`column` over the water years, one line type per WTD, points coloured by water deficit."""
+    labels = group_labels(summaries, frame)
+    fields = ("wy", "wtd", "value", "wb")
+    datasets = {"series": columns(wy=frame["wy"], wtd=frame["wtd2"], value=frame[column], wb=frame["wb"])}
+    y = {"field": "value", "type": "quantitative", "title": ylabel, "scale": {"zero": False}}
+    layers = []
+    if bands is not None:
+        band_frame = bands["series"][bands["series"]["wtd2"].isin(labels)]
+        datasets["bands"] = columns(wy=band_frame["wy"], wtd=band_frame["wtd2"], lo=band_frame[f"{column}_lo"],
+                                    hi=band_frame[f"{column}_hi"])
+        layers.append(layer("bands", ("wy", "wtd", "lo", "hi"), {"type": "area", "color": "grey", "opacity": 0.3}, {
+            "x": YEAR, "y": {"field": "lo", "type": "quantitative"}, "y2": {"field": "hi"},
+            "detail": {"field": "wtd", "type": "nominal"},
+        }))
+    layers += [
+        layer("series", fields, {"type": "line", "color": "black", "strokeWidth": 1}, {
+            "x": YEAR, "y": y,
+            "strokeDash": {"field": "wtd", "type": "nominal", "title": ["Water Table", "Depth"],
+                           "scale": {"domain": labels, "range": list(STROKE_DASHES[:len(labels)])}},
+        }),
+        layer("series", fields, {"type": "circle", "opacity": 1}, {
+            "x": YEAR, "y": y, "color": wb_color("Annual\nPotential\nWater\nDeficit (mm)"),
+            "tooltip": [tooltip_field("wy", "Water Year"), tooltip_field("wtd", "Water Table Depth", "nominal"),
+                        tooltip_field("value", ylabel), tooltip_field("wb", "Water Balance (mm)")],
+        }),
+    ]
+    if hline is not None:
+        layers.append(target_line(hline))
+    return chart(title, datasets, layers, subtitle)
+
+
+def box_spec(summaries, frame, column, bands, range_labels, ylim, title, ylabel, hline=None, subtitle=""):
+    """`column` as one boxplot per WTD with the years as points, labelled above with `range_labels`."""
+    labels = group_labels(summaries, frame)
+    fields = ("wtd", "value", "wb")
+    lo, hi = ylim
+    pad = (hi - lo) * EXPAND
+    x = {"field": "wtd", "type": "nominal", "title": "Water Table Depth", "sort": labels, "axis": {"labelAngle": 0}}
+    y = {"field": "value", "type": "quantitative", "title": ylabel,
+         "scale": {"domain": [lo - pad, hi + pad], "nice": False}}
+    datasets = {
+        "box": columns(wtd=frame["wtd2"], value=frame[column], wb=frame["wb"]),
+        "labels": columns(wtd=labels, label=[str(range_labels[label]) for label in labels]),
+    }
+    layers = [
+        layer("box", fields, {
+            "type": "boxplot", "extent": 1.5, "clip": True, "box": {"fill": "white", "stroke": "#333333"},
+            "median": {"color": "#333333", "strokeWidth": 2}, "rule": {"color": "#333333"}, "ticks": False,
+            "outliers": {"color": "black"},
+        }, {"x": x, "y": y}),
+        layer("box", fields, {"type": "circle", "opacity": 1, "clip": True}, {
+            "x": x, "y": y, "color": wb_color(None),
+            "tooltip": [tooltip_field("wtd", "Water Table Depth", "nominal"), tooltip_field("value", ylabel),
+                        tooltip_field("wb", "Water Balance (mm)")],
+        }),
+        layer("labels", ("wtd", "label"), {"type": "text", "fontSize": 12},
+              {"x": x, "y": {"datum": hi}, "text": {"field": "label", "type": "nominal"}}),
+    ]
+    if bands is not None:
+        medians = bands["medians"][bands["medians"]["wtd2"].isin(labels)]
+        datasets["medians"] = columns(wtd=medians["wtd2"], lo=medians[f"{column}_lo"], hi=medians[f"{column}_hi"])
+        layers.append(layer("medians", ("wtd", "lo", "hi"), {"type": "errorbar", "color": "red", "ticks": True}, {
+            "x": x, "y": {"field": "lo", "type": "quantitative"}, "y2": {"field": "hi"},
+        }))
+    if hline is not None:
+        layers.append(target_line(hline))
+    return chart(title, datasets, layers, subtitle)
+
+
+def build_vega_specs(summaries, uncertainty=None):
+    """
+    Vega-Lite specs of the results charts.
+
+    Args:
+        summaries (dict): Output of result_summaries.summarize_results
+        uncertainty (UncertaintyBands): Coefficient uncertainty drawn as bands
+            on the time series and intervals on the boxplots, or None
+
+    Returns:
+        dict of spec dicts keyed by the names in PLOT_NAMES, except the LAI
+        plots (see build_vega_lai_specs).
+    """
+    bands = uncertainty_frames(summaries, uncertainty)
+    aet2 = summaries["aet2"]
+    gwsubs2 = summaries["gwsubs2"]
+    aetgw2 = summaries["aetgw2"]
+    return {
+        "pwd1": balance_spec(summaries),
+        "aet1": series_spec(summaries, aet2, "aetcalc", bands, "Timeseries of Annual Actual\nEvapotranspiration (mm)",
+                            "Annual Actual Evapotranspiration (mm)"),
+        "aet2": box_spec(summaries, aet2, "aetcalc", bands, first_by_group(aet2, "rangelab"),
+                         (summaries["minaet"], summaries["maxaet1"]), "Range of Annual\nActual ET (mm)",
+                         "Annual Actual Evapotranspiration (mm)"),
+        "gwsubs1": series_spec(summaries, gwsubs2, "gwsubscalc", bands,
+                               "Timeseries of Annual Groundwater\nSubsidy (% of Actual ET)",
+                               "Annual Groundwater Subsidy (mm)"),
+        "gwsubs2": box_spec(summaries, gwsubs2, "gwsubscalc", bands, first_by_group(gwsubs2, "rangelabperc"),
+                            (summaries["mingwsubs"], summaries["maxgwsubs1"]),
+                            "Range of Annual Groundwater\nSubsidy (% of Actual ET)", "Annual Groundwater Subsidy (mm)"),
+        "aetgw1": series_spec(summaries, aetgw2, "aetgwcalc", bands,
+                              "Timeseries of Annual Groundwater ET\n(% of Actual ET)",
+                              "Annual Actual Evapotranspiration-Groundwater (mm)"),
+        "aetgw2": box_spec(summaries, aetgw2, "aetgwcalc", bands, first_by_group(aetgw2, "rangelabperc"),
+                           (summaries["minaetgw"], summaries["maxaetgw1"]),
+                           "Range of Annual Groundwater\nET (% of Actual ET)",
+                           "Annual Actual Evapotranspiration-Groundwater (mm)"),
+    }
+
+
+def build_vega_lai_specs(summaries, laithresh, uncertainty=None):
+    """Vega-Lite specs of the LAI time series and boxplot for one management-target LAI."""
+    bands = uncertainty_frames(summaries, uncertainty)
+    lai2 = summaries["lai2"]
+    overthresh = percent_over(summaries, laithresh).set_index("wtd2")["percoverthresh"]
+    return {
+        "lai1": series_spec(summaries, lai2, "LAIcalc", bands, "Timeseries of Annual Maximum\nLeaf Area Index (LAI)",
+                            "Annual Maximum Leaf Area Index (LAI)", hline=laithresh,
+                            subtitle=f"Ex. Management Target, LAI={laithresh:g}"),
+        "lai2": box_spec(summaries, lai2, "LAIcalc", bands, overthresh, (summaries["minlai"], summaries["maxlai1"]),
+                         f"% Years over\nManagement Target, LAI={laithresh:g}", "Annual Maximum Leaf Area Index (LAI)",
+                         hline=laithresh),
+    }
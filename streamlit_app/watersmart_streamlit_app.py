@@ -1,49 +1,67 @@
 import streamlit as st
 import ee
 import folium
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import json
+import os
 import base64
 import io
 import imgkit
 import requests
 from datetime import date
-from matplotlib.backends.backend_pdf import PdfPages
 from textwrap import wrap
 from matplotlib import rcParams
-from pdf2image import convert_from_bytes
 from staticmap import StaticMap, CircleMarker, IconMarker
-from plotnine import labs
 
-from plotnine import *
-from plotnine import labs
-import matplotlib.pyplot as plt
 from streamlit_folium import st_folium
 from google.oauth2 import service_account
 from ee import oauth
-from io import BytesIO
 from io import StringIO
 from PIL import Image
 from PIL import ImageDraw, ImageFont, Image
 from textwrap import wrap
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
-
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_LEFT
-
-from reportlab.platypus import Image as reportImage
 
 from app_def.components.header import render_header
 from app_def.components.footer import render_footer
 from app_def.content.definitions import render_definitions
 from definitions_references import definitions_text
+from point_data import fetch_point_data
+from point_cache import PointCache
+from climate_cube import ClimateCube
+from basin_index import BasinIndex
+from basin_summaries import BasinSummaries
+from soil_raster import SoilRaster
+from map_layers import DEFAULT_REFRESH_SECONDS, LAYER_ASSETS, LAYER_OPACITY, LAYER_VIS_PARAMS, MapIdCache
+from ee_model import MODEL_LAYERS
+from ee_model import layer_request as model_layer_request
+from model_rasters import model_layers, render_overlay
+from coefficients import load_engine
+from critical_wtd import DEFAULT_PERCENT as CRITICAL_PERCENT
+from critical_wtd import critical_wtd
+from figure_cache import SCREEN_DPI, FigureCache, cached_figures, iter_cached_figures
+from figure_pool import DEFAULT_WORKERS, FigurePool
+from grids import GRIDMET
+from model_engine import DEFAULT_FORMULATION, FREE_DRAIN_WTD, WTD_TABLE_STEP, lai_threshold
+from report_pdf import DPI, REPORT_FIGURE_SIZES, build_report
+from native_figures import DEFAULT_RENDERER, RENDERERS
+from result_figures import LAI_PLOT_NAMES, PLOT_NAMES, draw_figures
+from result_summaries import summarize_results
+from scenarios import SCENARIO_SURFACES, scenario_heatmap, scenario_surfaces
+from stage_graph import StageGraph
+from uncertainty import DEFAULT_SAMPLES, CoefficientUncertainty, propagate
+from vega_figures import DEFAULT_CHART_BACKEND, build_vega_lai_specs, build_vega_specs
 
 # GLOBAL PATHS
-PATH_COEFFICIENTS = 'https://raw.githubusercontent.com/ankshah131/WaterSMART_App/main/streamlit_app/MixedEffectsModelCoefficients102924_ppetquad.csv'
+# Model formulation from the registry in model_engine.py, selectable per deployment
+MODEL_FORMULATION = os.environ.get("WATERSMART_MODEL", DEFAULT_FORMULATION)
+# Results chart renderer from native_figures.RENDERERS ("native" matplotlib templates or "plotnine")
+FIGURE_RENDERER = os.environ.get("WATERSMART_FIGURE_RENDERER", DEFAULT_RENDERER)
+# On-screen results charts from vega_figures.CHART_BACKENDS: "vega-lite" specs drawn in the browser, or server "png"s
+# (the PDF report always embeds server-rendered SVGs)
+CHART_BACKEND = os.environ.get("WATERSMART_CHART_BACKEND", DEFAULT_CHART_BACKEND)
+# Worker processes rendering server-side charts; 0 renders them on the script thread, as does the plotnine renderer
+FIGURE_WORKERS = int(os.environ.get("WATERSMART_FIGURE_WORKERS", DEFAULT_WORKERS))
 PATH_SOIL_TEXTURE_LEGEND = "https://raw.githubusercontent.com/ankshah131/WaterSMART_App/57bbbf9d71e4ab39bc39f6b86699799a94efc283/streamlit_app/app_def/assets/images/soil_texture_logo.png"
 PATH_MAP_LEGENDS = "https://raw.githubusercontent.com/ankshah131/WaterSMART_App/eda53037fde15d64cc1f2e89d543174888a8223c/streamlit_app/app_def/assets/images/map_legends.png"
 PATH_LOGOS = "https://raw.githubusercontent.com/ankshah131/WaterSMART_App/c490a2622b103eec28df2371dfabcc2c45b439b9/streamlit_app/app_def/assets/logos.png"
@@ -72,11 +90,87 @@ def get_auth():
 
 get_auth()
 
+
+@st.cache_resource
+def get_map_id_cache():
+    """Tile URLs for the overlay layers, shared by every session and kept fresh in the background."""
+    cache = MapIdCache()
+    cache.prewarm()
+    cache.start_refresher()
+    return cache
+
+
+# Request every overlay layer once at startup so toggling layers never waits on Earth Engine;
+# layers that fail here are requested again when first drawn
+get_map_id_cache()
+
+
+def get_model_engine():
+    """Model engine for the bundled coefficients; compiled once per process, see coefficients.reload_coefficients."""
+    return load_engine(MODEL_FORMULATION)
+
+
+@st.cache_resource
+def get_point_cache():
+    """One persistent point cache per process, shared by every session."""
+    return PointCache()
+
+
+@st.cache_resource
+def get_climate_cube():
+    """The bundled Nevada climate cube, or None when it has not been built."""
+    return ClimateCube.open_default()
+
+
+@st.cache_resource
+def get_basin_index():
+    """The bundled administrative basin polygons, or None when they have not been exported."""
+    return BasinIndex.open_default()
+
+
+@st.cache_resource
+def get_soil_raster():
+    """The bundled Nevada soil texture COG, or None when it has not been exported."""
+    return SoilRaster.open_default()
+
+@st.cache_resource
+def get_coefficient_uncertainty():
+    """Sampling distribution of the model coefficients, or None when none is shipped with them."""
+    return CoefficientUncertainty.open_default(get_model_engine())
+
+
+@st.cache_resource
+def get_basin_summaries():
+    """Precomputed whole-basin model distributions, or None when the table has not been built."""
+    return BasinSummaries.open_default()
+
+
+@st.cache_resource
+def get_model_layers():
+    """Statewide model summary rasters built by model_rasters.py, offered as extra map layers."""
+    return model_layers()
+
+
+@st.cache_resource
+def get_model_overlay(label):
+    """Coloured PNG and bounds of one model raster layer, rendered once per process."""
+    return render_overlay(*get_model_layers()[label])
+
+@st.cache_resource(ttl=DEFAULT_REFRESH_SECONDS)
+def get_model_layer_url(label, rootdepth, wtd, model_name, model_version):
+    """Tile URL of a model layer evaluated by Earth Engine for every pixel, shared by every session."""
+    image, vis_params = model_layer_request(label, get_model_engine(), rootdepth, wtd)
+    return ee.Image(image).getMapId(vis_params)['tile_fetcher'].url_format
+
 # Add Earth Engine layer support to folium
 def add_ee_layer(self, ee_image_object, vis_params, name):
     map_id_dict = ee.Image(ee_image_object).getMapId(vis_params)
+    add_tile_layer(self, map_id_dict['tile_fetcher'].url_format, name)
+
+
+def add_tile_layer(self, url_format, name):
     folium.raster_layers.TileLayer(
-        tiles=map_id_dict['tile_fetcher'].url_format,
+        tiles=url_format,
         attr='Google Earth Engine',
         name=name,
         overlay=True,
@@ -85,21 +179,6 @@ def add_ee_layer(self, ee_image_object, vis_params, name):
     ).add_to(self)
 
 
-def crop_pdf_to_letter(pdf_buffer):
-    reader = PdfReader(pdf_buffer)
-    writer = PdfWriter()
-    for page in reader.pages:
-        # Force exact US Letter size in points (8.5 x 11 inches)
-        page.mediabox.lower_left = (0, 0)
-        page.mediabox.upper_right = (612, 792)
-        writer.add_page(page)
-
-    output = BytesIO()
-    writer.write(output)
-    output.seek(0)
-    return output
-
-
 # ---- Static map renderer ----
 def create_map_snapshot(lat, lon, zoom=8):
     m = StaticMap(400, 300)
@@ -112,6 +191,198 @@ def create_map_snapshot(lat, lon, zoom=8):
     img_buffer.seek(0)
     return img_buffer
 
+def report_logo():
+    """Project logos for the last report page as PNG bytes, or None when they cannot be fetched."""
+    logo_png = None
+    try:
+        img_response = requests.get(PATH_LOGOS)
+        img_response.raise_for_status()
+
+        # Open with PIL and convert to RGB
+        pil_img = Image.open(io.BytesIO(img_response.content)).convert("RGB")
+
+        # Save to byte array in PNG format
+        img_byte_arr = io.BytesIO()
+        pil_img.save(img_byte_arr, format='PNG')
+        logo_png = img_byte_arr.getvalue()
+    except Exception as e:
+        st.error(f"[ERROR] Failed to load image from URL: {e}")
+    return logo_png
+
+
+def show_chart(chart, slot=st):
+    """One results chart, in `slot` if given: a Vega-Lite spec drawn by the browser, or PNG bytes from the server."""
+    if CHART_BACKEND == "vega-lite":
+        slot.vega_lite_chart(spec=chart, use_container_width=True)
+    else:
+        slot.image(chart, use_container_width=True)
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Rendered result figures shared by every session, bounded in memory."""
+    return FigureCache()
+
+
+@st.cache_resource
+def get_figure_pool():
+    """Warm worker processes rendering native figures off the script thread, or None to render on it."""
+    return FigurePool(FIGURE_WORKERS) if FIGURE_WORKERS > 0 and FIGURE_RENDERER == "native" else None
+
+
+# Inputs every result figure depends on
+FIGURE_INPUTS = ("lat", "lon", "model", "soil", "rootdepth", "custom_wtd", "show_uncertainty")
+# Results plots that do not show the management target
+NON_LAI_PLOT_NAMES = tuple(name for name in PLOT_NAMES if name not in LAI_PLOT_NAMES)
+
+
+def figure_context(lat, lon, model, soil, rootdepth, custom_wtd, show_uncertainty, laithresh=None):
+    """Figure cache key prefix; figures only see the climate of the point's GRIDMET cell."""
+    return (GRIDMET.cell(lat, lon), model, soil, rootdepth, custom_wtd, show_uncertainty, laithresh)
+
+
+def build_result_plots(summaries, uncertainty_bands, laithresh):
+    return RENDERERS[FIGURE_RENDERER][0](summaries, uncertainty_bands)
+
+
+# The two LAI plots are the only ones showing the management target, so the slider only redraws them
+def build_result_lai_plots(summaries, uncertainty_bands, laithresh):
+    return RENDERERS[FIGURE_RENDERER][1](summaries, laithresh, uncertainty_bands)
+
+
+def stream_figures(graph, inputs):
+    """
+    Screen PNGs of the results charts as (name, bytes) pairs, in the order they are ready.
+
+    Cached charts come at once and the others as the figure pool finishes them.
+    """
+    summaries = graph.get("summaries", **inputs)
+    uncertainty_bands = graph.get("uncertainty_bands", **inputs)
+    values = {name: inputs[name] for name in FIGURE_INPUTS}
+    laithresh = inputs["laithresh"]
+    return iter_cached_figures(get_figure_cache(), [
+        (figure_context(**values), NON_LAI_PLOT_NAMES,
+         lambda: build_result_plots(summaries, uncertainty_bands, None)),
+        (figure_context(**values, laithresh=laithresh), LAI_PLOT_NAMES,
+         lambda: build_result_lai_plots(summaries, uncertainty_bands, laithresh)),
+    ], SCREEN_DPI, pool=get_figure_pool())
+
+
+def build_results_graph():
+    """
+    Stages of the results page: point data -> climate -> model cube -> results -> summaries -> figures -> report.
+
+    Inputs are lat, lon, model (engine name and version), soil, rootdepth,
+    laithresh, custom_wtd, show_uncertainty and date; each stage reruns only when one of the inputs it depends on changes.
+    """
+    graph = StageGraph()
+
+    # Climate normals, basin, soil class and water-year series (cached per grid cell)
+    graph.add("point_data", lambda lat, lon: fetch_point_data(
+        lat, lon, cache=get_point_cache(), cube=get_climate_cube(), basins=get_basin_index(), soil=get_soil_raster()
+    ), inputs=("lat", "lon"))
+
+    def climate(point_data):
+        dfclimate = point_data.climate_frame()
+
+        # Calculate annual water balance variables
+        dfclimate['eto2'] = dfclimate['eto'] /10  # divide ‘eto’ by 10
+        dfclimate['pr2'] = dfclimate['pr'] ** 2  # Square of 'pr'
+        dfclimate['pet2'] = dfclimate['eto2'] ** 2  # Square of ‘eto’/10'
+        return dfclimate
+
+    graph.add("climate", climate, upstream=("point_data",))
+
+    # Every soil x rooting depth x WTD combination; soil and rooting depth changes only slice it
+    graph.add("model_cube", lambda model, climate: get_model_engine().evaluate_location(
+        climate['pr'].to_numpy(), climate['eto'].to_numpy()
+    ), inputs=("model",), upstream=("climate",))
+
+    # LAI, AET, AETgw and GW subsidy (from AET differences to free drain) for every WTD
+    def results(model, soil, rootdepth, custom_wtd, model_cube, climate):
+        engine = get_model_engine()
+        if custom_wtd is None:
+            return engine.slice(model_cube, soil, rootdepth).to_frame(climate)
+        # The modeled WTDs plus the requested one, gathered from the interpolation table
+        depths = sorted({wtd for wtd in engine.wtds if wtd != FREE_DRAIN_WTD} | {custom_wtd})
+        return engine.evaluate_depths(
+            climate['pr'].to_numpy(), climate['eto'].to_numpy(), soil, rootdepth, depths
+        ).to_frame(climate)
+
+    graph.add("results", results, inputs=("model", "soil", "rootdepth", "custom_wtd"),
+              upstream=("model_cube", "climate"))
+
+    graph.add("summaries", lambda results: summarize_results(results), upstream=("results",))
+    # Monte Carlo bands from sampled coefficients, only when the user asks for them
+    graph.add("uncertainty_bands", lambda model, soil, rootdepth, show_uncertainty, climate: propagate(
+        get_model_engine(), get_coefficient_uncertainty(), climate['pr'].to_numpy(), climate['eto'].to_numpy(),
+        soil, rootdepth
+    ) if show_uncertainty else None, inputs=("model", "soil", "rootdepth", "show_uncertainty"), upstream=("climate",))
+    # Rendered figures come from the cache shared by all sessions; plots are only built on a cache miss
+    def add_figure_stage(name, plot_names, build, dpi, sizes=None, inputs=(), fmt="png"):
+        def stage(summaries, uncertainty_bands, **values):
+            context = figure_context(**values)
+            return cached_figures(get_figure_cache(), context, plot_names,
+                                  lambda: build(summaries, uncertainty_bands, values.get("laithresh")), dpi, sizes,
+                                  get_figure_pool(), fmt)
+
+        graph.add(name, stage, inputs=FIGURE_INPUTS + inputs, upstream=("summaries", "uncertainty_bands"))
+
+    # On-screen PNGs are streamed straight from the cache and pool instead (see stream_figures); the report
+    # embeds SVGs as vector drawings, DPI only setting the resolution of their colour bars
+    add_figure_stage("report_figure_images", NON_LAI_PLOT_NAMES, build_result_plots, DPI, REPORT_FIGURE_SIZES,
+                     fmt="svg")
+    add_figure_stage("report_lai_figure_images", LAI_PLOT_NAMES, build_result_lai_plots, DPI, REPORT_FIGURE_SIZES,
+                     inputs=("laithresh",), fmt="svg")
+    # Vega-Lite specs for the browser; only data and layout, so they are cheap enough to keep per session
+    graph.add("chart_specs", lambda summaries, uncertainty_bands: build_vega_specs(summaries, uncertainty_bands),
+              upstream=("summaries", "uncertainty_bands"))
+    graph.add("lai_chart_specs", lambda laithresh, summaries, uncertainty_bands: build_vega_lai_specs(
+        summaries, laithresh, uncertainty_bands
+    ), inputs=("laithresh",), upstream=("summaries", "uncertainty_bands"))
+
+    # Deepest water table keeping LAI on target in most years, solved between the modeled WTDs
+    graph.add("critical_wtd", lambda model, soil, rootdepth, laithresh, climate: critical_wtd(
+        get_model_engine(), climate['pr'].to_numpy()[None], climate['eto'].to_numpy()[None], [soil], [rootdepth],
+        laithresh
+    )[0], inputs=("model", "soil", "rootdepth", "laithresh"), upstream=("climate",))
+
+    # Precipitation x ETo perturbation grid, evaluated in one pass
+    graph.add("scenarios", lambda model, soil, rootdepth, climate: scenario_surfaces(
+        get_model_engine(), climate['pr'].to_numpy(), climate['eto'].to_numpy(), soil, rootdepth
+    ), inputs=("model", "soil", "rootdepth"), upstream=("climate",))
+    # scenario_laithresh is None unless the exceedance surface is shown, so other surfaces ignore the slider
+    graph.add("scenario_image", lambda scenario_surface, scenario_laithresh, scenarios: draw_figures({
+        scenario_surface: scenario_heatmap(
+            scenarios if scenario_laithresh is None else scenarios.with_threshold(scenario_laithresh),
+            scenario_surface
+        )
+    })[scenario_surface], inputs=("scenario_surface", "scenario_laithresh"), upstream=("scenarios",))
+
+    graph.add("map_snapshot", lambda lat, lon: create_map_snapshot(lat, lon).getvalue(), inputs=("lat", "lon"))
+    graph.add("report_logo", report_logo)
+
+    # Cover page, chart pages and definitions laid out in one ReportLab pass
+    def report(lat, lon, soil, rootdepth, date, point_data, report_figure_images, report_lai_figure_images,
+               map_snapshot, report_logo):
+        return build_report(
+            date, lat, lon, soil, point_data.precip_value, point_data.eto_value, rootdepth,
+            point_data.basin_id, point_data.basin_name, {**report_figure_images, **report_lai_figure_images},
+            definitions_text, map_img_buffer=io.BytesIO(map_snapshot), logo_png=report_logo
+        )
+
+    graph.add("report", report, inputs=("lat", "lon", "soil", "rootdepth", "date"),
+              upstream=("point_data", "report_figure_images", "report_lai_figure_images", "map_snapshot",
+                        "report_logo"))
+    return graph
+
+
+def get_results_graph():
+    """The results page stage graph of this session, kept across reruns."""
+    if "results_graph" not in st.session_state:
+        st.session_state.results_graph = build_results_graph()
+    return st.session_state.results_graph
+
 # Text control
 # Set monospaced font globally
 
@@ -119,6 +390,7 @@ rcParams['font.family'] = 'arial'
 
 # Patch the folium.Map class
 folium.Map.add_ee_layer = add_ee_layer
+folium.Map.add_tile_layer = add_tile_layer
 
 # Set up Streamlit layout
 st.set_page_config(page_title="Nevada GDE Water Needs Explorer (Draft)", layout="wide")
@@ -209,6 +481,8 @@ with tab1:
         "Average potential evapotranspiration": None,
         "Average potential water deficit": None
     }
+    layer_options.update({label: None for label in MODEL_LAYERS})
+    layer_options.update({label: None for label in get_model_layers()})
 
 
     # Define information for each layer
@@ -221,50 +495,8 @@ with tab1:
         "Average potential water deficit": "water-deficit"
     }
 
-    layer_assets = {
-        "Administrative groundwater boundaries": "projects/dri-apps/assets/NVAdminGWBoundaries",
-        "Soil texture": "projects/sat-io/open-datasets/CSRL_soil_properties/physical/soil_texture_profile/texture_2550",
-        "Average potential evapotranspiration": "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_ETo_1991_2020",
-        "Average precipitation": "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Precip_1991_2020", 
-        "Average potential water deficit": "projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Water_Deficit_1991_2020",
-    }
-
-    layer_vis_params = {
-        "Soil texture": {
-            'min': 1,
-            'max': 12,
-            'palette': [
-                '#BEBEBE',  # 1 - sand
-                '#FDFD9E',  # 2 - loamy sand
-                '#ebd834',  # 3 - sandy loam
-                '#307431',  # 4 - loam
-                '#CD94EA',  # 5 - silt loam
-                '#546BC3',  # 6 - silt
-                '#92C158',  # 7 - sandy clay loam
-                '#EA6996',  # 8 - clay loam
-                '#6D94E5',  # 9 - silty clay loam
-                '#4C5323',  # 10 - sandy clay
-                '#E93F4A',  # 11 - silty clay
-                '#AF4732'   # 12 - clay
-            ]
-        },
-
-        "Average precipitation": {
-            'min': 0,
-            'max': 750,
-            'palette': ["#f7fbff", "#deebf7", "#c6dbef", "#9ecae1", "#6baed6", "#4292c6", "#2171b5", "#08519c", "#08306b"]
-        },
-        "Average potential evapotranspiration": {
-            'min': 0,
-            'max': 2500,
-            'palette': ['#ffffcc', '#ffe692', '#febf5a', '#fd8d3c', '#f43d25', '#ca0923', '#800026']
-        },
-        "Average potential water deficit": {
-            'min': 0,
-            'max': 2000,
-            'palette': ['#081d58', '#24429b', '#1f80b8', '#41b6c4', '#97d6b9', '#e0f3b2', '#ffffd9']
-        }
-    }
+    layer_assets = LAYER_ASSETS
+    layer_vis_params = LAYER_VIS_PARAMS
 
     selected_layers = {key: False for key in layer_options.keys()}
 
@@ -332,6 +564,13 @@ with tab1:
         for label in layer_options.keys():
             st.checkbox(label, key=f"layer_checkbox_{label}")
 
+        # Modeled layers use the selected rooting depth and soil texture of every pixel
+        if any(st.session_state.get(f"layer_checkbox_{label}") for label in MODEL_LAYERS):
+            model_layer_wtd = st.selectbox(
+                "Modeled layers: water table depth", [1, 3, 6], format_func=lambda wtd: f"{wtd} m",
+                key="model_layer_wtd"
+            )
+
         # Initialize map
         #folium_map = folium.Map(location=st.session_state.selected_coords, zoom_start=9, tiles="OpenStreetMap")
 
@@ -356,26 +595,18 @@ with tab1:
         ).add_to(folium_map)
 
 
-        # Add layers based on checkbox state
+        # Add layers based on checkbox state; tile URLs come from the shared map-ID cache
         for label in layer_options.keys():
             if st.session_state.get(f"layer_checkbox_{label}") and label in layer_assets:
-                asset_id = layer_assets[label]
-                #vis_params = layer_vis_params.get(label, {})
-                vis_params = {**layer_vis_params.get(label, {}), "opacity": 0.5}
-    
-                if label == "Administrative groundwater boundaries":
-                    # Load as FeatureCollection
-                    ee_fc = ee.FeatureCollection(asset_id)
-                    # Convert to image for Folium
-                    # ee_features = ee_fc.style(color='black', width=1)
-                    # folium_map.add_ee_layer(ee_features, {}, label)
-                    styled = ee_fc.style(color='black', width=5)
-                    styled_image = styled.visualize(**{"opacity": 0.65})
-                    folium_map.add_ee_layer(styled_image, {}, label)
-                else:
-                    ee_image = ee.Image(asset_id)   
-                    folium_map.add_ee_layer(ee_image, vis_params, label)
-
+                folium_map.add_tile_layer(get_map_id_cache().tile_url(label), label)
+            elif st.session_state.get(f"layer_checkbox_{label}") and label in MODEL_LAYERS:
+                engine = get_model_engine()
+                rootdepth = st.session_state.previous_rooting_depth or 2
+                url = get_model_layer_url(label, rootdepth, model_layer_wtd, engine.name, engine.version)
+                folium_map.add_tile_layer(url, f"{label} ({rootdepth} m roots, {model_layer_wtd} m WTD)")
+            elif st.session_state.get(f"layer_checkbox_{label}") and label in get_model_layers():
+                image, bounds = get_model_overlay(label)
+                folium.raster_layers.ImageOverlay(image=image, bounds=bounds, opacity=LAYER_OPACITY, name=label).add_to(folium_map)
 
     
         # Add layer control and display map (now includes selected EE layers)
@@ -420,40 +651,18 @@ with tab1:
         st.empty()
 
         try:
-            # Parameters
-            eto_img = ee.Image("projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_ETo_1991_2020")
-            precip_img = ee.Image("projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Precip_1991_2020")
-            pwd_img = ee.Image("projects/localsolve/assets/climate_variables/GRIDMET_Mean_Annual_Water_Deficit_1991_2020")
-            admin_gw = ee.FeatureCollection('projects/dri-apps/assets/NVAdminGWBoundaries')
-
-            eto_value = eto_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_eto')
-            precip_value = precip_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_pr')
-            pwd_value = pwd_img.reduceRegion(ee.Reducer.mean(), coords_ee, 4000).getInfo().get('mean_annual_deficit')
-
-            # BasinID and Basin Name
-            basin_id = admin_gw.filterBounds(coords_ee).getInfo()['features'][0]['properties']['BasinID']
-            basin_name = admin_gw.filterBounds(coords_ee).getInfo()['features'][0]['properties']['BasinName']
-
-            # Soil type determination
-            soil = ee.Image('projects/sat-io/open-datasets/CSRL_soil_properties/physical/soil_texture_profile/texture_2550').rename('texture')
-            soil_lu_dict = ee.Dictionary({
-                "1": "sand",
-                "2": "loamysand",
-                "3": "sandyloam",
-                "4": "loam",
-                "5": "siltloam",
-                "6": "silt",
-                "7": "sandyclayloam",
-                "8": "clayloam",
-                "9": "siltyclayloam",
-                "10": "sandyclay",
-                "11": "siltyclay",
-                "12": "clay"
-            })
-        
-            # Extract soil texture for the point
-            soil_point = soil.reduceRegion(reducer=ee.Reducer.mean(), geometry=coords_ee, scale=30).get('texture')
-            soil_string = soil_lu_dict.get(ee.Number(soil_point).format('%.0f')).getInfo()
+            # Each stage of the results page is memoized on its inputs, so a widget change
+            # reruns only the stages downstream of it (see build_results_graph)
+            engine = get_model_engine()
+            graph = get_results_graph()
+            inputs = {"lat": lat, "lon": lon, "model": (engine.name, engine.version)}
+            point_data = graph.get("point_data", **inputs)
+            eto_value = point_data.eto_value
+            precip_value = point_data.precip_value
+            pwd_value = point_data.pwd_value
+            basin_id = point_data.basin_id
+            basin_name = point_data.basin_name
+            soil_string = point_data.soil_string
 
             # Display summary box before root depth selector
             st.markdown(
@@ -477,33 +686,6 @@ with tab1:
                 unsafe_allow_html=True
             )
         
-            # Water balance calculation
-            year_start = 1991
-            year_end = 2020
-            year_list = ee.List.sequence(year_start, year_end)
-        
-            gm = ee.ImageCollection('IDAHO_EPSCOR/GRIDMET').select(['pr', 'eto'])
-        
-            def calculate_wy_stats(year):
-                date_start = ee.Date.fromYMD(ee.Number(year).subtract(1), 10, 1)
-                date_end = ee.Date.fromYMD(ee.Number(year), 10, 1)
-                return ee.Image(gm.filterDate(date_start, date_end).sum()).set({
-                    'system:time_start': date_start.millis(),
-                    'year': ee.Number(year),
-                    'system:index': ee.Number(year).format('%.0f')
-                })
-        
-            gm_wy = ee.ImageCollection(year_list.map(calculate_wy_stats))
-        
-            def calculate_wb(image):
-                image_ws = image.select('pr').subtract(image.select('eto')).rename('wb')
-                #image_ws = image_ws.divide(100)
-                return image.addBands(image_ws)
-        
-            gm_wy = ee.ImageCollection(gm_wy).map(calculate_wb).toBands()
-            
-            gm_point = gm_wy.reduceRegion(reducer=ee.Reducer.mean(), geometry=coords_ee, scale=4000).getInfo()
-        
             # Rooting depth and soil type controls
             # Define allowed values
             allowed_values = [0.5, 2, 3.6]
@@ -556,6 +738,33 @@ with tab1:
                 index=default_index
             )
 
+            # Management target LAI; defaults to the rooting depth's target and only redraws the LAI plots
+            laithresh = st.slider(
+                "Management target LAI:",
+                min_value=0.0, max_value=4.0, step=0.1,
+                value=lai_threshold(rooting_depth),
+                key=f"laithresh_{rooting_depth}"
+            )
+
+            # Optional extra water table depth (e.g. a measured well) shown alongside the modeled ones
+            custom_wtd = None
+            if st.checkbox("Add a water table depth"):
+                table_depths = get_model_engine().table_depths
+                custom_wtd = round(st.slider(
+                    "Water table depth (m):",
+                    min_value=float(table_depths[0]), max_value=float(table_depths[-1]), step=WTD_TABLE_STEP,
+                    value=2.0
+                ), 1)
+
+            # Coefficient uncertainty bands, offered when the coefficients come with a sampling distribution
+            show_uncertainty = False
+            if get_coefficient_uncertainty() is not None:
+                show_uncertainty = st.checkbox(
+                    "Show coefficient uncertainty (90% bands)",
+                    help=f"{DEFAULT_SAMPLES} model runs with coefficients sampled from "
+                         f"{get_coefficient_uncertainty().source}"
+                )
+
             if (
                 st.session_state.previous_soil_type != soil_type or
                 st.session_state.previous_rooting_depth != rooting_depth
@@ -565,399 +774,26 @@ with tab1:
                 st.session_state.previous_rooting_depth = rooting_depth
 
              
-            # Mock defined variable to override EE operations
-            #gm_point = {'1991_eto': 1258.8973198533058, '1991_pr': 277.44268065690994, '1991_wb': -9.814546391963958, '1992_eto': 1339.4788173437119, '1992_pr': 198.2026747763157, '1992_wb': -11.412761425673962, '1993_eto': 1234.113734871149, '1993_pr': 263.7720437049866, '1993_wb': -9.703416911661625, '1994_eto': 1334.7636932730675, '1994_pr': 213.75563368201256, '1994_wb': -11.210080595910549, '1995_eto': 1166.2698855996132, '1995_pr': 438.0278924703598, '1995_wb': -7.282419931292534, '1996_eto': 1320.879874765873, '1996_pr': 281.16770535707474, '1996_wb': -10.397121694087982, '1997_eto': 1268.3588969111443, '1997_pr': 293.90991020202637, '1997_wb': -9.744489867091179, '1998_eto': 1143.232638180256, '1998_pr': 495.573089748621, '1998_wb': -6.476595484316349, '1999_eto': 1247.8120474815369, '1999_pr': 240.79711747169495, '1999_wb': -10.07014930009842, '2000_eto': 1358.9225591123104, '2000_pr': 234.0520594716072, '2000_wb': -11.248704996407032, '2001_eto': 1343.3759242892265, '2001_pr': 176.1760538816452, '2001_wb': -11.671998704075813, '2002_eto': 1372.3919923007488, '2002_pr': 214.4552606344223, '2002_wb': -11.579367316663266, '2003_eto': 1335.3546098470688, '2003_pr': 254.82380563020706, '2003_wb': -10.805308042168617, '2004_eto': 1366.8700581490993, '2004_pr': 218.14580446481705, '2004_wb': -11.487242536842823, '2005_eto': 1268.5541378259659, '2005_pr': 342.68022459745407, '2005_wb': -9.258739132285118, '2006_eto': 1332.9253282546997, '2006_pr': 336.42576122283936, '2006_wb': -9.964995670318604, '2007_eto': 1381.5141016244888, '2007_pr': 166.56535190343857, '2007_wb': -12.149487497210503, '2008_eto': 1353.2850314378738, '2008_pr': 227.98866021633148, '2008_wb': -11.252963712215424, '2009_eto': 1288.4222103059292, '2009_pr': 292.0265671312809, '2009_wb': -9.963956431746483, '2010_eto': 1257.4372656345367, '2010_pr': 201.6916048824787, '2010_wb': -10.55745660752058, '2011_eto': 1182.088837146759, '2011_pr': 316.8663139939308, '2011_wb': -8.652225231528282, '2012_eto': 1362.4130966365337, '2012_pr': 128.76578524708748, '2012_wb': -12.336473113894463, '2013_eto': 1354.059213846922, '2013_pr': 174.25016695261002, '2013_wb': -11.79809046894312, '2014_eto': 1339.7214939594269, '2014_pr': 222.30873107910156, '2014_wb': -11.174127628803253, '2015_eto': 1329.980028450489, '2015_pr': 254.69928726553917, '2015_wb': -10.7528074118495, '2016_eto': 1332.7939132601023, '2016_pr': 254.1333208680153, '2016_wb': -10.78660592392087, '2017_eto': 1256.099998190999, '2017_pr': 352.6000027656555, '2017_wb': -9.034999954253434, '2018_eto': 1343.899999588728, '2018_pr': 217.80000007152557, '2018_wb': -11.260999995172023, '2019_eto': 1220.5999988168478, '2019_pr': 375.0000013113022, '2019_wb': -8.455999975055455, '2020_eto': 1367.500000834465, '2020_pr': 155.99999940395355, '2020_wb': -12.115000014305116, '2021_eto': 1377.2000001370907, '2021_pr': 163.29999896883965, '2021_wb': -12.13900001168251, '2022_eto': 1293.899999603629, '2022_pr': 193.7999995648861, '2022_wb': -11.00100000038743, '2023_eto': 1219.5999989509583, '2023_pr': 355.3999990224838, '2023_wb': -8.641999999284744}
-        
-            # Parse the dictionary into a DataFrame
-            parsed_data = []
-            for key, value in gm_point.items():
-                year, suffix = key.split('_')
-                parsed_data.append({'wy': int(year), suffix: value})
-        
-            # Combine the parsed data into a DataFrame
-            dfee = pd.DataFrame(parsed_data)
-            dfee = dfee.groupby('wy').first().reset_index()
-        
-            # Calculate annual water balance variables
-            # dfee['wb2'] = dfee['wb'] ** 2  # Square of 'wb'
-            # dfee['wb3'] = dfee['wb'] ** 3  # Cube of 'wb'
-            
-            # Calculate annual water balance variables
-            dfee['eto2'] = dfee['eto'] /10  # divide ‘eto’ by 10
-            dfee['pr2'] = dfee['pr'] ** 2  # Square of 'pr'
-            dfee['pet2'] = dfee['eto2'] ** 2  # Square of ‘eto’/10'
-        
-            # Rename dfee as dfclimate
-            dfclimate = dfee
-        
-            # Load the dataset - ensure paths are correct at the top
-            dfcoeffs = pd.read_csv(PATH_COEFFICIENTS)
-            dfcoeffs['wtd2'] = dfcoeffs['WTD'].apply(lambda x: "Free Drain" if x == 12 else f"{x} m")
-            # print(dfcoeffs)
-        
+
             # Define rooting depth and soil type
             if st.session_state.get_data_clicked:
                 # These are user inputs
                 # TODO: There will be visuals and descriptions to help the user select rooting depth and soil type
                 rd = rooting_depth #0.5 # rooting_depth
                 soilt = str(soil_type)#'clayloam' # soil_type
-            
-                # Filter the coefficients for the soil type and rooting depth
-                # CHANGE these based on rooting depth and soil type
-                dfcoeffs = dfcoeffs[dfcoeffs['rootdepth'] == rd]
-                dfcoeffs = dfcoeffs[dfcoeffs['soiltype'] == soilt]#'clayloam']
-            
-                # Add WTD column to dfclimate
-                wtd_values = [1, 3, 6, 12]
-                dfclimate = pd.concat([dfclimate.assign(WTD=wtd) for wtd in wtd_values], ignore_index=True)
-            
-                # Left join dfclimate and dfcoeffs
-                dfsum = pd.merge(dfclimate, dfcoeffs, left_on='WTD', right_on='WTD', how='left')
-            
+                inputs.update(soil=soilt, rootdepth=rd, laithresh=laithresh, custom_wtd=custom_wtd,
+                              show_uncertainty=show_uncertainty, date=date_str)
+
+                # LAI, AET, AETgw and GW subsidy for every WTD and their summaries; the page is laid out
+                # with an empty slot per chart, filled below as each chart is ready
+                if CHART_BACKEND == "vega-lite":
+                    charts = {**graph.get("chart_specs", **inputs), **graph.get("lai_chart_specs", **inputs)}.items()
+                else:
+                    charts = stream_figures(graph, inputs)
+                slots = {}
 
-                dfsum['LAIcalc'] = (
-                dfsum['LAIIntercept'] +
-                dfsum['pr'] * dfsum['LAIPx'] +
-                dfsum['eto2'] * dfsum['LAIPETx'] +
-                dfsum['pr2'] * dfsum['LAIP2x']+
-                dfsum['pet2'] * dfsum['LAIPET2x']
-                )
-                    
-                dfsum['aetcalc'] = (
-                    dfsum['aetIntercept'] +
-                    dfsum['pr'] * dfsum['aetPx'] +
-                    dfsum['eto2'] * dfsum['aetPETx'] +
-                    dfsum['pr2'] * dfsum['aetP2x'] +
-                    dfsum['pet2'] * dfsum['aetPET2x']
-                )
-                dfsum['aetgwcalc'] = (
-                    dfsum['aetgwIntercept'] +
-                    dfsum['pr'] * dfsum['aetgwPx'] +
-                    dfsum['eto2'] * dfsum['aetgwPETx'] +
-                    dfsum['pr2'] * dfsum['aetgwP2x'] +
-                    dfsum['pet2'] * dfsum['aetgwPET2x']
-                )
-                
-                # calculate GW subsidy based on AET differences rather than using equation
-                etabase = dfsum[(dfsum["wtd2"] == "Free Drain")]
-                etabase['aetcalc2'] = etabase['aetcalc']
-                etabase2 = etabase[['wy','aetcalc2']]
-                dfsum = pd.merge(dfsum, etabase2, on="wy", how="left")
-                dfsum['gwsubscalc'] = (dfsum['aetcalc'] - dfsum['aetcalc2'])
-                dfsum['gwsubscalcratio'] = (dfsum['gwsubscalc'] / dfsum['aetcalc'])
-                
-                # remove remnant error in calcs
-                dfsum["aetgwcalc"]=dfsum["aetgwcalc"].apply(lambda x: 0 if x <1 else x)
-                dfsum["LAIcalc"]=dfsum["LAIcalc"].apply(lambda x: 0 if x <0 else x)
-                dfsum["aetcalc"]=dfsum["aetcalc"].apply(lambda x: 0 if x <1 else x)
-                dfsum["gwsubscalc"]=dfsum["gwsubscalc"].apply(lambda x: 0 if x <1 else x)
-                dfsum["gwsubscalc"]=dfsum[["gwsubscalcratio","gwsubscalc","aetcalc"]].apply(lambda x: x["aetcalc"] if x["gwsubscalcratio"] > 1 else x["gwsubscalc"], axis=1)
-                # # Display results
-                # st.markdown("### We’ve got your data, here is a summary:")
-                # st.markdown(f"""
-                # **Location:** ({lat:.4f}, {lon:.4f})
-                # **Soil type:** {soil_string}
-                # **Climate Data (Sample):** {gm_point}
-                # """)
-            
-                # Set threshold based on root depth
-                laithresh = 1.5 if rd == 0.5 else (2 if rd == 2 else 1 if rd == 3.6 else None)
-                
-                # Group by wtd2 and count rows where LAIcalc >= laithresh
-                filtered_lai = dfsum[dfsum["LAIcalc"] >= laithresh]
-                laisum = (
-                    filtered_lai
-                    .groupby("wtd2")
-                    .size()  # counts the number of rows per group
-                    .reset_index(name="noverthresh")
-                )
-                
-                # Left-join lai with laisum
-                lai2 = pd.merge(dfsum, laisum, on="wtd2", how="left")
-                
-                #identify min and max lai values
-                minlai = lai2["LAIcalc"].min()
-                maxlai = lai2["LAIcalc"].max()
-                maxlai1 = maxlai*1.1
-                
-                # Replace NaN values in 'noverthresh' with 0
-                lai2["noverthresh"] = lai2["noverthresh"].fillna(0)
-                
-                # Calculate the percentage (percoverthresh) and round
-                lai2["percoverthresh"] = round(lai2["noverthresh"] / 30, 2) * 100
-            
-                # Group by wtd2 and calculate min, max of pwd
-                pwdsum = dfsum[
-                    (dfsum["wtd2"] == "Free Drain")
-                ]
-                #identify min and max lai values
-                mineto = pwdsum["eto"].min()*-1.2
-                maxp = pwdsum["pr"].max()*1.1
-                maxpwd = pwdsum["wb"].max()*0.9
-            
-                p_pwd1 = (
-                 ggplot(data=pwdsum)+
-                      geom_bar(aes('wy','pr'), fill="Blue", stat="identity", alpha=0.5)+
-                      geom_bar(aes('wy','eto*-1'), fill="Brown", stat="identity", alpha=0.5)+
-                      geom_line(aes('wy','wb'), color="white")+
-                      geom_point(aes('wy','wb', color='wb'))+
-                      theme_bw()+
-                      geom_text(aes(1990, mineto),label="Potential ET", color="Brown", ha="left", va="top")+
-                      geom_text(aes(1990, maxp),label="Precipitation",color="Blue", ha="left")+
-                      scale_color_distiller(palette="YlGnBu", direction=1)+
-                      ggtitle("Annual Precipitation, Potential ET, and Potential Water Deficit")+
-                      labs(x="Water Year", y="Annual Water Balance (mm)", color="Potential\nWater\nDeficit (mm)")
-                )
-            
-                # Plot LAI time series
-                p_lai1 = (
-                    ggplot(lai2) +
-                    geom_line(aes('wy', 'LAIcalc', linetype='wtd2')) +
-                    geom_point(aes('wy', 'LAIcalc', color='wb')) +
-                    geom_hline(yintercept=laithresh, alpha=0.5) +
-                   # geom_text(aes(x=2007, y=laithresh + 0.1), label=f"Example Management Target, LAI={laithresh}") +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Timeseries of Annual Maximum\nLeaf Area Index (LAI)")+
-                    labs(x="Water Year", y="Annual Maximum Leaf Area Index (LAI)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth",
-                         subtitle=f"Ex. Management Target, LAI={laithresh}")
-                )
-                # p_lai1.save(f"../outputs/python/{st}_{rd}_rootdepth_timeseries_LAI.png", height=4, width=6, units="in", dpi=300)
-            
-                # Plot LAI boxplot
-                p_lai2 = (
-                    ggplot(lai2) +
-                    geom_boxplot(aes('wtd2', 'LAIcalc')) +
-                    geom_point(aes('wtd2', 'LAIcalc', color='wb')) +
-                    geom_hline(yintercept=laithresh, alpha=0.5) +
-                   #geom_text(aes(x='wtd2', y=laithresh, label='percoverthresh'), va="bottom") +
-                   #geom_text(aes(y=laithresh, x=0), label=f"% Years over Management Target, LAI={laithresh}", va="top", ha="left")+
-                    annotate('text', y = maxlai1, x=lai2["wtd2"], label = lai2["percoverthresh"]) +
-                    coord_cartesian(ylim = [minlai, maxlai1], expand = True) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle(f"% Years over\nManagement Target, LAI={laithresh}")+
-                    theme(legend_position="none")+
-                  #  ggtitle(f"Root Depth: {rd}m, Soil Type: {st}") +
-                    labs(x="Water Table Depth", y="Annual Maximum Leaf Area Index (LAI)", subtitle="")
-                )
-            
-                # Group by wtd2 and calculate min, max of aetcalc
-                aetsum = (
-                    dfsum.groupby("wtd2")
-                    .agg(min=("aetcalc", "min"), max=("aetcalc", "max"))
-                    .reset_index()
-                )
-                
-                # Left-join aet with aetsum
-                aet2 = pd.merge(dfsum, aetsum, on="wtd2", how="left")
-                
-                # Round min and max to 0 digits
-                aet2["min"] = aet2["min"].astype(int)
-                aet2["max"] = aet2["max"].astype(int)
-                
-                # Create a rangelab column (e.g., "10-25")
-                aet2["rangelab"] = aet2["min"].astype(str) + "-" + aet2["max"].astype(str)
-                
-                # charttop corresponds to the 'max' column in the DataFrame
-                charttop = aet2["max"]
-                
-                #identify min and max aet values
-                minaet = aet2["aetcalc"].min()
-                maxaet = aet2["aetcalc"].max()
-                maxaet1 = maxaet*1.1
-            
-                p_aet1 = (
-                    ggplot(aet2) +
-                    geom_line(aes('wy', 'aetcalc', linetype='wtd2')) +
-                    geom_point(aes('wy', 'aetcalc', color='wb')) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Timeseries of Annual Actual\nEvapotranspiration (mm)") +
-                    labs(x="Water Year", y="Annual Actual Evapotranspiration (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
-                )
-                # p_aet1.save(f"../outputs/python/{st}_{rd}_rootdepth_timeseries_totalET.png", height=4, width=6, units="in", dpi=300)
-            
-                # Plot AET boxplot
-                p_aet2 = (
-                    ggplot(aet2) +
-                    geom_boxplot(aes('wtd2', 'aetcalc')) +
-                    geom_point(aes('wtd2', 'aetcalc', color='wb')) +
-                   # geom_text(aes(x='wtd2', y='max', label='rangelab'), va="bottom") +
-                    #annotate('text', y = maxaet1, x=aet2["wtd2"], label = aet2["rangelab"]) +
-                    #coord_cartesian(ylim = [minaet, maxaet1], expand = True) +
-                    annotate('text', y = maxaet1, x=aet2["wtd2"], label = aet2["rangelab"]) +
-                    coord_cartesian(ylim = [minaet, maxaet1], expand = True) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Range of Annual\nActual ET (mm)") +
-                    theme(legend_position="none")+
-                    labs(x="Water Table Depth", y="Annual Actual Evapotranspiration (mm)",  color="Annual\nPotential\nWater\nDeficit (mm)", subtitle="")
-                )
-                # p_aet2.save(f"../outputs/python/{st}_{rd}_rootdepth_boxplot_totalET.png", height=4, width=6, units="in", dpi=300)
-            
-            
-                # Filter the DataFrame
-                gwsubs = dfsum[
-                    (dfsum["wtd2"] != "Free Drain")
-                ]
-                
-                # Create 'ratio' column for gwsubscalc/aetcalc
-                gwsubs = gwsubs.assign(ratio = gwsubs["gwsubscalc"] / gwsubs["aetcalc"])
-                
-                # Group by wtd2 and compute min, max, minperc, maxperc
-                gwsubssum = (
-                    gwsubs.groupby("wtd2")
-                    .agg(
-                        min=("gwsubscalc", "min"),
-                        max=("gwsubscalc", "max"),
-                        minperc=("ratio", "min"),   # min of (gwsubscalc / aetcalc)
-                        maxperc=("ratio", "max"),   # max of (gwsubscalc / aetcalc)
-                    )
-                    .reset_index()
-                )
-                
-                # Left-join the summarized data back to the filtered data
-                gwsubs2 = pd.merge(gwsubs, gwsubssum, on="wtd2", how="left")
-                
-                # Round min and max to 0 decimals
-                gwsubs2["min"] = gwsubs2["min"].astype(int)
-                gwsubs2["max"] = gwsubs2["max"].astype(int)
-                
-                # Create a range label (e.g., "10-25")
-                gwsubs2["rangelab"] = gwsubs2["min"].astype(str) + "-" + gwsubs2["max"].astype(str)
-                
-                # Define charttop as the 'max' column
-                charttop = gwsubs2["max"]
-                
-                # Multiply minperc, maxperc by 100 and round
-                gwsubs2["minperc"] = (gwsubs2["minperc"] * 100).astype(int)
-                gwsubs2["maxperc"] = (gwsubs2["maxperc"] * 100).astype(int)
-                
-                # Create a percentage range label (e.g., "10-30% of Actual ET")
-                gwsubs2["rangelabperc"] = (
-                    gwsubs2["minperc"].astype(str)
-                    + "-"
-                    + gwsubs2["maxperc"].astype(str)
-                    + "%"
-                )
-                
-                #identify min and max gwsubs values
-                mingwsubs = gwsubs2["gwsubscalc"].min()
-                maxgwsubs = gwsubs2["gwsubscalc"].max()
-                maxgwsubs1 = maxgwsubs*1.1
-            
-                # Plot GWsubs time series
-                p_gwsubs1 = (
-                    ggplot(gwsubs2) +
-                    geom_line(aes('wy', 'gwsubscalc', linetype='wtd2')) +
-                    geom_point(aes('wy', 'gwsubscalc', color='wb')) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Timeseries of Annual Groundwater\nSubsidy (% of Actual ET)") +
-                    labs(x="Water Year", y="Annual Groundwater Subsidy (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
-                )
-                # p_gwsubs1.save(f"../outputs/python/{st}_{rd}_rootdepth_timeseries_GWsubsET.png", height=4, width=4, units="in", dpi=300)
-                
-                # Plot GWsubs boxplot
-                p_gwsubs2 = (
-                    ggplot(gwsubs2) +
-                    geom_boxplot(aes('wtd2', 'gwsubscalc')) +
-                    geom_point(aes('wtd2', 'gwsubscalc', color='wb')) +
-                   # geom_text(aes(x='wtd2', y='max', label='rangelabperc'), va="bottom") +
-                    annotate('text', y = maxgwsubs1, x=gwsubs2["wtd2"], label = gwsubs2["rangelabperc"]) +
-                    coord_cartesian(ylim = [mingwsubs, maxgwsubs1], expand = True) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Range of Annual Groundwater\nSubsidy (% of Actual ET)") +
-                    theme(legend_position="none")+
-                    labs(x="Water Table Depth", y="Annual Groundwater Subsidy (mm)",  color="Annual Potential\nWater Deficit (mm)")
-                )
-                # Create 'ratio' column for gwetcalc/aetcalc
-                dfsum = dfsum.assign(ratio = dfsum["aetgwcalc"] / dfsum["aetcalc"])
-                
-                # Group by wtd2 and compute min, max, minperc, maxperc
-                aetgwsum = (
-                    dfsum.groupby("wtd2")
-                    .agg(
-                        min=("aetgwcalc", "min"),
-                        max=("aetgwcalc", "max"),
-                        minperc=("ratio", "min"),   # min of (aetgwcalccalc / aetcalc)
-                        maxperc=("ratio", "max")   # max of (aetgwcalccalc / aetcalc)
-                    )
-                    .reset_index()
-                )
-                
-                
-                # Left-join aetaetgw with aetgwsum
-                aetgw2 = pd.merge(dfsum, aetgwsum, on="wtd2", how="left")
-                
-                # Round min and max to 0 decimals
-                aetgw2["min"] = aetgw2["min"].astype(int)
-                aetgw2["max"] = aetgw2["max"].astype(int)
-                
-                # Create a range label (e.g., "10-25")
-                aetgw2["rangelab"] = aetgw2["min"].astype(str) + "-" + aetgw2["max"].astype(str)
-                
-                # Define charttop as the 'max' column
-                charttop = aetgw2["max"]
-                
-                # Multiply minperc, maxperc by 100 and round
-                aetgw2["minperc"] = (aetgw2["minperc"] * 100).astype(int)
-                aetgw2["maxperc"] = (aetgw2["maxperc"] * 100).astype(int)
-                
-                # Create a percentage range label (e.g., "10-30% of Actual ET")
-                aetgw2["rangelabperc"] = (
-                    aetgw2["minperc"].astype(str)
-                    + "-"
-                    + aetgw2["maxperc"].astype(str)
-                    + "%"
-                )
-                
-                #identify min and max aetgwc values
-                minaetgw = aetgw2["aetgwcalc"].min()
-                maxaetgw = aetgw2["aetgwcalc"].max()
-                maxaetgw1 = maxaetgw*1.1
-            
-                # Plot AETAETGW time series
-                p_aetgw1 = (
-                    ggplot(aetgw2) +
-                    geom_line(aes('wy', 'aetgwcalc', linetype='wtd2')) +
-                    geom_point(aes('wy', 'aetgwcalc', color='wb')) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Timeseries of Annual Groundwater ET\n(% of Actual ET)") +
-                    labs(x="Water Year", y="Annual Actual Evapotranspiration-Groundwater (mm)", color="Annual\nPotential\nWater\nDeficit (mm)", linetype="Water Table\nDepth")
-                )
-                #p_aetgw1.save(f"../outputs/python/{st}_{rd}_rootdepth_timeseries_GWET.png", height=4, width=4, units="in", dpi=300)
-                
-                # Plot AETAETGW boxplot
-                p_aetgw2 = (
-                    ggplot(aetgw2) +
-                    geom_boxplot(aes('wtd2', 'aetgwcalc')) +
-                    geom_point(aes('wtd2', 'aetgwcalc', color='wb')) +
-                    #geom_text(aes(x='wtd2', y='max', label='rangelabperc')) +
-                    annotate('text', y = maxaetgw1, x=aetgw2["wtd2"], label = aetgw2["rangelabperc"]) +
-                    coord_cartesian(ylim = [minaetgw, maxaetgw1], expand = True) +
-                    theme_bw() +
-                    scale_color_distiller(palette="YlGnBu", direction=1) +
-                    ggtitle("Range of Annual Groundwater\nET (% of Actual ET)") +
-                    theme(legend_position="none")+
-                    labs(x="Water Table Depth", y="Annual Actual Evapotranspiration-Groundwater (mm)",  color="Annual Potential\nWater Deficit (mm)")
-                )
-            
-                # Convert `p_lai1` and `p_lai2` to images
-                def plot_to_image(plot):
-                    buf = BytesIO()
-                    plot.save(buf, format="png", height=4, width=6, units="in", dpi=300)
-                    buf.seek(0)
-                    return Image.open(buf)
-            
-                img_p_lai1 = plot_to_image(p_lai1)
-                img_p_lai2 = plot_to_image(p_lai2)
-            
                 st.markdown("### Cumulative Plot")
-                st.pyplot(ggplot.draw(p_pwd1))
+                slots["pwd1"] = st.empty()
             
                 # Display the plots side by side on the main panel
                 st.markdown("### Leaf Area Index (LAI) Analysis")
@@ -968,12 +804,23 @@ with tab1:
                 # Render and display the first plot in the first column
                 with col1:
                     st.markdown("#### Annual Maximum Leaf Area Index (LAI)")
-                    st.pyplot(ggplot.draw(p_lai1))
+                    slots["lai1"] = st.empty()
             
                 # Render and display the second plot in the second column
                 with col2:
                     st.markdown("#### Boxplot of Leaf Area Index (LAI)")
-                    st.pyplot(ggplot.draw(p_lai2))
+                    slots["lai2"] = st.empty()
+
+                depth = graph.get("critical_wtd", **inputs)
+                if np.isinf(depth):
+                    st.caption(f"LAI reaches {laithresh:g} in at least {CRITICAL_PERCENT}% of years without groundwater (free drain).")
+                elif np.isnan(depth):
+                    st.caption(f"LAI reaches {laithresh:g} in fewer than {CRITICAL_PERCENT}% of years even with the water table at 1 m.")
+                else:
+                    deepest = max(wtd for wtd in get_model_engine().wtds if wtd != FREE_DRAIN_WTD)
+                    deeper = " or deeper" if depth == deepest else ""
+                    st.caption(f"Critical water table depth: LAI reaches {laithresh:g} in at least {CRITICAL_PERCENT}% "
+                               f"of years with groundwater at {depth:.1f} m{deeper}.")
             
                 # Second row: Display AET plots
                 st.markdown("### Actual Evapotranspiration (AET) Analysis")
@@ -982,12 +829,12 @@ with tab1:
                 # Render and display the third plot in the first column of the second row
                 with col3:
                     st.markdown("#### Annual Actual Evapotranspiration-Total (AET)")
-                    st.pyplot(ggplot.draw(p_aet1))
+                    slots["aet1"] = st.empty()
             
                 # Render and display the fourth plot in the second column of the second row
                 with col4:
                     st.markdown("#### Boxplot of Annual Actual Evapotranspiration-Total (AET)")
-                    st.pyplot(ggplot.draw(p_aet2))
+                    slots["aet2"] = st.empty()
             
                 # Third row: Display Groundwater Subsidy (GWsubs) Analysis plots
                 st.markdown("### Groundwater Subsidy (GWsubs) Analysis")
@@ -996,11 +843,11 @@ with tab1:
                 # Render and display the third set of plots
                 with col5:
                     st.markdown("#### Groundwater Subsidy Time Series")
-                    st.pyplot(ggplot.draw(p_gwsubs1))
+                    slots["gwsubs1"] = st.empty()
             
                 with col6:
                     st.markdown("#### Boxplot of Annual Groundwater Subsidy")
-                    st.pyplot(ggplot.draw(p_gwsubs2))
+                    slots["gwsubs2"] = st.empty()
             
             
                 # Fourth row: Display Groundwater Subsidy (GWsubs) Analysis plots
@@ -1010,260 +857,63 @@ with tab1:
                 # Render and display the fourth set of plots
                 with col7:
                     st.markdown("#### Annual Actual Evapotranspiration-Groundwater (mm)")
-                    st.pyplot(ggplot.draw(p_aetgw1))
+                    slots["aetgw1"] = st.empty()
             
                 with col8:
                     st.markdown("#### Boxplot of Annual Actual Evapotranspiration-Groundwater (mm)")
-                    st.pyplot(ggplot.draw(p_aetgw2))        
-
-                #<b>Nevada GDE Water Needs Explorer Tool Output</b><br/><br/> 
-                # <div style="font-size:32pt; text-align:center;"><b>Nevada GDE Water Needs Explorer Tool Output</b></div><br/><br/>
-                def first_page(map_img_buffer=None):
-                    buffer = io.BytesIO()
-                    doc = SimpleDocTemplate(buffer, pagesize=LETTER)
-                    styles = getSampleStyleSheet()
-                    story = []
-
-                    text = f"""
-                    <font size=18><b>Nevada GDE Water Needs Explorer Tool Output</b></font><br/><br/>
-
-                                        
-                    Estimates are based on model estimates but have uncertainty due to the following simplifications:<br/>
-                    1) uniform soil texture in soil column is assumed;<br/>
-                    2) variation in root distribution is not considered;<br/>
-                    3) species-level differences are not accounted for;<br/>
-                    4) groundwater depths are assumed constant over time.<br/><br/>
-    
-                    <b>Date:</b> {date_str}<br/>
-                    <b>Location:</b> {lat:.2f} N, {lon:.2f} W <br/>
-                    <b>Soil type:</b> {soilt}<br/>
-                    <b>Annual precipitation:</b> {precip_value:.2f} mm<br/>
-                    <b>Annual evaporative demand:</b> {eto_value:.2f} mm<br/>
-                    <b>Root depth:</b> {rd} m<br/>   
-                    <b>Admin Basin ID:</b> {basin_id}<br/>
-                    <b>Admin Basin Name:</b> {basin_name}
-                    """
-                    
-                    story.append(Paragraph(text, styles["Normal"]))
-                    story.append(Spacer(1, 0.25 * inch))
-                
-                    # Add map image
-                    if map_img_buffer:
-                        story.append(Paragraph("<b>Map Location:</b>", styles["Normal"]))
-                        story.append(reportImage(map_img_buffer, width=6 * inch, height=4 * inch))
-                
-                    doc.build(story)
-                    buffer.seek(0)
-                    return buffer
-
-                
-                def add_definitions_to_pdf(definition_text, image_url=PATH_LOGOS):
-                    """
-                    Renders HTML-formatted definitions_text (with hyperlinks) into a standalone PDF buffer.
-                    """
-                    buffer = io.BytesIO()
-                    doc = SimpleDocTemplate(buffer, pagesize=LETTER)
-                    styles = getSampleStyleSheet()
-                    story = []
-                
-                    story.append(Paragraph(definition_text, styles["Normal"]))
-                    story.append(Spacer(1, 0.25 * inch))
-
-                    # Add image from URL (optional)
-                    if image_url:
-                        try:
-                            img_response = requests.get(image_url)
-                            img_response.raise_for_status()
-                
-                            # Open with PIL and convert to RGB
-                            pil_img = Image.open(io.BytesIO(img_response.content)).convert("RGB")
-                
-                            # Save to byte array in PNG format
-                            img_byte_arr = io.BytesIO()
-                            pil_img.save(img_byte_arr, format='PNG')
-                            img_byte_arr.seek(0)
-                
-                            # Create ReportLab Image and append to story
-                            rl_img = reportImage(img_byte_arr, width=7*inch, height=2*inch)
-                            story.append(rl_img)
-                        except Exception as e:
-                            st.error(f"[ERROR] Failed to load image from URL: {e}")
-                
-                    doc.build(story)
-                    buffer.seek(0)
-                    return buffer
-
-               
-                def remove_duplicate_titles(fig):
-                    try:
-                        fig.suptitle("")  # remove any suptitle
-                        for ax in fig.axes:
-                            ax.set_title("")  # remove subplot titles
-                    except Exception:
-                        pass
-                    return fig
-
-               
-                # def strip_plot_titles(gg):
-                #     """
-                #     Safely remove title, subtitle, and caption from a Plotnine ggplot object
-                #     to prevent duplication in matplotlib rendering.
-                #     """
-                #     return gg + labs(title=None, subtitle=None, caption=None)
-
-                
-                def strip_plot_titles(ggplot_obj):
-                    """
-                    Clean a ggplot object for PDF export by removing ggplot titles, subtitles,
-                    and also clearing any matplotlib axis/figure titles after draw().
-                    """
-                    # Strip titles from ggplot labels
-                    clean_gg = ggplot_obj + labs(title=None, subtitle=None, caption=None)
-                
-                    # Render to matplotlib figure
-                    fig = clean_gg.draw()
-                
-                    # Clear matplotlib suptitle
-                    fig.suptitle("")
-                    
-                    # Clear each axis title (which is where duplication usually occurs)
-                    for ax in fig.axes:
-                        ax.set_title("")
-                        ax.set_xlabel("")
-                        ax.set_ylabel("")
-                
-                    return fig
-
-
-                def save_plots_to_pdf(lat=lat, lon=-lon, soil_string=soilt):
-                
-                    pdf_buffer = io.BytesIO()
-                    DPI = 300
-                    MAX_WIDTH_PX = int(LETTER_WIDTH_IN * DPI)
-
-                
-                    with PdfPages(pdf_buffer) as pdf:
-                        
-                        ### -------- PAGE 1: PLOT + MAP SNAPSHOT -------- ###
-                        fig_pwd1 = p_pwd1.draw()
-                        #fig_pwd1 = strip_plot_titles(p_pwd1)#.draw()
-                        fig_pwd1.set_size_inches(8, 6)
-                        buf_pwd1 = io.BytesIO()
-                        fig_pwd1.savefig(buf_pwd1, format='png', dpi=DPI, bbox_inches='tight')
-                        plt.close(fig_pwd1)
-                        buf_pwd1.seek(0)
-                        img_pwd1 = Image.open(buf_pwd1)
-                        
-                        # Place plot image on fixed-size canvas (centered)
-                        canvas_px = (int(LETTER_WIDTH_IN * DPI), int(LETTER_HEIGHT_IN * DPI))
-                        canvas = Image.new("RGB", canvas_px, (255, 255, 255))
-                        x_offset = (canvas_px[0] - img_pwd1.width) // 2
-                        y_offset = (canvas_px[1] - img_pwd1.height) // 2  # small top margin
-                        canvas.paste(img_pwd1, (x_offset, y_offset))
-                        
-                        fig, ax = plt.subplots(figsize=(LETTER_WIDTH_IN, LETTER_HEIGHT_IN))
-                        ax.axis('off')
-                        ax.imshow(canvas)
-                        pdf.savefig(fig, bbox_inches='tight')
-                        plt.close(fig)
-                
-                        ### -------- PAGES 2+: SIDE-BY-SIDE PLOTS -------- ###
-                        paired_plots = [
-                            (p_lai1, "Annual Maximum Leaf Area Index (LAI)", p_lai2, "Boxplot of Leaf Area Index (LAI)"),
-                            (p_aet1, "Annual Actual Evapotranspiration-Total (AET)", p_aet2, "Boxplot of Annual AET-Total"),
-                            (p_gwsubs1, "Groundwater Subsidy Time Series", p_gwsubs2, "Boxplot of Groundwater Subsidy"),
-                            (p_aetgw1, "Annual AET-Groundwater", p_aetgw2, "Boxplot of AET-Groundwater")
-                        ]
-
-                        for plot1, title1, plot2, title2 in paired_plots:
-                            fig1 = plot1.draw()
-                            fig2 = plot2.draw()
-                            # fig1 = strip_plot_titles(plot1)#.draw()
-                            # fig2 = strip_plot_titles(plot2)#.draw()
-                            
-                            fig1.set_size_inches(6, 4)
-                            fig2.set_size_inches(6, 4)
-                        
-                            buf1 = io.BytesIO()
-                            buf2 = io.BytesIO()
-                            fig1.savefig(buf1, format='png', dpi=DPI, bbox_inches='tight')
-                            fig2.savefig(buf2, format='png', dpi=DPI, bbox_inches='tight')
-                            plt.close(fig1)
-                            plt.close(fig2)
-                        
-                            buf1.seek(0)
-                            buf2.seek(0)
-                            img1 = Image.open(buf1)
-                            img2 = Image.open(buf2)
-                        
-                            # Create a blank white canvas with US Letter size
-                            canvas_px = (int(LETTER_WIDTH_IN * DPI), int(LETTER_HEIGHT_IN * DPI))
-                            canvas = Image.new("RGB", canvas_px, (255, 255, 255))
-                        
-                            # # Paste both images centered horizontally
-                            # x_margin = int((canvas_px[0] - (img1.width + img2.width)) / 2)
-                            # y_margin = int((canvas_px[1] - max(img1.height, img2.height)) / 2)
-                        
-                            # canvas.paste(img1, (x_margin, y_margin))
-                            # canvas.paste(img2, (x_margin + img1.width, y_margin))
-
-                            # Paste both images vertically, centered horizontally
-                            x_margin1 = int((canvas_px[0] - img1.width) / 2)
-                            x_margin2 = int((canvas_px[0] - img2.width) / 2)
-                            
-                            total_height = img1.height + img2.height
-                            y_start = int((canvas_px[1] - total_height) / 2)
-                            
-                            canvas.paste(img1, (x_margin1, y_start))
-                            canvas.paste(img2, (x_margin2, y_start + img1.height))
-                        
-                            # Convert to matplotlib figure
-                            fig, ax = plt.subplots(figsize=(LETTER_WIDTH_IN, LETTER_HEIGHT_IN))
-                            ax.axis('off')
-                            ax.imshow(canvas)
-                            pdf.savefig(fig, bbox_inches='tight')
-                            plt.close(fig)
-
-                
-                        ### -------- FINAL SECTION: DEFINITIONS + REFERENCES -------- ###
-                    
-                        #add_definitions_to_pdf(pdf, definitions_text)
-                
-                
-                    pdf_buffer.seek(0)
-                    return pdf_buffer
-                
-                
-                # Button to generate and download PDF
-                map_buffer = create_map_snapshot(lat, lon)
-                intro_page = first_page(map_img_buffer=map_buffer)
-                pdf_buffer = save_plots_to_pdf()
-                definitions_pdf = add_definitions_to_pdf(definitions_text, image_url=PATH_LOGOS)
-                
-                # Rewind both buffers to the start
-                # pdf_buffer.seek(0)
-                # definitions_pdf.seek(0)
-                
-                # Create merger
-                merger = PdfMerger()
-                
-                # Load both as PdfReader and append
-                merger.append(intro_page)
-                merger.append(pdf_buffer)
-                merger.append(definitions_pdf)
-                
-                # Write merged output to a new BytesIO buffer
-                merged_pdf = io.BytesIO()
-                merger.write(merged_pdf)
-                merger.close()
-                merged_pdf.seek(0)
-                
-                st.download_button(
-                    label="Download Report as PDF",
-                    data=merged_pdf, #definitions_pdf,
-                    file_name="Nevada GDE Water Needs Explorer Tool Output.pdf",
-                    mime="application/pdf"
+                    slots["aetgw2"] = st.empty()
+
+                for name, chart in charts:
+                    show_chart(chart, slots[name])
+
+                # Whole-basin distributions for the administrative basin of this point
+                basin_rows = get_basin_summaries().lookup(basin_id, rd) if get_basin_summaries() else None
+                if basin_rows is not None:
+                    st.markdown(f"### Basin Summary: {basin_name}")
+                    st.write(
+                        f"Area-weighted 10th, 50th and 90th percentiles over the {int(basin_rows['n_cells'].iloc[0])} "
+                        f"GRIDMET cells in the basin and all water years, each cell with its own soil texture "
+                        f"and a {rd} m rooting depth."
+                    )
+                    st.dataframe(
+                        basin_rows[["wtd2", "LAI_p10", "LAI_median", "LAI_p90", "percoverthresh", "aet_p10", "aet_median",
+                                    "aet_p90", "gwsubs_p10", "gwsubs_median", "gwsubs_p90"]].round(2)
+                        .rename(columns={"wtd2": "Water Table Depth", "percoverthresh": f"% over LAI={lai_threshold(rd)}"}),
+                        hide_index=True
+                    )
+
+                # Response surfaces over drier/wetter and cooler/hotter versions of the observed climate
+                st.markdown("### Climate Scenarios")
+                st.write(
+                    "The model re-run with every year's precipitation scaled and every year's reference ET shifted, "
+                    "to show how water needs change under drier or hotter conditions."
                 )
+                scenario_surface = st.selectbox(
+                    "Scenario response:",
+                    options=list(SCENARIO_SURFACES),
+                    format_func=SCENARIO_SURFACES.get
+                )
+                scenario_laithresh = laithresh if scenario_surface == "percoverthresh" else None
+                st.pyplot(graph.get("scenario_image", scenario_surface=scenario_surface,
+                                    scenario_laithresh=scenario_laithresh, **inputs))
+
+                # The report is only built on request, so reruns from the inputs (e.g. the LAI target slider) do not
+                # pay for it; it stays downloadable until an input changes
+                if st.button("Prepare Report as PDF"):
+                    st.session_state.report_inputs = dict(inputs)
+                if st.session_state.get("report_inputs") == inputs:
+                    st.download_button(
+                        label="Download Report as PDF",
+                        data=graph.get("report", **inputs),
+                        file_name="Nevada GDE Water Needs Explorer Tool Output.pdf",
+                        mime="application/pdf"
+                    )
+
+                if query_params.get("debug") == "stages":
+                    st.sidebar.markdown("### Stage cache")
+                    st.sidebar.dataframe(pd.DataFrame(graph.stats()).T)
+                    st.sidebar.markdown("### Figure cache (all sessions)")
+                    st.sidebar.json(get_figure_cache().stats())
 
             render_footer()
         